@@ -1,23 +1,161 @@
+import os
+import sqlite3
+from typing import Any, List, Optional, TYPE_CHECKING
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Blueprint, current_app, Flask, jsonify, make_response, Response, request
 # from flask_cors import CORS
 
 from meal_max.models import kitchen_model
-from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.utils.admission import (
+    admit_writes,
+    hold_writer_slot,
+    install_admission_control,
+    limit_write_rate,
+    writer_slot,
+    writer_slot_rejected,
+    WriterSlotUnavailable
+)
+from meal_max.utils.compaction import Compactor
+from meal_max.utils.http_utils import (
+    compress_response,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    stream_csv,
+    stream_json_list,
+    stream_ndjson
+)
+from meal_max.utils.json_provider import install_json_provider
+from meal_max.utils.metrics import install_metrics
+from meal_max.utils.readiness import ReadinessMonitor
+from meal_max.utils.retry import install_request_deadline
+from meal_max.utils import sql_utils
+
+if TYPE_CHECKING:
+    from meal_max.models.battle_model import BattleModel
+    from meal_max.models.matchmaking_model import Matchmaker
+
+
+api = Blueprint('api', __name__)
+
+
+def create_app() -> Flask:
+    """
+    Creates and configures the Flask app.
+
+    Only the app, its hooks and the routes are set up here. The BattleModel (and the HTTP client
+    libraries behind random_utils) are created the first time a route needs them; see
+    get_battle_model.
+
+    Returns:
+        Flask: The configured application.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    app = Flask(__name__)
+    # This bypasses standard security stuff we'll talk about later
+    # If you get errors that use words like cross origin or flight,
+    # uncomment this
+    # CORS(app)
+
+    # Compress large responses for clients that accept gzip or brotli
+    app.after_request(compress_response)
+
+    # Serialize responses with orjson (or the stdlib fallback) instead of Flask's default provider
+    if os.getenv("FAST_JSON_PROVIDER", "true").lower() == "true":
+        install_json_provider(app)
+
+    # Per-route request counts, errors, latency histograms and in-flight gauges at /api/metrics
+    install_metrics(app)
+
+    # Per-client rate limit and a single-writer queue in front of the write routes (429 when full)
+    install_admission_control(app)
+
+    # Writes retry transient "database is locked" errors until the request's deadline
+    install_request_deadline(app)
+
+    # Clear by restoring an empty snapshot instead of re-running the create table script
+    if os.getenv("FAST_RESET", "false").lower() == "true":
+        kitchen_model.enable_fast_reset()
+
+    # Seeded fixtures for /api/restore-fixture, given as name=path,name=path
+    for fixture in filter(None, os.getenv("RESET_FIXTURES", "").split(",")):
+        name, _, path = fixture.partition("=")
+        kitchen_model.register_fixture(name.strip(), path.strip())
+
+    # Archive old soft-deleted meals in the background (POST /api/compact runs a pass on demand)
+    compactor = app.extensions['compactor'] = Compactor("meals")
+    if os.getenv("COMPACTION_ENABLED", "false").lower() == "true":
+        compactor.start()
 
+    # Add the generated win_pct/wilson columns and sort indexes to databases created without them
+    try:
+        kitchen_model.ensure_leaderboard_schema()
+    except sqlite3.Error as e:
+        app.logger.warning("Leaderboard columns not checked at startup: %s", str(e))
+
+    # Add the data version the ETags are built from to databases created without it
+    try:
+        kitchen_model.ensure_data_version_schema()
+    except sqlite3.Error as e:
+        app.logger.warning("Data version not checked at startup: %s", str(e))
 
-# Load environment variables from .env file
-load_dotenv()
+    # Build the autocomplete index now rather than on the first type-ahead request
+    if os.getenv("AUTOCOMPLETE_PRELOAD", "true").lower() == "true":
+        try:
+            kitchen_model.get_name_index()
+        except sqlite3.Error as e:
+            app.logger.warning("Meal name index not built at startup, will retry on first use: %s", str(e))
 
-app = Flask(__name__)
-# This bypasses standard security stuff we'll talk about later
-# If you get errors that use words like cross origin or flight,
-# uncomment this
-# CORS(app)
+    app.register_blueprint(api)
+    return app
+
+def get_battle_model() -> "BattleModel":
+    """
+    Returns the app's BattleModel, creating it on first use.
+
+    Returns:
+        BattleModel: The model shared by every request to this app.
+    """
+    model = current_app.extensions.get('battle_model')
+    if model is None:
+        from meal_max.models.battle_model import BattleModel
+        from meal_max.utils.random_utils import SeededRandom
+        # Battles draw from a seeded stream instead of random.org when BATTLE_SEED is set
+        seed = os.getenv("BATTLE_SEED")
+        model = current_app.extensions.setdefault(
+            'battle_model', BattleModel(SeededRandom(int(seed)) if seed else None))
+    return model
+
+def get_matchmaker() -> "Matchmaker":
+    """
+    Returns the app's Matchmaker, starting its background battles on first use.
+
+    Returns:
+        Matchmaker: The matchmaking queue shared by every request to this app.
+    """
+    matchmaker = current_app.extensions.get('matchmaker')
+    if matchmaker is None:
+        from meal_max.models.matchmaking_model import Matchmaker
+        matchmaker = current_app.extensions.setdefault('matchmaker', Matchmaker())
+        matchmaker.start()
+    return matchmaker
+
+def get_readiness_monitor() -> ReadinessMonitor:
+    """
+    Returns the app's ReadinessMonitor, starting it on first use.
+
+    Returns:
+        ReadinessMonitor: The monitor checking the database and meals table in the background.
+    """
+    monitor = current_app.extensions.get('readiness_monitor')
+    if monitor is None:
+        monitor = current_app.extensions.setdefault('readiness_monitor', ReadinessMonitor(("meals",)))
+        monitor.start()
+    return monitor
 
-# Initialize the BattleModel
-battle_model = BattleModel()
 
 ####################################################
 #
@@ -26,7 +164,7 @@ battle_model = BattleModel()
 ####################################################
 
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def healthcheck() -> Response:
     """
     Health check route to verify the service is running.
@@ -34,29 +172,82 @@ def healthcheck() -> Response:
     Returns:
         JSON response indicating the health status of the service.
     """
-    app.logger.info('Health check')
+    current_app.logger.info('Health check')
     return make_response(jsonify({'status': 'healthy'}), 200)
 
-@app.route('/api/db-check', methods=['GET'])
+@api.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
     Route to check if the database connection and meals table are functional.
 
+    Serves the result of the most recent background check (see get_readiness_monitor), so probes
+    do not open database connections.
+
     Returns:
-        JSON response indicating the database health status.
+        JSON response indicating the database health status and how long the check took.
     Raises:
         404 error if there is an issue with the database.
     """
+    status = get_readiness_monitor().status()
+    if not status['ready']:
+        current_app.logger.error("Database check failed: %s", status['error'])
+        return make_response(jsonify({'error': status['error']}), 404)
+    return make_response(jsonify({
+        'database_status': 'healthy',
+        'latency_ms': status['latency_ms'],
+        'age_seconds': status['age_seconds']
+    }), 200)
+
+
+@api.route('/api/ready', methods=['GET'])
+def readiness() -> Response:
+    """
+    Readiness route for orchestrator probes. Liveness is /api/health, which never touches the database.
+
+    Returns:
+        JSON response with the cached readiness result, per-check latencies and its age.
+    Raises:
+        503 error if the last check failed or is older than READINESS_MAX_AGE.
+    """
+    status = get_readiness_monitor().status()
+    return make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@api.route('/api/sql-stats', methods=['GET'])
+def sql_stats() -> Response:
+    """
+    Route to get per-statement SQL timings collected when SQL_TRACE is enabled.
+
+    Returns:
+        JSON response with count, rows and p50/p99 latency for each normalized statement, and the
+        read and write connections in use.
+    """
+    current_app.logger.info("Retrieving SQL stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': sql_utils.SQL_TRACE,
+        'statements': sql_utils.get_sql_stats(),
+        'connections': sql_utils.get_connection_stats()
+    }), 200)
+
+@api.route('/api/compact', methods=['POST'])
+@admit_writes
+def compact() -> Response:
+    """
+    Route to archive soft-deleted meals past the age threshold and reclaim the freed pages now.
+
+    Returns:
+        JSON response with the compaction report (rows archived, batches and reclaimed pages).
+    Raises:
+        500 error if there is an issue compacting the table.
+    """
+    current_app.logger.info("Compacting meals")
     try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if meals table exists...")
-        check_table_exists("meals")
-        app.logger.info("meals table exists.")
-        return make_response(jsonify({'database_status': 'healthy'}), 200)
+        report = current_app.extensions['compactor'].run_now()
+        return make_response(jsonify({'status': 'success', 'report': report}), 200)
     except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
+        current_app.logger.error("Failed to compact meals: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
 
 
 ##########################################################
@@ -66,7 +257,8 @@ def db_check() -> Response:
 ##########################################################
 
 
-@app.route('/api/create-meal', methods=['POST'])
+@api.route('/api/create-meal', methods=['POST'])
+@admit_writes
 def add_meal() -> Response:
     """
     Route to add a new meal to the database.
@@ -83,7 +275,7 @@ def add_meal() -> Response:
         400 error if input validation fails.
         500 error if there is an issue adding the combatant to the database.
     """
-    app.logger.info('Creating new meal')
+    current_app.logger.info('Creating new meal')
     try:
         # Get the JSON data from the request
         data = request.get_json()
@@ -106,16 +298,17 @@ def add_meal() -> Response:
             return make_response(jsonify({'error': 'Price must be a valid float with at most two decimal places'}), 400)
 
         # Call the kitchen_model function to add the combatant to the database
-        app.logger.info('Adding meal: %s, %s, %.2f, %s', meal, cuisine, price, difficulty)
+        current_app.logger.info('Adding meal: %s, %s, %.2f, %s', meal, cuisine, price, difficulty)
         kitchen_model.create_meal(meal, cuisine, price, difficulty)
 
-        app.logger.info("Combatant added: %s", meal)
+        current_app.logger.info("Combatant added: %s", meal)
         return make_response(jsonify({'status': 'success', 'combatant': meal}), 201)
     except Exception as e:
-        app.logger.error("Failed to add combatant: %s", str(e))
+        current_app.logger.error("Failed to add combatant: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/clear-meals', methods=['DELETE'])
+@api.route('/api/clear-meals', methods=['DELETE'])
+@admit_writes
 def clear_catalog() -> Response:
     """
     Route to clear all meals (recreates the table).
@@ -124,14 +317,40 @@ def clear_catalog() -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info("Clearing the meals")
+        current_app.logger.info("Clearing the meals")
         kitchen_model.clear_meals()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error clearing catalog: {e}")
+        current_app.logger.error(f"Error clearing catalog: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
+@api.route('/api/restore-fixture/<string:name>', methods=['POST'])
+@admit_writes
+def restore_fixture(name: str) -> Response:
+    """
+    Route to replace the meals with a seeded fixture registered through RESET_FIXTURES.
+
+    Path Parameter:
+        - name (str): The name of the fixture.
+
+    Returns:
+        JSON response indicating success of the operation or error message.
+    Raises:
+        400 error if no fixture with this name is registered.
+        500 error if there is an issue restoring the fixture.
+    """
+    try:
+        current_app.logger.info(f"Restoring fixture: {name}")
+        kitchen_model.restore_fixture(name)
+        return make_response(jsonify({'status': 'success', 'fixture': name}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error(f"Error restoring fixture: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
+@admit_writes
 def delete_meal(meal_id: int) -> Response:
     """
     Route to delete a meal by its ID. This performs a soft delete by marking it as deleted.
@@ -143,15 +362,15 @@ def delete_meal(meal_id: int) -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info(f"Deleting meal by ID: {meal_id}")
+        current_app.logger.info(f"Deleting meal by ID: {meal_id}")
 
         kitchen_model.delete_meal(meal_id)
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error deleting meal: {e}")
+        current_app.logger.error(f"Error deleting meal: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
+@api.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
 def get_meal_by_id(meal_id: int) -> Response:
     """
     Route to get a meal by its ID.
@@ -160,18 +379,65 @@ def get_meal_by_id(meal_id: int) -> Response:
         - meal_id (int): The ID of the meal.
 
     Returns:
-        JSON response with the meal details or error message.
+        JSON response with the meal details or error message. Responds with 304 and no body
+        if the request's If-None-Match header matches the current ETag.
     """
     try:
-        app.logger.info(f"Retrieving meal by ID: {meal_id}")
+        current_app.logger.info(f"Retrieving meal by ID: {meal_id}")
+
+        # Read the version before querying so a concurrent write can only make the ETag stale
+        etag = make_etag('get-meal-by-id', meal_id, kitchen_model.get_data_version())
+        if is_not_modified(etag):
+            return not_modified_response(etag)
 
         meal = kitchen_model.get_meal_by_id(meal_id)
-        return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+        response = make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+        response.set_etag(etag, weak=True)
+        return response
     except Exception as e:
-        app.logger.error(f"Error retrieving meal by ID: {e}")
+        current_app.logger.error(f"Error retrieving meal by ID: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-meal-by-name/<string:meal_name>', methods=['GET'])
+@api.route('/api/get-meals', methods=['GET'])
+def get_meals() -> Response:
+    """
+    Route to get several meals by ID in one request.
+
+    Query Parameters:
+        - ids (str): Comma-separated meal IDs (at most 1000), e.g. ids=1,2,3. May be repeated.
+
+    Returns:
+        JSON response with one entry per distinct ID, in the order requested, each with a status
+        of 'found' (with the meal), 'deleted' or 'missing'. Responds with 304 and no body if the
+        request's If-None-Match header matches the current ETag.
+    Raises:
+        400 error if the ids are missing, not integers or more than 1000.
+        500 error if there is an issue retrieving the meals.
+    """
+    try:
+        meal_ids = [int(meal_id) for value in request.args.getlist('ids') for meal_id in value.split(',') if meal_id]
+    except ValueError:
+        return make_response(jsonify({'error': 'ids must be comma-separated integers'}), 400)
+    if not meal_ids or len(meal_ids) > 1000:
+        return make_response(jsonify({'error': 'Between 1 and 1000 meal ids are required'}), 400)
+
+    try:
+        current_app.logger.info("Retrieving %d meals by ID", len(meal_ids))
+
+        # Read the version before querying so a concurrent write can only make the ETag stale
+        etag = make_etag('get-meals', ','.join(map(str, meal_ids)), kitchen_model.get_data_version())
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        meals = kitchen_model.get_meals_by_ids(meal_ids)
+        response = make_response(jsonify({'status': 'success', 'meals': meals}), 200)
+        response.set_etag(etag, weak=True)
+        return response
+    except Exception as e:
+        current_app.logger.error("Error retrieving meals by ID: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/get-meal-by-name/<string:meal_name>', methods=['GET'])
 def get_meal_by_name(meal_name: str) -> Response:
     """
     Route to get a meal by its name.
@@ -183,7 +449,7 @@ def get_meal_by_name(meal_name: str) -> Response:
         JSON response with the meal details or error message.
     """
     try:
-        app.logger.info(f"Retrieving meal by name: {meal_name}")
+        current_app.logger.info(f"Retrieving meal by name: {meal_name}")
 
         if not meal_name:
             return make_response(jsonify({'error': 'Meal name is required'}), 400)
@@ -191,7 +457,37 @@ def get_meal_by_name(meal_name: str) -> Response:
         meal = kitchen_model.get_meal_by_name(meal_name)
         return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving meal by name: {e}")
+        current_app.logger.error(f"Error retrieving meal by name: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/meals/autocomplete', methods=['GET'])
+def autocomplete_meals() -> Response:
+    """
+    Route to complete a partial meal name for type-ahead.
+
+    Query Parameters:
+        - prefix (str): The start of the meal name (case-insensitive).
+        - limit (int, optional): The maximum number of meals, between 1 and 100. Defaults to 10.
+
+    Returns:
+        JSON response with the matching meals' ids and names in alphabetical order.
+    Raises:
+        400 error if the limit is not a number between 1 and 100.
+        500 error if the name index cannot be built.
+    """
+    prefix = request.args.get('prefix', '')
+    try:
+        limit = int(request.args.get('limit', kitchen_model.AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= 100:
+        return make_response(jsonify({'error': 'limit must be a number between 1 and 100'}), 400)
+
+    try:
+        meals = kitchen_model.autocomplete_meals(prefix, limit)
+        return make_response(jsonify({'status': 'success', 'prefix': prefix, 'meals': meals}), 200)
+    except Exception as e:
+        current_app.logger.error("Error completing meal name %s: %s", prefix, str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -202,27 +498,184 @@ def get_meal_by_name(meal_name: str) -> Response:
 ############################################################
 
 
-@app.route('/api/battle', methods=['GET'])
+@api.route('/api/battle', methods=['GET'])
+@limit_write_rate
 def battle() -> Response:
     """
     Route to initiate a battle between the two currently prepared meals.
 
     Returns:
-        JSON response indicating the result of the battle and the winner.
+        JSON response indicating the result of the battle and the winner, with the random number
+        that decided it and, if it came from a seeded stream, the seed and its position (draw).
     Raises:
         500 error if there is an issue during the battle.
     """
     try:
-        app.logger.info('Two meals enter, one meal leaves!')
+        current_app.logger.info('Two meals enter, one meal leaves!')
 
-        winner = battle_model.battle()
+        model = get_battle_model()
+        # Drawn before taking a writer slot, so the slot is not held across the random.org request
+        drawn = model.draw() if len(model.combatants) >= 2 else (None, None, None)
+        return _fight(model, *drawn)
+    except Exception as e:
+        current_app.logger.error(f"Battle error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@hold_writer_slot
+def _fight(model: "BattleModel", random_number: Optional[float], seed: Optional[int], draw: Optional[int]) -> Response:
+    """
+    Battles the prepared meals with a number already drawn and records the result.
+    """
+    winner = model.battle(random_number, seed, draw)
+    record = model.log[-1]
+    return make_response(jsonify({'status': 'success', 'winner': winner, 'random_number': record.random_number,
+                                  'seed': record.seed, 'draw': record.draw}), 200)
+
+@api.route('/api/battles', methods=['POST'])
+@limit_write_rate
+def battles() -> Response:
+    """
+    Route to run many independent matchups between meals, by ID, in one request.
+
+    The prepared combatants are not used or changed.
+
+    Expected JSON Input:
+        - matchups (list): At most 1000 matchups, each either a [meal_a, meal_b] pair or an object
+          with meal_a, meal_b and optionally best_of.
+        - best_of (int, optional): The series length for matchups that do not set their own. Must be
+          odd and at most MAX_BEST_OF. Defaults to 1.
+        - seed (int, optional): Draw the games from SeededRandom(seed) instead of random.org.
 
-        return make_response(jsonify({'status': 'success', 'winner': winner}), 200)
+    Returns:
+        JSON response with one result per matchup, in order: the series score and winner, or the
+        error if one of its meals is missing or deleted.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue running the battles.
+    """
+    from meal_max.models.battle_model import Matchup, plan_battles
+    from meal_max.utils.random_utils import SeededRandom
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('matchups'), list) or not 1 <= len(data['matchups']) <= 1000:
+        return make_response(jsonify({'error': 'Between 1 and 1000 matchups are required'}), 400)
+
+    try:
+        default_best_of = data.get('best_of', 1)
+        matchups = []
+        for item in data['matchups']:
+            if isinstance(item, dict):
+                meal_a, meal_b, best_of = item.get('meal_a'), item.get('meal_b'), item.get('best_of', default_best_of)
+            elif isinstance(item, list) and len(item) == 2:
+                (meal_a, meal_b), best_of = item, default_best_of
+            else:
+                raise ValueError("Each matchup must be a [meal_a, meal_b] pair or an object with meal_a and meal_b")
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (meal_a, meal_b, best_of)):
+                raise ValueError("Meal ids and best_of must be integers")
+            matchups.append(Matchup(meal_a, meal_b, best_of))
+        seed = data.get('seed')
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+            raise ValueError("seed must be an integer")
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        current_app.logger.info('Running %d matchups', len(matchups))
+        # The games are drawn before taking a writer slot, which is only held to record them
+        results, stats = plan_battles(matchups, random_source=SeededRandom(seed) if seed is not None else None)
+        return _record_battles(results, stats)
+    except ValueError as e:
+        current_app.logger.error("Invalid battles request: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
-        app.logger.error(f"Battle error: {e}")
+        current_app.logger.error("Battles error: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/clear-combatants', methods=['POST'])
+@hold_writer_slot
+def _record_battles(results: List[dict[str, Any]], stats: dict[int, tuple[int, int]]) -> Response:
+    """
+    Records the stats of decided matchups in one transaction and returns their results.
+    """
+    kitchen_model.record_battle_results(stats)
+    return make_response(jsonify({'status': 'success', 'results': results}), 200)
+
+@api.route('/api/battle/seed', methods=['POST'])
+def seed_battles() -> Response:
+    """
+    Route to make the battles of /api/battle reproducible by drawing from a seeded stream.
+
+    Expected JSON Input:
+        - seed (int or null): The seed of the new stream, or null to go back to random.org.
+
+    Returns:
+        JSON response with the seed in use.
+    Raises:
+        400 error if the seed is not an integer or null.
+    """
+    from meal_max.utils.random_utils import SeededRandom
+
+    data = request.get_json(silent=True)
+    seed = data.get('seed') if isinstance(data, dict) else None
+    if not isinstance(data, dict) or 'seed' not in data or (seed is not None and (not isinstance(seed, int) or isinstance(seed, bool))):
+        return make_response(jsonify({'error': 'seed must be an integer or null'}), 400)
+
+    get_battle_model().random_source = SeededRandom(seed) if seed is not None else None
+    current_app.logger.info("Battle seed set to %s", seed)
+    return make_response(jsonify({'status': 'success', 'seed': seed}), 200)
+
+@api.route('/api/battle/log', methods=['GET'])
+def get_battle_log() -> Response:
+    """
+    Route to get the most recent battles with the random numbers that decided them.
+
+    Returns:
+        JSON response with the battles, oldest first, in the format /api/battle/replay accepts.
+    """
+    from meal_max.models.battle_model import battle_log
+
+    return make_response(jsonify({'status': 'success', 'battles': battle_log(get_battle_model())}), 200)
+
+@api.route('/api/battle/replay', methods=['POST'])
+@admit_writes
+def replay_battles() -> Response:
+    """
+    Route to restore a fixture, re-run a sequence of battles on it and check the final stats.
+
+    This replaces the meals with the fixture, like /api/restore-fixture.
+
+    Expected JSON Input:
+        - fixture (str): The fixture the battles were fought on (see RESET_FIXTURES).
+        - battles (list): The battles in order, each with meal_a, meal_b and optionally random_number
+          and winner (e.g. the output of /api/battle/log).
+        - seed (int, optional): The seed drawing the numbers of battles without a random_number.
+        - expected (dict, optional): Meal ID -> the battles and wins it should end with.
+
+    Returns:
+        JSON response with the number of battles, the time taken, the final stats, any mismatches
+        and whether everything matched.
+    Raises:
+        400 error if input validation fails or the fixture is not registered.
+        500 error if there is an issue replaying the battles.
+    """
+    from meal_max.models.battle_model import replay_battles as replay
+
+    data = request.get_json(silent=True)
+    if (not isinstance(data, dict) or not data.get('fixture') or not isinstance(data.get('battles'), list)
+            or not all(isinstance(battle, dict) and 'meal_a' in battle and 'meal_b' in battle
+                       for battle in data['battles'])):
+        return make_response(jsonify({'error': 'A fixture and a list of battles with meal_a and meal_b are required'}), 400)
+
+    try:
+        report = replay(data['fixture'], data['battles'], data.get('seed'), data.get('expected'))
+        return make_response(jsonify({'status': 'success', **report}), 200)
+    except ValueError as e:
+        current_app.logger.error("Invalid replay: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Replay error: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/clear-combatants', methods=['POST'])
 def clear_combatants() -> Response:
     """
     Route to clear the list of combatants for the battle.
@@ -233,15 +686,15 @@ def clear_combatants() -> Response:
         500 error if there is an issue clearing combatants.
     """
     try:
-        app.logger.info('Clearing all combatants...')
-        battle_model.clear_combatants()
-        app.logger.info('Combatants cleared.')
+        current_app.logger.info('Clearing all combatants...')
+        get_battle_model().clear_combatants()
+        current_app.logger.info('Combatants cleared.')
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error("Failed to clear combatants: %s", str(e))
+        current_app.logger.error("Failed to clear combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-combatants', methods=['GET'])
+@api.route('/api/get-combatants', methods=['GET'])
 def get_combatants() -> Response:
     """
     Route to get the list of combatants for the battle.
@@ -250,14 +703,14 @@ def get_combatants() -> Response:
         JSON response with the list of combatants.
     """
     try:
-        app.logger.info('Getting combatants...')
-        combatants = battle_model.get_combatants()
+        current_app.logger.info('Getting combatants...')
+        combatants = get_battle_model().get_combatants()
         return make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
     except Exception as e:
-        app.logger.error("Failed to get combatants: %s", str(e))
+        current_app.logger.error("Failed to get combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/prep-combatant', methods=['POST'])
+@api.route('/api/prep-combatant', methods=['POST'])
 def prep_combatant() -> Response:
     """
     Route to prepare a prep a meal making it a combatant for a battle.
@@ -273,24 +726,94 @@ def prep_combatant() -> Response:
     try:
         data = request.json
         meal = data.get('meal')
-        app.logger.info("Preparing combatant: %s", meal)
+        current_app.logger.info("Preparing combatant: %s", meal)
 
         if not meal:
             return make_response(jsonify({'error': 'You must name a combatant'}), 400)
 
         try:
             meal = kitchen_model.get_meal_by_name(meal)
-            battle_model.prep_combatant(meal)
-            combatants = battle_model.get_combatants()
+            get_battle_model().prep_combatant(meal)
+            combatants = get_battle_model().get_combatants()
         except Exception as e:
-            app.logger.error("Failed to prepare combatant: %s", str(e))
+            current_app.logger.error("Failed to prepare combatant: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
         return make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
 
     except Exception as e:
-        app.logger.error("Failed to prepare combatants: %s", str(e))
+        current_app.logger.error("Failed to prepare combatants: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Matchmaking
+#
+############################################################
+
+
+@api.route('/api/matchmaking/queue', methods=['POST'])
+def join_matchmaking() -> Response:
+    """
+    Route to queue a meal for a battle against the waiting meal with the closest battle score.
+
+    The battle runs automatically in the background once the meal is paired; see /api/matchmaking
+    for the results.
+
+    Expected JSON Input:
+        - meal_id (int): The ID of the meal.
+
+    Returns:
+        JSON response with the status ('matched' with the opponent's ID, or 'queued') and the
+        meal's battle score.
+    Raises:
+        400 error if the meal ID is missing, or the meal is not found, deleted or already queued.
+        500 error if there is an issue queueing the meal.
+    """
+    data = request.get_json(silent=True)
+    meal_id = data.get('meal_id') if isinstance(data, dict) else None
+    if not isinstance(meal_id, int) or isinstance(meal_id, bool):
+        return make_response(jsonify({'error': 'meal_id must be an integer'}), 400)
+
+    try:
+        meal = kitchen_model.get_meal_by_id(meal_id)
+        result = get_matchmaker().enqueue(meal)
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except ValueError as e:
+        current_app.logger.error("Failed to queue meal %s: %s", meal_id, str(e))
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Failed to queue meal %s: %s", meal_id, str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@api.route('/api/matchmaking/queue/<int:meal_id>', methods=['DELETE'])
+def leave_matchmaking(meal_id: int) -> Response:
+    """
+    Route to take a waiting meal out of the matchmaking queue.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Returns:
+        JSON response indicating success.
+    Raises:
+        404 error if the meal is not waiting (e.g. it has already been paired).
+    """
+    if not get_matchmaker().dequeue(meal_id):
+        return make_response(jsonify({'error': f'Meal with ID {meal_id} is not waiting for an opponent'}), 404)
+    return make_response(jsonify({'status': 'success'}), 200)
+
+@api.route('/api/matchmaking', methods=['GET'])
+def get_matchmaking() -> Response:
+    """
+    Route to get the matchmaking queue.
+
+    Returns:
+        JSON response with the waiting meals (by score, with their current windows), the pairs
+        waiting for their battle and the most recent battle results.
+    """
+    return make_response(jsonify({'status': 'success', **get_matchmaker().snapshot()}), 200)
+
 
 ############################################################
 #
@@ -299,31 +822,181 @@ def prep_combatant() -> Response:
 ############################################################
 
 
-@app.route('/api/leaderboard', methods=['GET'])
+@api.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard() -> Response:
     """
-    Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
+    Route to get the leaderboard of meals sorted by wins, battles, win percentage or Wilson score.
 
     Query Parameters:
-        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - sort (str): The field to sort by ('wins', 'battles', 'win_pct' or 'wilson'). Default is 'wins'.
 
     Returns:
-        JSON response with a sorted leaderboard of meals.
+        JSON response with a sorted leaderboard of meals. Responds with 304 and no body
+        if the request's If-None-Match header matches the current ETag.
     Raises:
+        400 error if the sort field is not supported.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
-        app.logger.info("Generating leaderboard sorted by %s", sort_by)
+        current_app.logger.info("Generating leaderboard sorted by %s", sort_by)
+
+        # Read the version before querying so a concurrent write can only make the ETag stale
+        data_version = kitchen_model.get_data_version()
+        etag = make_etag('leaderboard', sort_by, data_version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        # Concurrent requests share one query for the same version (see get_leaderboard), capped
+        # one past LEADERBOARD_SHARED_ROWS; a leaderboard longer than that is streamed from the
+        # cursor instead, so no request holds all of it
+        shared_rows = kitchen_model.LEADERBOARD_SHARED_ROWS
+        leaderboard = kitchen_model.get_leaderboard(sort_by, limit=shared_rows + 1, data_version=data_version)
+        if len(leaderboard) > shared_rows:
+            entries = kitchen_model.iter_leaderboard(sort_by)
+        else:
+            entries = iter(leaderboard)
+        response = stream_json_list({'status': 'success'}, 'leaderboard', entries)
+        response.set_etag(etag, weak=True)
+        return response
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error(f"Error generating leaderboard: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/leaderboard/export', methods=['GET'])
+def export_leaderboard() -> Response:
+    """
+    Route to download the leaderboard as CSV or NDJSON, streamed from the database in batches.
+
+    Query Parameters:
+        - format (str): 'csv' or 'ndjson'. Default is 'csv'.
+        - sort (str): The field to sort by, as for /api/leaderboard. Default is 'wins'.
+
+    Returns:
+        The leaderboard as an attachment with one row (CSV, after a header row) or one JSON
+        object (NDJSON) per meal. Responds with 304 and no body if the request's If-None-Match
+        header matches the current ETag.
+    Raises:
+        400 error if the format or sort field is not supported.
+        500 error if there is an issue generating the leaderboard.
+    """
+    export_format = request.args.get('format', 'csv')
+    sort_by = request.args.get('sort', 'wins')
+    if export_format not in ('csv', 'ndjson'):
+        return make_response(jsonify({'error': f"Unsupported format: {export_format}. Use 'csv' or 'ndjson'."}), 400)
+
+    try:
+        current_app.logger.info("Exporting leaderboard sorted by %s as %s", sort_by, export_format)
+
+        etag = make_etag('leaderboard-export', export_format, sort_by, kitchen_model.get_data_version())
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        leaderboard_rows = kitchen_model.iter_leaderboard(sort_by)
+        if export_format == 'csv':
+            response = stream_csv(kitchen_model.LEADERBOARD_COLUMNS, leaderboard_rows)
+        else:
+            response = stream_ndjson(leaderboard_rows)
+        response.headers['Content-Disposition'] = f'attachment; filename=leaderboard.{export_format}'
+        response.set_etag(etag, weak=True)
+        return response
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error("Error exporting leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Seasons
+#
+############################################################
+
+
+@api.route('/api/seasons/rollover', methods=['POST'])
+@limit_write_rate
+def rollover_season() -> Response:
+    """
+    Route to end the current season, archiving every meal's battles and wins and resetting them.
+
+    The meals are processed in short transactions, each holding a writer slot only while it runs,
+    so battles keep running during the rollover.
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+    Returns:
+        JSON response with the season that ended, the new season, the number of meals archived,
+        the number of transactions and the seconds taken.
+    Raises:
+        429 error if a transaction could not get a writer slot; calling again resumes it.
+        500 error if there is an issue rolling over; calling again resumes it.
+    """
+    try:
+        current_app.logger.info("Rolling over the season")
+        report = kitchen_model.rollover_season(writer=writer_slot)
+        return make_response(jsonify({'status': 'success', **report}), 200)
+    except WriterSlotUnavailable as e:
+        return writer_slot_rejected(e)
+    except Exception as e:
+        current_app.logger.error("Season rollover failed: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
 
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+@api.route('/api/seasons', methods=['GET'])
+def get_seasons() -> Response:
+    """
+    Route to list the seasons, oldest first.
+
+    Returns:
+        JSON response with each season's number, start and end times, whether its rollover is
+        complete and how many meals have archived stats.
+    Raises:
+        500 error if there is an issue retrieving the seasons.
+    """
+    try:
+        return make_response(jsonify({'status': 'success', 'seasons': kitchen_model.get_seasons()}), 200)
+    except Exception as e:
+        current_app.logger.error("Error retrieving seasons: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/seasons/<int:season>/leaderboard', methods=['GET'])
+def get_season_leaderboard(season: int) -> Response:
+    """
+    Route to get the final leaderboard of a past season.
+
+    Path Parameter:
+        - season (int): The season number.
+
+    Query Parameters:
+        - sort (str): The field to sort by, as for /api/leaderboard. Default is 'wins'.
+
+    Returns:
+        JSON response with the season's leaderboard. Responds with 304 and no body if the
+        request's If-None-Match header matches the current ETag.
+    Raises:
+        400 error if the sort field is not supported.
+        404 error if the season does not exist or has not ended.
+        500 error if there is an issue generating the leaderboard.
+    """
+    sort_by = request.args.get('sort', 'wins')
+    try:
+        etag = make_etag('season-leaderboard', season, sort_by, kitchen_model.get_data_version())
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        leaderboard = kitchen_model.get_season_leaderboard(season, sort_by)
+        response = make_response(jsonify({'status': 'success', 'season': season, 'leaderboard': leaderboard}), 200)
+        response.set_etag(etag, weak=True)
+        return response
+    except kitchen_model.SeasonNotFoundError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
-        app.logger.error(f"Error generating leaderboard: {e}")
+        current_app.logger.error("Error generating the leaderboard of season %s: %s", season, str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
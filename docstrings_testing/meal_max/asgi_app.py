@@ -0,0 +1,312 @@
+"""
+asyncio variant of the meal_max service.
+
+Ports a subset of app.py's /api/* routes to Quart: the health and database checks, meal create,
+clear, delete and lookup, the single /api/battle with its combatant routes, and the leaderboard.
+The other routes, admission control, request deadlines and metrics are only served by app.py.
+Database calls run on a small shared thread pool (see meal_max.utils.async_sql_utils) and the
+random.org request in /api/battle is made with an async HTTP client, so many in-flight battles
+share a few threads instead of pinning one each.
+
+Run with an ASGI server, e.g.:
+    hypercorn "asgi_app:create_app()" --bind 0.0.0.0:5000
+"""
+import asyncio
+import os
+
+from dotenv import load_dotenv
+import httpx
+from quart import Quart, jsonify, make_response, Response, request
+
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils.async_sql_utils import run_db, shutdown_db_executor
+from meal_max.utils.http_utils import make_etag
+from meal_max.utils.json_provider import install_json_provider
+from meal_max.utils.random_utils import get_random_async
+from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+
+
+def create_app() -> Quart:
+    """
+    Creates the asyncio meal_max app.
+
+    Returns:
+        Quart: The ASGI application.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    app = Quart(__name__)
+
+    if os.getenv("FAST_JSON_PROVIDER", "true").lower() == "true":
+        install_json_provider(app)
+
+    battle_model = BattleModel()
+
+    @app.before_serving
+    async def startup() -> None:
+        # One pooled client for every random.org request made by this worker
+        app.random_client = httpx.AsyncClient()
+        # Serializes battles on the shared combatants (created here so it binds to the serving loop)
+        app.battle_lock = asyncio.Lock()
+
+    @app.after_serving
+    async def shutdown() -> None:
+        await app.random_client.aclose()
+        shutdown_db_executor()
+
+    ####################################################
+    #
+    # Healthchecks
+    #
+    ####################################################
+
+    @app.route('/api/health', methods=['GET'])
+    async def healthcheck() -> Response:
+        """
+        Health check route to verify the service is running.
+        """
+        app.logger.info('Health check')
+        return await make_response(jsonify({'status': 'healthy'}), 200)
+
+    @app.route('/api/db-check', methods=['GET'])
+    async def db_check() -> Response:
+        """
+        Route to check if the database connection and meals table are functional.
+        """
+        try:
+            app.logger.info("Checking database connection...")
+            await run_db(check_database_connection)
+            app.logger.info("Checking if meals table exists...")
+            await run_db(check_table_exists, "meals")
+            return await make_response(jsonify({'database_status': 'healthy'}), 200)
+        except Exception as e:
+            return await make_response(jsonify({'error': str(e)}), 404)
+
+    ##########################################################
+    #
+    # Meals
+    #
+    ##########################################################
+
+    @app.route('/api/create-meal', methods=['POST'])
+    async def add_meal() -> Response:
+        """
+        Route to add a new meal to the database. Same input and responses as app.add_meal.
+        """
+        app.logger.info('Creating new meal')
+        try:
+            data = await request.get_json()
+
+            meal = data.get('meal')
+            cuisine = data.get('cuisine')
+            price = data.get('price')
+            difficulty = data.get('difficulty')
+
+            if not meal or not cuisine or price is None or difficulty not in ['HIGH', 'MED', 'LOW']:
+                return await make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
+
+            try:
+                price = float(price)
+                if round(price, 2) != price:
+                    raise ValueError("Price has more than two decimal places")
+            except ValueError:
+                return await make_response(jsonify({'error': 'Price must be a valid float with at most two decimal places'}), 400)
+
+            app.logger.info('Adding meal: %s, %s, %.2f, %s', meal, cuisine, price, difficulty)
+            await run_db(kitchen_model.create_meal, meal, cuisine, price, difficulty)
+
+            app.logger.info("Combatant added: %s", meal)
+            return await make_response(jsonify({'status': 'success', 'combatant': meal}), 201)
+        except Exception as e:
+            app.logger.error("Failed to add combatant: %s", str(e))
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/clear-meals', methods=['DELETE'])
+    async def clear_catalog() -> Response:
+        """
+        Route to clear all meals (recreates the table).
+        """
+        try:
+            app.logger.info("Clearing the meals")
+            await run_db(kitchen_model.clear_meals)
+            return await make_response(jsonify({'status': 'success'}), 200)
+        except Exception as e:
+            app.logger.error(f"Error clearing catalog: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
+    async def delete_meal(meal_id: int) -> Response:
+        """
+        Route to soft delete a meal by its ID.
+        """
+        try:
+            app.logger.info(f"Deleting meal by ID: {meal_id}")
+            await run_db(kitchen_model.delete_meal, meal_id)
+            return await make_response(jsonify({'status': 'success'}), 200)
+        except Exception as e:
+            app.logger.error(f"Error deleting meal: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
+    async def get_meal_by_id(meal_id: int) -> Response:
+        """
+        Route to get a meal by its ID. Honors If-None-Match like app.get_meal_by_id.
+        """
+        try:
+            app.logger.info(f"Retrieving meal by ID: {meal_id}")
+
+            etag = make_etag('get-meal-by-id', meal_id, await run_db(kitchen_model.get_data_version))
+            if request.if_none_match.contains_weak(etag):
+                response = await make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            meal = await run_db(kitchen_model.get_meal_by_id, meal_id)
+            response = await make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+            response.set_etag(etag, weak=True)
+            return response
+        except Exception as e:
+            app.logger.error(f"Error retrieving meal by ID: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-meal-by-name/<string:meal_name>', methods=['GET'])
+    async def get_meal_by_name(meal_name: str) -> Response:
+        """
+        Route to get a meal by its name.
+        """
+        try:
+            app.logger.info(f"Retrieving meal by name: {meal_name}")
+
+            if not meal_name:
+                return await make_response(jsonify({'error': 'Meal name is required'}), 400)
+
+            meal = await run_db(kitchen_model.get_meal_by_name, meal_name)
+            return await make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+        except Exception as e:
+            app.logger.error(f"Error retrieving meal by name: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    ############################################################
+    #
+    # Battle
+    #
+    ############################################################
+
+    @app.route('/api/battle', methods=['GET'])
+    async def battle() -> Response:
+        """
+        Route to initiate a battle between the two currently prepared meals. Same response as
+        app.battle: the winner and the random number that decided it (seed and draw are null).
+
+        The random number is awaited on the event loop before taking the app's battle lock, so
+        concurrent battles overlap their random.org requests; only the stat updates use a database
+        thread. The combatants are shared, so the check and the battle run under the lock:
+        otherwise two requests could both pass the check and the second would battle the
+        combatant left by the first.
+        """
+        try:
+            app.logger.info('Two meals enter, one meal leaves!')
+
+            if len(battle_model.get_combatants()) < 2:
+                raise ValueError("Two combatants must be prepped for a battle.")
+
+            random_number = await get_random_async(app.random_client)
+
+            async with app.battle_lock:
+                # Checked again: a battle that held the lock meanwhile may have removed a combatant
+                if len(battle_model.get_combatants()) < 2:
+                    raise ValueError("Two combatants must be prepped for a battle.")
+
+                winner = await run_db(battle_model.battle, random_number)
+                record = battle_model.log[-1]
+
+            return await make_response(jsonify({'status': 'success', 'winner': winner, 'random_number': record.random_number,
+                                                'seed': record.seed, 'draw': record.draw}), 200)
+        except Exception as e:
+            app.logger.error(f"Battle error: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/clear-combatants', methods=['POST'])
+    async def clear_combatants() -> Response:
+        """
+        Route to clear the list of combatants for the battle.
+        """
+        try:
+            app.logger.info('Clearing all combatants...')
+            battle_model.clear_combatants()
+            return await make_response(jsonify({'status': 'success'}), 200)
+        except Exception as e:
+            app.logger.error("Failed to clear combatants: %s", str(e))
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-combatants', methods=['GET'])
+    async def get_combatants() -> Response:
+        """
+        Route to get the list of combatants for the battle.
+        """
+        try:
+            app.logger.info('Getting combatants...')
+            combatants = battle_model.get_combatants()
+            return await make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
+        except Exception as e:
+            app.logger.error("Failed to get combatants: %s", str(e))
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/prep-combatant', methods=['POST'])
+    async def prep_combatant() -> Response:
+        """
+        Route to prepare a meal, making it a combatant for a battle.
+        """
+        try:
+            data = await request.get_json()
+            meal = data.get('meal')
+            app.logger.info("Preparing combatant: %s", meal)
+
+            if not meal:
+                return await make_response(jsonify({'error': 'You must name a combatant'}), 400)
+
+            meal = await run_db(kitchen_model.get_meal_by_name, meal)
+            battle_model.prep_combatant(meal)
+            combatants = battle_model.get_combatants()
+            return await make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
+        except Exception as e:
+            app.logger.error("Failed to prepare combatant: %s", str(e))
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    ############################################################
+    #
+    # Leaderboard
+    #
+    ############################################################
+
+    @app.route('/api/leaderboard', methods=['GET'])
+    async def get_leaderboard() -> Response:
+        """
+        Route to get the leaderboard of meals. Honors If-None-Match like app.get_leaderboard.
+        """
+        try:
+            sort_by = request.args.get('sort', 'wins')
+            app.logger.info("Generating leaderboard sorted by %s", sort_by)
+
+            data_version = await run_db(kitchen_model.get_data_version)
+            etag = make_etag('leaderboard', sort_by, data_version)
+            if request.if_none_match.contains_weak(etag):
+                response = await make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            leaderboard_data = await run_db(kitchen_model.get_leaderboard, sort_by, data_version=data_version)
+            response = await make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+            response.set_etag(etag, weak=True)
+            return response
+        except Exception as e:
+            app.logger.error(f"Error generating leaderboard: {e}")
+            return await make_response(jsonify({'error': str(e)}), 500)
+
+    return app
+
+
+if __name__ == '__main__':
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,215 @@
+"""
+Benchmark comparing the Flask app (app.py) with the asyncio app (asgi_app.py).
+
+Two scenarios are run against a temporary SQLite database:
+
+    battles      `--requests` GET /api/battle calls with `--concurrency` in flight, through each
+                 app's test client, against a local random.org stub that answers after
+                 `--random-latency` seconds. An app keeps one shared pair of combatants and a battle
+                 consumes it, so each in-flight battle gets its own app instance and preps its pair
+                 (POST /api/clear-combatants and /api/prep-combatant) before every battle. The Flask
+                 app blocks a thread on each draw; the asyncio app awaits it.
+    get-meal     `--requests` GET /api/get-meal-by-id calls with `--concurrency` in flight, through
+                 each app's test client.
+
+Reports wall time, throughput and the peak number of threads alive during the run.
+
+Usage:
+    python -m benchmarks.bench_asgi [--requests 500] [--concurrency 100] [--random-latency 0.05]
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+# Point both apps at a scratch database before they are imported
+_tmpdir = tempfile.mkdtemp(prefix="meal_max_bench_")
+os.environ["DB_PATH"] = os.path.join(_tmpdir, "meal_max.db")
+# Per-client write rate limits would turn most of the Flask app's battles into 429s
+os.environ["ADMISSION_CONTROL"] = "false"
+
+import app as flask_app  # noqa: E402
+import asgi_app  # noqa: E402
+from benchmarks.load_test import start_random_stub  # noqa: E402
+from meal_max.utils import random_utils  # noqa: E402
+
+
+NUM_MEALS = 100
+
+
+def create_database() -> None:
+    """Creates the meals table and seeds it with NUM_MEALS meals."""
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")) as fh:
+        script = fh.read()
+    conn = sqlite3.connect(os.environ["DB_PATH"])
+    conn.executescript(script)
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)",
+        [(f"Meal {i}", "Italian", 5.0 + i % 20, ("LOW", "MED", "HIGH")[i % 3]) for i in range(NUM_MEALS)]
+    )
+    conn.commit()
+    conn.close()
+
+
+class ThreadSampler:
+    """Samples threading.active_count() in the background and records the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def battle_lanes(requests: int, concurrency: int) -> list[list[tuple[str, str]]]:
+    """Splits `requests` battles into `concurrency` lanes of (meal_a, meal_b) names, run one after another."""
+    lanes: list[list[tuple[str, str]]] = [[] for _ in range(concurrency)]
+    for i in range(requests):
+        lanes[i % concurrency].append((f"Meal {i % NUM_MEALS}", f"Meal {(i + 1) % NUM_MEALS}"))
+    return lanes
+
+def bench_sync_battles(requests: int, concurrency: int) -> Callable[[], None]:
+    """Returns a run of /api/battle through Flask test clients, one app and thread per lane."""
+    lanes = battle_lanes(requests, concurrency)
+    clients = [flask_app.create_app().test_client() for _ in lanes]
+
+    def run_lane(lane: int) -> list[int]:
+        client = clients[lane]
+        statuses = []
+        for meal_a, meal_b in lanes[lane]:
+            client.post('/api/clear-combatants')
+            client.post('/api/prep-combatant', json={'meal': meal_a})
+            client.post('/api/prep-combatant', json={'meal': meal_b})
+            statuses.append(client.get('/api/battle').status_code)
+        return statuses
+
+    def run() -> None:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = [status for lane in pool.map(run_lane, range(len(lanes))) for status in lane]
+        assert all(status == 200 for status in statuses), statuses
+
+    return run
+
+def bench_async_battles(requests: int, concurrency: int) -> Callable[[], None]:
+    """Returns a run of /api/battle through Quart test clients, one app per lane on one event loop."""
+    lanes = battle_lanes(requests, concurrency)
+    apps = [asgi_app.create_app() for _ in lanes]
+
+    async def run_lane(app: Any, battles: list[tuple[str, str]]) -> list[int]:
+        client = app.test_client()
+        statuses = []
+        for meal_a, meal_b in battles:
+            await client.post('/api/clear-combatants')
+            await client.post('/api/prep-combatant', json={'meal': meal_a})
+            await client.post('/api/prep-combatant', json={'meal': meal_b})
+            statuses.append((await client.get('/api/battle')).status_code)
+        return statuses
+
+    async def main() -> None:
+        async with AsyncExitStack() as stack:
+            for app in apps:
+                await stack.enter_async_context(app.test_app())
+            results = await asyncio.gather(*(run_lane(app, battles) for app, battles in zip(apps, lanes)))
+        statuses = [status for lane in results for status in lane]
+        assert all(status == 200 for status in statuses), statuses
+
+    return lambda: asyncio.run(main())
+
+def bench_sync_get_meal(requests: int, concurrency: int) -> None:
+    """Fetches meals through the Flask app's test client from a thread pool."""
+    client = flask_app.create_app().test_client()
+
+    def fetch(i: int) -> int:
+        return client.get(f"/api/get-meal-by-id/{1 + i % NUM_MEALS}").status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(fetch, range(requests)))
+    assert all(status == 200 for status in statuses)
+
+def bench_async_get_meal(requests: int, concurrency: int) -> None:
+    """Fetches meals through the asyncio app's test client with asyncio.gather."""
+    app = asgi_app.create_app()
+
+    async def main() -> None:
+        async with app.test_app():
+            client = app.test_client()
+            limit = asyncio.Semaphore(concurrency)
+
+            async def fetch(i: int) -> int:
+                async with limit:
+                    response = await client.get(f"/api/get-meal-by-id/{1 + i % NUM_MEALS}")
+                    return response.status_code
+
+            statuses = await asyncio.gather(*(fetch(i) for i in range(requests)))
+        assert all(status == 200 for status in statuses)
+
+    asyncio.run(main())
+
+def measure(name: str, app_name: str, requests: int, fn: Callable[[], None]) -> dict[str, Any]:
+    """Times fn and samples its thread usage."""
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+    return {
+        'scenario': name,
+        'app': app_name,
+        'requests': requests,
+        'seconds': seconds,
+        'per_second': requests / seconds,
+        'peak_threads': sampler.peak
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=100, help='Number of requests in flight')
+    parser.add_argument('--random-latency', type=float, default=0.05, help='random.org stub latency in seconds')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    args = parser.parse_args()
+
+    create_database()
+    stub = start_random_stub(0, args.random_latency)
+    random_utils.RANDOM_ORG_URL = (f"http://127.0.0.1:{stub.server_port}/decimal-fractions/"
+                                   "?num=1&dec=2&col=1&format=plain&rnd=new")
+
+    results = [
+        measure('battles', 'flask', args.requests, bench_sync_battles(args.requests, args.concurrency)),
+        measure('battles', 'asyncio', args.requests, bench_async_battles(args.requests, args.concurrency)),
+        measure('get-meal', 'flask', args.requests,
+                lambda: bench_sync_get_meal(args.requests, args.concurrency)),
+        measure('get-meal', 'asyncio', args.requests,
+                lambda: bench_async_get_meal(args.requests, args.concurrency)),
+    ]
+
+    print(f"{'scenario':<10} {'app':<8} {'seconds':>8} {'req/s':>10} {'threads':>8}")
+    for result in results:
+        print(f"{result['scenario']:<10} {result['app']:<8} {result['seconds']:>8.2f} "
+              f"{result['per_second']:>10.1f} {result['peak_threads']:>8}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark comparing Flask's default JSON provider with FastJSONProvider.
+
+Serializes a leaderboard of plain dicts and a list of Meal dataclasses, the two response
+shapes the routes produce, and reports the best wall time over several repeats.
+
+Usage:
+    python -m benchmarks.bench_json_provider [--rows 100000] [--repeat 5] [--json results.json]
+"""
+import argparse
+import contextlib
+import json
+import time
+from typing import Any, Callable
+from unittest import mock
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils import json_provider
+from meal_max.utils.json_provider import FastJSONProvider
+
+
+def build_leaderboard(rows: int) -> list[dict[str, Any]]:
+    """Builds a leaderboard response body of `rows` entries."""
+    return [
+        {
+            'id': i,
+            'meal': f'Meal {i}',
+            'cuisine': 'Italian',
+            'price': 12.5,
+            'difficulty': 'MED',
+            'battles': 40,
+            'wins': i % 40,
+            'win_pct': round((i % 40) / 40 * 100, 1)
+        }
+        for i in range(rows)
+    ]
+
+def build_meals(rows: int) -> list[Meal]:
+    """Builds `rows` Meal dataclasses."""
+    return [Meal(id=i, meal=f'Meal {i}', cuisine='Italian', price=12.5, difficulty='MED') for i in range(rows)]
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    """Returns the best wall time in seconds of `repeat` calls to fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(rows: int, repeat: int) -> list[dict[str, Any]]:
+    """Times every provider against every payload."""
+    payloads = {
+        'leaderboard_dicts': {'status': 'success', 'leaderboard': build_leaderboard(rows)},
+        'meal_dataclasses': {'status': 'success', 'meals': build_meals(rows)},
+    }
+
+    app = Flask(__name__)
+    providers = {'flask_default': DefaultJSONProvider(app), 'fast_stdlib': FastJSONProvider(app)}
+    if json_provider.orjson is not None:
+        providers['fast_orjson'] = FastJSONProvider(app)
+
+    results = []
+    with app.app_context():
+        for payload_name, payload in payloads.items():
+            for provider_name, provider in providers.items():
+                # The stdlib fallback is measured by hiding orjson from the provider
+                if provider_name == 'fast_stdlib':
+                    encoder = mock.patch.object(json_provider, 'orjson', None)
+                else:
+                    encoder = contextlib.nullcontext()
+                with encoder:
+                    seconds = best_time(lambda: provider.response(payload).get_data(), repeat)
+                results.append({'payload': payload_name, 'provider': provider_name, 'rows': rows, 'seconds': seconds})
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of rows per response')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed repeats (best is reported)')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+
+    print(f"{'payload':<20} {'provider':<15} {'ms':>10}")
+    for result in results:
+        print(f"{result['payload']:<20} {result['provider']:<15} {result['seconds'] * 1000:>10.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == '__main__':
+    main()
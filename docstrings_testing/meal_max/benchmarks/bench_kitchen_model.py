@@ -0,0 +1,186 @@
+"""
+Benchmark of kitchen_model against real SQLite databases.
+
+For every size in `--sizes` a temporary database is built with that many meals (with random
+battle records so the leaderboard is populated), then each model function is timed through the
+real get_db_connection:
+
+    create_meal, get_meal_by_id, get_meal_by_name, update_meal_stats   `--ops` calls each
+    get_leaderboard (wins, battles, win_pct, wilson)                   `--leaderboard-ops` calls each
+    delete_meal                                                        `--ops` calls (run last)
+
+Per-call latencies are reported as p50/p99 along with throughput. Results are written as JSON
+with the commit, Python and SQLite versions so runs can be compared across commits; pass
+`--compare` with an earlier results file to print the change in p50 per operation. With
+`--in-memory` the model runs against sql_utils' shared in-memory copy of each database.
+
+Usage:
+    python -m benchmarks.bench_kitchen_model [--sizes 10000,100000,1000000] [--ops 1000]
+        [--in-memory] [--json results.json] [--compare baseline.json]
+"""
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Iterable
+
+from meal_max.models import kitchen_model
+from meal_max.utils import sql_utils
+
+
+CREATE_TABLE_SQL = os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")
+CUISINES = ("Italian", "Mexican", "Japanese", "Indian", "French", "Thai")
+DIFFICULTIES = ("LOW", "MED", "HIGH")
+
+
+def quiet_loggers() -> None:
+    """Raises the meal_max loggers to WARNING so per-call INFO logging is not what gets measured."""
+    for name in ("meal_max.models.kitchen_model", "meal_max.utils.sql_utils"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+def build_database(path: str, size: int, rng: random.Random) -> None:
+    """Creates the meals table at `path` and fills it with `size` meals."""
+    with open(CREATE_TABLE_SQL) as fh:
+        script = fh.read()
+
+    conn = sqlite3.connect(path)
+    conn.executescript(script)
+    rows = []
+    for i in range(size):
+        battles = rng.randint(0, 50)
+        rows.append((meal_name(i), rng.choice(CUISINES), round(rng.uniform(5, 40), 2),
+                     rng.choice(DIFFICULTIES), battles, rng.randint(0, battles)))
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES (?, ?, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    conn.close()
+
+def meal_name(i: int) -> str:
+    """Returns the name of the i-th seeded meal."""
+    return f"Meal {i:07d}"
+
+def time_calls(fn: Callable[[Any], Any], args: Iterable[Any]) -> list[float]:
+    """Calls fn once per argument and returns each call's latency in seconds."""
+    timings = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(size: int, operation: str, timings: list[float]) -> dict[str, Any]:
+    """Reduces per-call latencies to the fields written to the results file."""
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        'size': size,
+        'operation': operation,
+        'calls': len(ordered),
+        'seconds': total,
+        'per_second': len(ordered) / total if total else 0.0,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    }
+
+def bench_size(size: int, ops: int, leaderboard_ops: int, seed: int, in_memory: bool) -> list[dict[str, Any]]:
+    """Builds a database of `size` meals and times every operation against it."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="meal_max_bench_") as tmpdir:
+        path = os.path.join(tmpdir, "meal_max.db")
+
+        start = time.perf_counter()
+        build_database(path, size, rng)
+        print(f"built {size} meals in {time.perf_counter() - start:.1f}s")
+        sql_utils.DB_PATH = path
+        sql_utils.SQL_IN_MEMORY = in_memory
+
+        ids = [rng.randint(1, size) for _ in range(ops)]
+        results = [
+            summarize(size, 'create_meal', time_calls(
+                lambda i: kitchen_model.create_meal(f"New meal {i}", "Italian", 12.5, "MED"), range(ops))),
+            summarize(size, 'get_meal_by_id', time_calls(kitchen_model.get_meal_by_id, ids)),
+            summarize(size, 'get_meal_by_name', time_calls(
+                kitchen_model.get_meal_by_name, (meal_name(i - 1) for i in ids))),
+            *(summarize(size, f'get_leaderboard_{key}', time_calls(
+                lambda _, key=key: kitchen_model.get_leaderboard(key), range(leaderboard_ops)))
+              for key in kitchen_model.LEADERBOARD_SORT_KEYS),
+            summarize(size, 'update_meal_stats', time_calls(
+                lambda i: kitchen_model.update_meal_stats(i, rng.choice(("win", "loss"))), ids)),
+            # Deleting a meal twice raises, so each call gets its own id
+            summarize(size, 'delete_meal', time_calls(
+                kitchen_model.delete_meal, rng.sample(range(1, size + 1), min(ops, size)))),
+        ]
+        if in_memory:
+            sql_utils.stop_in_memory_database(snapshot=False)
+    return results
+
+def environment() -> dict[str, Any]:
+    """Describes the commit and runtime the results were produced with."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform()
+    }
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    """Prints the p50 change of each operation against an earlier results file."""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    previous = {(r['size'], r['operation']): r for r in baseline['results']}
+
+    print(f"\ncompared with {baseline_path} (commit {baseline['environment'].get('commit')})")
+    print(f"{'size':>8} {'operation':<24} {'p50 before':>11} {'p50 after':>10} {'change':>8}")
+    for result in results:
+        before = previous.get((result['size'], result['operation']))
+        if before is None or not before['p50_ms']:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        print(f"{result['size']:>8} {result['operation']:<24} {before['p50_ms']:>11.3f} "
+              f"{result['p50_ms']:>10.3f} {change:>+7.1f}%")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated database sizes')
+    parser.add_argument('--ops', type=int, default=1000, help='Calls per point operation')
+    parser.add_argument('--leaderboard-ops', type=int, default=5, help='Calls per leaderboard sort mode')
+    parser.add_argument('--seed', type=int, default=411, help='Seed for the generated data and ids')
+    parser.add_argument('--in-memory', action='store_true', help='Use the shared in-memory database mode')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    parser.add_argument('--compare', dest='baseline_path', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    quiet_loggers()
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        results.extend(bench_size(size, args.ops, args.leaderboard_ops, args.seed, args.in_memory))
+
+    print(f"\n{'size':>8} {'operation':<24} {'calls':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for result in results:
+        print(f"{result['size']:>8} {result['operation']:<24} {result['calls']:>6} "
+              f"{result['per_second']:>10.1f} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+
+    if args.baseline_path:
+        compare(results, args.baseline_path)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump({'environment': dict(environment(), in_memory=args.in_memory), 'results': results}, fh, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Concurrent load generator for a running meal_max service.
+
+Drives a weighted mix of endpoint traffic from `--concurrency` worker threads for `--duration`
+seconds (or until `--requests` have been sent), then reports throughput, latency percentiles and
+error rates per endpoint. The operations in the mix are:
+
+    create       POST /api/create-meal with a new meal
+    prep         POST /api/prep-combatant with a random seeded meal
+    battle       GET  /api/battle
+    leaderboard  GET  /api/leaderboard (alternating sort=wins and sort=win_pct)
+    get-meal     GET  /api/get-meal-by-id/<id> for a random seeded meal
+
+The service keeps a single list of two combatants, so concurrent prep and battle calls are
+expected to fail some of the time ("Combatant list is full", "Two combatants must be prepped");
+they are reported as errors like any other non-2xx response.
+
+A local random.org stub is started on `--stub-port` so battles do not hit the real service. Start
+the app with RANDOM_ORG_URL pointing at it and ADMISSION_CONTROL=false (otherwise every worker
+shares the 50 writes/s per-client limit and most writes are reported as 429s), or pass
+`--start-app` to launch app.py against a temporary database with both already configured. With `--battle-seed` battles draw from the
+service's seeded stream instead (POST /api/battle/seed), so the same run decides them the same way.
+
+Usage:
+    python -m benchmarks.load_test [--url http://localhost:5000/api] [--concurrency 32]
+        [--duration 30] [--mix create=1,prep=2,battle=2,leaderboard=3,get-meal=2]
+        [--start-app] [--battle-seed 42] [--json results.json] [--max-error-rate 0.5]
+"""
+import argparse
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+DEFAULT_MIX = "create=1,prep=2,battle=2,leaderboard=3,get-meal=2"
+CUISINES = ("Italian", "Mexican", "Japanese", "Indian", "French", "Thai")
+DIFFICULTIES = ("LOW", "MED", "HIGH")
+
+
+####################################################
+#
+# random.org stub
+#
+####################################################
+
+
+class RandomStubHandler(BaseHTTPRequestHandler):
+    """Answers every GET like random.org's decimal-fractions endpoint."""
+
+    latency = 0.0
+
+    def do_GET(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        num = int(parse_qs(urlparse(self.path).query).get("num", ["1"])[0])
+        body = "".join(f"{random.random():.2f}\n" for _ in range(num)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+def start_random_stub(port: int, latency: float) -> ThreadingHTTPServer:
+    """Serves the random.org stub from a daemon thread."""
+    handler = type("Handler", (RandomStubHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_app(port: int, random_url: str) -> subprocess.Popen:
+    """Launches app.py on `port` against a temporary database and waits for it to be healthy."""
+    tmpdir = tempfile.mkdtemp(prefix="meal_max_load_")
+    env = dict(
+        os.environ,
+        DB_PATH=os.path.join(tmpdir, "meal_max.db"),
+        SQL_CREATE_TABLE_PATH=os.path.abspath(os.path.join(APP_DIR, "sql", "create_meal_table.sql")),
+        RANDOM_ORG_URL=random_url,
+        # Every worker thread is the same client, so the per-client write limit would throttle the run
+        ADMISSION_CONTROL="false"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--no-reload", "--with-threads"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("The app did not become healthy within 15 seconds")
+
+
+####################################################
+#
+# Traffic
+#
+####################################################
+
+
+class LoadRunner:
+    """
+    Sends the request mix from several threads and collects per-endpoint results.
+
+    Attributes:
+        base_url (str): The service's /api base URL.
+        seeded_meals (int): Number of meals created before the run; prep and get-meal target these.
+    """
+
+    def __init__(self, base_url: str, mix: dict[str, int], seeded_meals: int, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.seeded_meals = seeded_meals
+        self.timeout = timeout
+        self._operations = list(mix)
+        self._weights = [mix[name] for name in self._operations]
+        self._sequence = itertools.count()
+        # endpoint -> [(latency seconds, status code or None for connection errors), ...]
+        self._results: dict[str, list] = defaultdict(list)
+        self._results_lock = threading.Lock()
+
+    def seed(self, reset: bool) -> None:
+        """Optionally clears the meals, then creates the meals the run will use."""
+        session = requests.Session()
+        if reset:
+            session.delete(f"{self.base_url}/clear-meals", timeout=self.timeout).raise_for_status()
+        for i in range(self.seeded_meals):
+            response = session.post(f"{self.base_url}/create-meal", json=self._meal(f"Load meal {i}"),
+                                    timeout=self.timeout)
+            # Meals left by an earlier run without --reset are reused
+            if response.status_code not in (201, 500):
+                response.raise_for_status()
+
+    def _meal(self, name: str) -> dict[str, Any]:
+        return {
+            'meal': name,
+            'cuisine': random.choice(CUISINES),
+            'price': round(random.uniform(5, 40), 2),
+            'difficulty': random.choice(DIFFICULTIES)
+        }
+
+    def _request(self, session: requests.Session, operation: str) -> tuple[str, Callable[[], requests.Response]]:
+        """Returns the endpoint label and a callable sending one request for `operation`."""
+        url = self.base_url
+        if operation == "create":
+            body = self._meal(f"Load meal {os.getpid()}-{next(self._sequence)}")
+            return "POST /create-meal", lambda: session.post(f"{url}/create-meal", json=body, timeout=self.timeout)
+        if operation == "prep":
+            body = {'meal': f"Load meal {random.randrange(self.seeded_meals)}"}
+            return "POST /prep-combatant", lambda: session.post(f"{url}/prep-combatant", json=body, timeout=self.timeout)
+        if operation == "battle":
+            return "GET /battle", lambda: session.get(f"{url}/battle", timeout=self.timeout)
+        if operation == "leaderboard":
+            sort = random.choice(("wins", "win_pct"))
+            return f"GET /leaderboard?sort={sort}", lambda: session.get(
+                f"{url}/leaderboard", params={'sort': sort}, timeout=self.timeout)
+        if operation == "get-meal":
+            # Ids are only contiguous after --reset; misses are reported as errors
+            meal_id = random.randint(1, self.seeded_meals)
+            return "GET /get-meal-by-id", lambda: session.get(f"{url}/get-meal-by-id/{meal_id}", timeout=self.timeout)
+        raise ValueError(f"Unknown operation: {operation}")
+
+    def _worker(self, stop: threading.Event, budget: Optional[itertools.count], limit: Optional[int]) -> None:
+        session = requests.Session()
+        while not stop.is_set():
+            if budget is not None and next(budget) >= limit:
+                return
+            operation = random.choices(self._operations, self._weights)[0]
+            endpoint, send = self._request(session, operation)
+            start = time.perf_counter()
+            try:
+                status = send().status_code
+            except requests.RequestException:
+                status = None
+            elapsed = time.perf_counter() - start
+            with self._results_lock:
+                self._results[endpoint].append((elapsed, status))
+
+    def run(self, concurrency: int, duration: float, total_requests: Optional[int]) -> float:
+        """Runs the workers and returns the wall time in seconds."""
+        stop = threading.Event()
+        budget = itertools.count() if total_requests else None
+        threads = [threading.Thread(target=self._worker, args=(stop, budget, total_requests), daemon=True)
+                   for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        if total_requests:
+            for thread in threads:
+                thread.join()
+        else:
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+        return time.perf_counter() - start
+
+    def report(self, seconds: float) -> list[dict[str, Any]]:
+        """Summarizes the collected results per endpoint."""
+        with self._results_lock:
+            results = {endpoint: list(samples) for endpoint, samples in self._results.items()}
+
+        summary = []
+        for endpoint, samples in sorted(results.items()):
+            latencies = sorted(latency for latency, _ in samples)
+            statuses = defaultdict(int)
+            for _, status in samples:
+                statuses[str(status) if status is not None else "connection-error"] += 1
+            errors = sum(1 for _, status in samples if status is None or status >= 400)
+            summary.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'per_second': len(samples) / seconds,
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p90_ms': percentile(latencies, 0.90) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'max_ms': latencies[-1] * 1000,
+                'statuses': dict(statuses)
+            })
+        return summary
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """Parses 'create=1,prep=2,...' into operation weights."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    unknown = set(mix) - {"create", "prep", "battle", "leaderboard", "get-meal"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000/api', help='Base URL of the service API')
+    parser.add_argument('--concurrency', type=int, default=32, help='Number of worker threads')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run (ignored with --requests)')
+    parser.add_argument('--requests', type=int, help='Stop after this many requests instead of --duration')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'Operation weights ({DEFAULT_MIX})')
+    parser.add_argument('--meals', type=int, default=50, help='Meals to create before the run')
+    parser.add_argument('--reset', action='store_true', help='Clear all meals before seeding')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+    parser.add_argument('--stub-port', type=int, default=8089, help='Port for the local random.org stub')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='Seconds the stub waits before answering')
+    parser.add_argument('--start-app', action='store_true', help='Launch app.py on a temporary database for the run')
+    parser.add_argument('--battle-seed', type=int, help='Seed the service\'s battle numbers instead of using the stub')
+    parser.add_argument('--app-port', type=int, default=5055, help='Port for --start-app')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    parser.add_argument('--max-error-rate', type=float, help='Exit non-zero if any endpoint exceeds this error rate')
+    args = parser.parse_args()
+
+    stub = start_random_stub(args.stub_port, args.stub_latency)
+    random_url = f"http://127.0.0.1:{stub.server_address[1]}/"
+
+    app_process = None
+    base_url = args.url
+    if args.start_app:
+        app_process = start_app(args.app_port, random_url)
+        base_url = f"http://127.0.0.1:{args.app_port}/api"
+    else:
+        print(f"random.org stub listening at {random_url} (start the app with RANDOM_ORG_URL={random_url})")
+
+    try:
+        runner = LoadRunner(base_url, args.mix, args.meals, args.timeout)
+        runner.seed(args.reset or args.start_app)
+        if args.battle_seed is not None:
+            requests.post(f"{base_url}/battle/seed", json={'seed': args.battle_seed}, timeout=args.timeout).raise_for_status()
+        seconds = runner.run(args.concurrency, args.duration, args.requests)
+        summary = runner.report(seconds)
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait()
+        stub.shutdown()
+
+    total = sum(row['requests'] for row in summary)
+    print(f"\n{total} requests in {seconds:.1f}s ({total / seconds:.1f} req/s) with {args.concurrency} workers\n")
+    print(f"{'endpoint':<30} {'requests':>8} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for row in summary:
+        print(f"{row['endpoint']:<30} {row['requests']:>8} {row['per_second']:>8.1f} {row['error_rate']:>6.1%} "
+              f"{row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump({'seconds': seconds, 'concurrency': args.concurrency, 'endpoints': summary}, fh, indent=2)
+
+    if args.max_error_rate is not None and any(row['error_rate'] > args.max_error_rate for row in summary):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,94 @@
+from collections import deque
+from dataclasses import asdict, dataclass
 import logging
-from typing import List
-
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+import os
+import time
+from typing import Any, Deque, List, Optional
+
+from meal_max.models.kitchen_model import (
+    Meal,
+    get_meal_by_id,
+    get_meal_stats,
+    get_meals_by_ids,
+    record_battle_results,
+    restore_fixture,
+    update_meal_stats
+)
 from meal_max.utils.logger import configure_logger
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import SeededRandom, get_random, get_random_batch
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Longest series a single matchup in run_battles may ask for
+MAX_BEST_OF = int(os.getenv("MAX_BEST_OF", "99"))
+# Games (random numbers) a single run_battles call may need, summed over its matchups
+MAX_BATTLE_GAMES = int(os.getenv("MAX_BATTLE_GAMES", "10000"))
+# Battles kept in BattleModel.log for replay
+BATTLE_LOG_SIZE = int(os.getenv("BATTLE_LOG_SIZE", "10000"))
+
+
+@dataclass
+class Matchup:
+    meal_a: int
+    meal_b: int
+    best_of: int = 1
+
+    def __post_init__(self):
+        if self.meal_a == self.meal_b:
+            raise ValueError("A meal cannot battle itself.")
+        if self.best_of < 1 or self.best_of % 2 == 0 or self.best_of > MAX_BEST_OF:
+            raise ValueError(f"best_of must be an odd number between 1 and {MAX_BEST_OF}.")
+
+
+@dataclass
+class BattleRecord:
+    meal_a: int
+    meal_b: int
+    random_number: float
+    winner: int
+    seed: Optional[int] = None  # set when the number came from a SeededRandom stream
+    draw: Optional[int] = None  # the number's position in that stream
+
+
 class BattleModel:
 
-    def __init__(self):
+    def __init__(self, random_source: Optional[SeededRandom] = None):
         self.combatants: List[Meal] = []
+        # Draws battle numbers instead of random.org when set, so battles can be reproduced
+        self.random_source = random_source
+        # The most recent battles, oldest first, with the number that decided each
+        self.log: Deque[BattleRecord] = deque(maxlen=BATTLE_LOG_SIZE)
 
-    def battle(self) -> str:
+    def draw(self) -> tuple[float, Optional[int], Optional[int]]:
+        """
+        Draws the number deciding the next battle from the seeded stream, or random.org if the
+        model has none.
+
+        Returns:
+            tuple[float, Optional[int], Optional[int]]: The random number, and the seed and its
+                                                        position in the stream if it was seeded.
+        """
+        source = self.random_source
+        if source is not None:
+            random_number, draw = source.draw()
+            return random_number, source.seed, draw
+        return get_random(), None, None
+
+    def battle(self, random_number: Optional[float] = None, seed: Optional[int] = None,
+               draw: Optional[int] = None) -> str:
 
         """
         Conduct a battle between 2 meals and return the winner
 
+        Args:
+            random_number (Optional[float]): The random number deciding the battle. If not
+                                             provided, one is drawn (see draw).
+            seed (Optional[int]): The seed a given random_number was drawn with, for the log.
+            draw (Optional[int]): The position of a given random_number in its seeded stream.
+
         Returns: 
             winner.meal (str): The meal that won the battle.
         Raises:
@@ -53,8 +122,9 @@ class BattleModel:
         # Log the delta and normalized delta
         logger.info("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
-        random_number = get_random()
+        # Get random number from the seeded stream or random.org, unless the caller already drew one
+        if random_number is None:
+            random_number, seed, draw = self.draw()
 
         # Log the random number
         logger.info("Random number from random.org: %.3f", random_number)
@@ -74,6 +144,8 @@ class BattleModel:
         update_meal_stats(winner.id, 'win')
         update_meal_stats(loser.id, 'loss')
 
+        self.log.append(BattleRecord(combatant_1.id, combatant_2.id, random_number, winner.id, seed, draw))
+
         # Remove the losing combatant from combatants
         self.combatants.remove(loser)
 
@@ -150,3 +222,215 @@ class BattleModel:
 
         # Log the current state of combatants
         logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
+
+
+def run_battles(matchups: List[Matchup], random_numbers: Optional[List[float]] = None,
+                random_source: Optional[SeededRandom] = None) -> List[dict[str, Any]]:
+    """
+    Runs many independent matchups and records their stats (see plan_battles).
+
+    Args:
+        matchups (List[Matchup]): The matchups to run.
+        random_numbers (Optional[List[float]]): The numbers deciding the games (see plan_battles).
+        random_source (Optional[SeededRandom]): Draws the numbers instead of random.org.
+
+    Returns:
+        List[dict[str, Any]]: One result per matchup, in order (see plan_battles).
+
+    Raises:
+        ValueError: If the matchups need more than MAX_BATTLE_GAMES games, or too few random numbers are given.
+        RuntimeError: If the random numbers cannot be fetched.
+        sqlite3.Error: If there is a database error; no stats are changed.
+    """
+    results, stats = plan_battles(matchups, random_numbers, random_source)
+    record_battle_results(stats)
+    return results
+
+def plan_battles(matchups: List[Matchup], random_numbers: Optional[List[float]] = None,
+                 random_source: Optional[SeededRandom] = None
+                 ) -> tuple[List[dict[str, Any]], dict[int, tuple[int, int]]]:
+    """
+    Decides many independent matchups, each a best-of-N series between two meals by ID, without
+    recording them, so the random numbers can be fetched before a writer slot is taken.
+
+    All meals are looked up in one query and all random numbers are fetched in one batch (best_of
+    per matchup; numbers left over when a series is decided early are discarded). Each game is
+    decided like BattleModel.battle, with meal_a as the first combatant, and counts as a battle
+    in the stats; record_battle_results updates the stats of every meal together in one transaction.
+
+    Args:
+        matchups (List[Matchup]): The matchups to run.
+        random_numbers (Optional[List[float]]): The numbers deciding the games, best_of per matchup
+                                                in order. If not provided, they are fetched from random.org.
+        random_source (Optional[SeededRandom]): Draws the numbers instead of random.org when
+                                                random_numbers is not provided.
+
+    Returns:
+        tuple[List[dict[str, Any]], dict[int, tuple[int, int]]]:
+            One result per matchup, in order, and meal ID -> the (battles, wins) to add.
+            Completed matchups have the meal ids and names, the number of games played, the series
+            score and the winner; matchups with a missing or deleted meal have a status of 'error'
+            and the reason, and do not draw any numbers.
+
+    Raises:
+        ValueError: If the matchups need more than MAX_BATTLE_GAMES games, or too few random numbers are given.
+        RuntimeError: If the random numbers cannot be fetched.
+        sqlite3.Error: If the meals cannot be looked up.
+    """
+    entries = {entry['id']: entry for entry in get_meals_by_ids(
+        [meal_id for matchup in matchups for meal_id in (matchup.meal_a, matchup.meal_b)])}
+
+    def unavailable(matchup: Matchup) -> Optional[str]:
+        for meal_id in (matchup.meal_a, matchup.meal_b):
+            status = entries[meal_id]['status']
+            if status != 'found':
+                return f"Meal with ID {meal_id} {'not found' if status == 'missing' else 'has been deleted'}"
+        return None
+
+    errors = [unavailable(matchup) for matchup in matchups]
+    games_needed = sum(matchup.best_of for matchup, error in zip(matchups, errors) if error is None)
+    if games_needed > MAX_BATTLE_GAMES:
+        raise ValueError(f"Matchups need {games_needed} games, more than the limit of {MAX_BATTLE_GAMES}.")
+
+    if random_numbers is None and random_source is not None:
+        random_numbers = random_source.draw_many(games_needed)
+    elif random_numbers is None:
+        random_numbers = get_random_batch(games_needed) if games_needed else []
+    elif len(random_numbers) < games_needed:
+        raise ValueError(f"Matchups need {games_needed} random numbers, got {len(random_numbers)}.")
+
+    logger.info("Running %d matchups (%d games at most)", len(matchups), games_needed)
+
+    model = BattleModel()
+    scores: dict[int, float] = {}
+    stats: dict[int, list[int]] = {}
+    results = []
+    draws = iter(random_numbers)
+
+    for matchup, error in zip(matchups, errors):
+        if error is not None:
+            logger.info("Skipping matchup %s vs %s: %s", matchup.meal_a, matchup.meal_b, error)
+            results.append({'meal_a': matchup.meal_a, 'meal_b': matchup.meal_b, 'status': 'error', 'error': error})
+            continue
+
+        meal_a = entries[matchup.meal_a]['meal']
+        meal_b = entries[matchup.meal_b]['meal']
+        for meal in (meal_a, meal_b):
+            if meal.id not in scores:
+                scores[meal.id] = model.get_battle_score(meal)
+        delta = abs(scores[meal_a.id] - scores[meal_b.id]) / 100
+
+        series = [next(draws) for _ in range(matchup.best_of)]
+        needed = matchup.best_of // 2 + 1
+        wins_a = wins_b = 0
+        for random_number in series:
+            if delta > random_number:
+                wins_a += 1
+            else:
+                wins_b += 1
+            if needed in (wins_a, wins_b):
+                break
+
+        games = wins_a + wins_b
+        winner = meal_a if wins_a > wins_b else meal_b
+        for meal, wins in ((meal_a, wins_a), (meal_b, wins_b)):
+            meal_stats = stats.setdefault(meal.id, [0, 0])
+            meal_stats[0] += games
+            meal_stats[1] += wins
+
+        results.append({
+            'meal_a': meal_a.id,
+            'meal_b': meal_b.id,
+            'status': 'completed',
+            'best_of': matchup.best_of,
+            'games': games,
+            'score': [wins_a, wins_b],
+            'winner_id': winner.id,
+            'winner': winner.meal
+        })
+
+    return results, {meal_id: (battles, wins) for meal_id, (battles, wins) in stats.items()}
+
+def replay_battles(fixture: str, battles: List[dict[str, Any]], seed: Optional[int] = None,
+                   expected: Optional[dict[int, dict[str, int]]] = None) -> dict[str, Any]:
+    """
+    Restores a fixture, re-runs a sequence of battles against it and checks the outcome.
+
+    Each battle is fought between meal_a (the first combatant) and meal_b, decided by its recorded
+    random_number, or by the next number of a SeededRandom(seed) stream if it has none. Battles
+    taken from BattleModel.log (see BattleRecord) therefore replay exactly, as do battles that were
+    fought with a seeded model starting from its first draw.
+
+    Args:
+        fixture (str): The fixture (see kitchen_model.register_fixture) the battles were fought on.
+        battles (List[dict[str, Any]]): The battles in order, each with meal_a, meal_b and optionally
+                                        random_number and the expected winner.
+        seed (Optional[int]): The seed for battles without a random_number.
+        expected (Optional[dict[int, dict[str, int]]]): Meal ID -> the {'battles', 'wins'} it should
+                                                        end with.
+
+    Returns:
+        dict[str, Any]: The number of battles replayed, the seconds they took, the final stats of
+                        every meal involved, each mismatch (a different winner or final stats), and
+                        whether everything matched.
+
+    Raises:
+        ValueError: If the fixture is not registered, a meal is not found, or a battle has no
+                    random_number and no seed is given.
+        sqlite3.Error: If there is a database error.
+    """
+    source = SeededRandom(seed) if seed is not None else None
+    if source is None and any(battle.get('random_number') is None for battle in battles):
+        raise ValueError("Battles without a random_number need a seed to replay.")
+
+    restore_fixture(fixture)
+    logger.info("Replaying %d battles on fixture %s", len(battles), fixture)
+
+    model = BattleModel()
+    mismatches: List[dict[str, Any]] = []
+    meal_ids: dict[int, None] = {}
+    start = time.perf_counter()
+    for index, battle in enumerate(battles):
+        meal_a, meal_b = get_meal_by_id(battle['meal_a']), get_meal_by_id(battle['meal_b'])
+        meal_ids.update(dict.fromkeys((meal_a.id, meal_b.id)))
+
+        random_number = battle.get('random_number')
+        if random_number is None:
+            random_number, _ = source.draw()  # type: ignore[union-attr]
+
+        model.clear_combatants()
+        model.prep_combatant(meal_a)
+        model.prep_combatant(meal_b)
+        model.battle(random_number)
+
+        winner = model.log[-1].winner
+        if battle.get('winner') is not None and battle['winner'] != winner:
+            mismatches.append({'battle': index, 'expected_winner': battle['winner'], 'winner': winner})
+    seconds = time.perf_counter() - start
+
+    stats = get_meal_stats(list(meal_ids))
+    for meal_id, want in (expected or {}).items():
+        got = stats.get(int(meal_id))
+        if got is None or any(got[key] != want[key] for key in ('battles', 'wins') if key in want):
+            mismatches.append({'meal_id': int(meal_id), 'expected': want, 'stats': got})
+
+    logger.info("Replayed %d battles in %.3fs with %d mismatches", len(battles), seconds, len(mismatches))
+    return {
+        'battles': len(battles),
+        'seconds': seconds,
+        'stats': stats,
+        'mismatches': mismatches,
+        'match': not mismatches
+    }
+
+def battle_log(model: BattleModel) -> List[dict[str, Any]]:
+    """
+    Returns a model's battle log in the format replay_battles accepts.
+
+    Args:
+        model (BattleModel): The model.
+
+    Returns:
+        List[dict[str, Any]]: One dict per BattleRecord, oldest first.
+    """
+    return [asdict(record) for record in list(model.log)]
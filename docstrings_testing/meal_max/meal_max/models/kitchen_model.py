@@ -1,17 +1,77 @@
+import contextlib
 from dataclasses import dataclass
 import logging
 import os
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, ContextManager, Iterator, Optional
+import uuid
 
-from meal_max.utils.sql_utils import get_db_connection
+from meal_max.utils.compaction import archived_ids, ensure_deleted_at, is_archived
+from meal_max.utils.sql_utils import (
+    get_db_connection,
+    has_baseline,
+    read_only,
+    restore_baseline,
+    snapshot_baseline,
+    snapshot_baseline_from_script
+)
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.retry import retry_on_busy
+from meal_max.utils.single_flight import single_flight
+from meal_max.utils.trie import RadixTrie
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Number of rows read per fetchmany() call when streaming large result sets
+FETCH_BATCH_SIZE = int(os.getenv("FETCH_BATCH_SIZE", "500"))
+
+# sql_utils baseline holding an empty meals table (see enable_fast_reset)
+EMPTY_BASELINE = "meals_empty"
+
+# Keys of each leaderboard entry, in column order for exports
+LEADERBOARD_COLUMNS = ['id', 'meal', 'cuisine', 'price', 'difficulty', 'battles', 'wins', 'win_pct', 'wilson']
+
+# Leaderboard sort keys; each is a generated or plain column of meals with its own partial index
+LEADERBOARD_SORT_KEYS = ('wins', 'battles', 'win_pct', 'wilson')
+
+# Most leaderboard entries /api/leaderboard shares between coalesced requests; a longer
+# leaderboard is streamed from the cursor by each request instead
+LEADERBOARD_SHARED_ROWS = int(os.getenv("LEADERBOARD_SHARED_ROWS", "1000"))
+
+# Generated columns of meals and season_stats (see create_meal_table.sql): the win fraction, and
+# the lower bound of its 95% Wilson score interval, which ranks meals with few battles lower
+_WIN_PCT_SQL = "CASE WHEN battles > 0 THEN wins * 1.0 / battles END"
+_WILSON_SQL = ("(win_pct + 1.9208 / battles - 1.96 * sqrt((win_pct * (1 - win_pct) + 0.9604 / battles) / battles))"
+               " / (1 + 3.8416 / battles)")
+
+# Ids bound per IN (...) query in get_meals_by_ids (SQLite before 3.32 allows at most 999 parameters)
+MAX_IDS_PER_QUERY = 999
+
+# Default number of completions returned by autocomplete_meals
+AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "10"))
+
+# Meals archived and reset per transaction by rollover_season, and the pause between transactions
+SEASON_CHUNK_SIZE = int(os.getenv("SEASON_CHUNK_SIZE", "1000"))
+SEASON_CHUNK_PAUSE = float(os.getenv("SEASON_CHUNK_PAUSE", "0.005"))
+_season_lock = threading.Lock()
+
+# Trie over the names of non-deleted meals, built on first use (see get_name_index).
+# Writes made through this module keep it in sync while holding the lock.
+_name_index: Optional[RadixTrie] = None
+_name_index_lock = threading.Lock()
+
+
+class SeasonNotFoundError(ValueError):
+    """
+    Raised when a season does not exist or its rollover has not finished.
+    """
+
+
 @dataclass
 class Meal:
     id: int
@@ -27,6 +87,7 @@ class Meal:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
 
 
+@retry_on_busy
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
     """
     Creates a new meal in the meal table.
@@ -57,6 +118,7 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
                 VALUES (?, ?, ?, ?)
             """, (meal, cuisine, price, difficulty))
             conn.commit()
+            _index_meal_name(cursor.lastrowid, meal)
 
             logger.info("Meal successfully added to the database: %s", meal)
 
@@ -72,16 +134,27 @@ def clear_meals() -> None:
     """
     Recreates the meals table, effectively deleting all meals.
 
+    Restores the empty baseline if enable_fast_reset has been called, otherwise runs the create
+    table script.
+
     Raises:
         sqlite3.Error: If any database error occurs.
     """
     try:
+        if has_baseline(EMPTY_BASELINE):
+            restore_baseline(EMPTY_BASELINE)
+            _new_data_generation()
+            _reset_name_index()
+            logger.info("Meals cleared successfully.")
+            return
+
         with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql"), "r") as fh:
             create_table_script = fh.read()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.executescript(create_table_script)
             conn.commit()
+            _reset_name_index()
 
             logger.info("Meals cleared successfully.")
 
@@ -89,6 +162,55 @@ def clear_meals() -> None:
         logger.error("Database error while clearing meals: %s", str(e))
         raise e
 
+def enable_fast_reset() -> None:
+    """
+    Snapshots an empty meals table so clear_meals restores it instead of re-running the create
+    table script.
+
+    Raises:
+        sqlite3.Error: If the create table script fails.
+    """
+    with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql"), "r") as fh:
+        snapshot_baseline_from_script(EMPTY_BASELINE, fh.read())
+
+def register_fixture(name: str, path: Optional[str] = None) -> None:
+    """
+    Saves a seeded database as a named fixture for restore_fixture.
+
+    Args:
+        name (str): The fixture name.
+        path (Optional[str]): A database file holding the fixture. Defaults to the current database.
+
+    Raises:
+        sqlite3.Error: If the fixture cannot be read.
+    """
+    snapshot_baseline(f"fixture:{name}", path)
+    logger.info("Fixture %s registered", name)
+
+def restore_fixture(name: str) -> None:
+    """
+    Replaces the meals table with a fixture saved by register_fixture.
+
+    Args:
+        name (str): The fixture name.
+
+    Raises:
+        ValueError: If no fixture with this name has been registered.
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        restore_baseline(f"fixture:{name}")
+        _new_data_generation()
+        _reset_name_index()
+        logger.info("Fixture %s restored", name)
+    except ValueError:
+        logger.error("Fixture %s has not been registered", name)
+        raise ValueError(f"Fixture {name} has not been registered")
+    except sqlite3.Error as e:
+        logger.error("Database error while restoring fixture %s: %s", name, str(e))
+        raise e
+
+@retry_on_busy
 def delete_meal(meal_id: int) -> None:
     """
     Soft deletes a meal from the catalog by marking it as deleted.
@@ -112,12 +234,16 @@ def delete_meal(meal_id: int) -> None:
                     logger.info("Meal with ID %s has already been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
             except TypeError:
+                if is_archived(cursor, "meals", meal_id):
+                    logger.info("Meal with ID %s has been archived", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
             # Perform the soft delete by setting 'deleted' to TRUE
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
             conn.commit()
+            _unindex_meal_name(meal_id)
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
@@ -125,56 +251,107 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def _leaderboard_query(sort_by: str) -> str:
     """
-    Retrieves a leaderboard of meals based on win rate or win count, not including deleted meals.
+    Builds the leaderboard query for the given sort order.
+
+    The WHERE clause matches the partial indexes on meals, so every sort is an index scan.
 
     Args:
-        sort_by (str): Determines how the leaderboard is sorted. Can either be sorted by 'wins' or 
-                       'win_pct'(win percentage as a percentage value). Defauled to 'wins'. Sorts in Descending order.
+        sort_by (str): One of LEADERBOARD_SORT_KEYS.
 
     Returns:
-        list[dict[str, Any]]: A list of dictionaries, each representing a non deleted meal with the following 
-                              keys: 'id', 'meal', 'cuisine', 'price', 'difficulty', 'battles', 'wins', and 
-                              'win_pct' (win percentage as a percentage value).
+        str: The SQL query.
 
     Raises:
-        ValueError: If `sort_by` is neither "wins" nor "win_pct".
-        sqlite3.Error: If there is a database error.
+        ValueError: If `sort_by` is not one of LEADERBOARD_SORT_KEYS.
     """
-
     query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, wilson
         FROM meals WHERE deleted = false AND battles > 0
     """
-    # determines sorting order
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
-    else:
+    return query + _leaderboard_order(sort_by)
+
+def _leaderboard_order(sort_by: str) -> str:
+    """
+    Builds the ORDER BY clause of a leaderboard query (see _leaderboard_query).
+
+    Raises:
+        ValueError: If `sort_by` is not one of LEADERBOARD_SORT_KEYS.
+    """
+    if sort_by not in LEADERBOARD_SORT_KEYS:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    return f" ORDER BY {sort_by} DESC"
+
+def _leaderboard_entry(row: tuple) -> dict[str, Any]:
+    """
+    Converts a row of the leaderboard query into a leaderboard entry.
+    """
+    return {
+        'id': row[0],
+        'meal': row[1],
+        'cuisine': row[2],
+        'price': row[3],
+        'difficulty': row[4],
+        'battles': row[5],
+        'wins': row[6],
+        'win_pct': round(row[7] * 100, 1),  # Convert to percentage
+        'wilson': round(row[8] * 100, 1)
+    }
+
+def get_leaderboard(sort_by: str="wins", limit: Optional[int]=None,
+                    data_version: Optional[str]=None) -> list[dict[str, Any]]:
+    """
+    Retrieves a leaderboard of meals sorted by wins, battles, win rate or Wilson score, not including
+    deleted meals.
+
+    Concurrent calls with the same sort order, limit and data version share one query and one
+    result list, which callers must not modify.
+
+    Args:
+        sort_by (str): Determines how the leaderboard is sorted. Can be sorted by 'wins', 'battles',
+                       'win_pct' (win percentage) or 'wilson' (the lower bound of the win percentage's
+                       95% confidence interval). Defauled to 'wins'. Sorts in Descending order.
+        limit (Optional[int]): The most entries to return, from the top. All of them if not provided.
+        data_version (Optional[str]): The data version the caller already read (see get_data_version),
+                                      so the shared result matches it. Read here if not provided.
+
+    Returns:
+        list[dict[str, Any]]: A list of dictionaries, each representing a non deleted meal with the following 
+                              keys: 'id', 'meal', 'cuisine', 'price', 'difficulty', 'battles', 'wins', 
+                              'win_pct' and 'wilson' (both as percentage values).
+
+    Raises:
+        ValueError: If `sort_by` is not one of LEADERBOARD_SORT_KEYS.
+        sqlite3.Error: If there is a database error.
+    """
+    # Validate before reading the version, which a bad sort key would otherwise be paired with
+    _leaderboard_order(sort_by)
+    if data_version is None:
+        data_version = get_data_version()
+    return _shared_leaderboard(sort_by, limit, data_version)
+
+@single_flight("get_leaderboard")
+@read_only
+def _shared_leaderboard(sort_by: str, limit: Optional[int], data_version: str) -> list[dict[str, Any]]:
+    """
+    Runs the leaderboard query for get_leaderboard. The data version is only part of the
+    single-flight key.
+    """
+    query = _leaderboard_query(sort_by)
+    params: tuple = ()
+    if limit is not None:
+        query += " LIMIT ?"
+        params = (limit,)
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
+            cursor.execute(query, params)
             rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
-            }
-            leaderboard.append(meal)
+        leaderboard = [_leaderboard_entry(row) for row in rows]
 
         logger.info("Leaderboard retrieved successfully")
         return leaderboard
@@ -183,6 +360,52 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
         logger.error("Database error: %s", str(e))
         raise e
 
+@read_only
+def iter_leaderboard(sort_by: str="wins", batch_size: int=FETCH_BATCH_SIZE) -> Iterator[dict[str, Any]]:
+    """
+    Lazily retrieves the leaderboard, reading rows from the database in batches.
+
+    Produces the same entries as get_leaderboard, but only `batch_size` rows are held in memory
+    at a time. The database connection stays open until the iterator is exhausted or closed.
+
+    Args:
+        sort_by (str): One of LEADERBOARD_SORT_KEYS. Defaults to 'wins'.
+        batch_size (int): The number of rows fetched from the cursor at a time.
+
+    Returns:
+        Iterator[dict[str, Any]]: An iterator over the leaderboard entries.
+
+    Raises:
+        ValueError: If `sort_by` is not one of LEADERBOARD_SORT_KEYS (raised immediately).
+        sqlite3.Error: If there is a database error (raised while iterating).
+    """
+    # Validate eagerly so callers see a bad sort key before they start consuming rows
+    query = _leaderboard_query(sort_by)
+    return _iter_rows(query, (), _leaderboard_entry, batch_size)
+
+def _iter_rows(query: str, params: tuple, convert: Callable[[tuple], Any], batch_size: int) -> Iterator[Any]:
+    """
+    Runs a query and yields its converted rows, fetching `batch_size` rows at a time.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            count = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                for row in rows:
+                    yield convert(row)
+            logger.info("Streamed %d rows", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+@read_only
 def get_meal_by_id(meal_id: int) -> Meal:
     """
     Retrieves a meal from the catalog by its meal ID.
@@ -208,6 +431,9 @@ def get_meal_by_id(meal_id: int) -> Meal:
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
                 return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
             else:
+                if is_archived(cursor, "meals", meal_id):
+                    logger.info("Meal with ID %s has been archived", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
@@ -216,6 +442,90 @@ def get_meal_by_id(meal_id: int) -> Meal:
         raise e
 
 
+@read_only
+def get_meals_by_ids(meal_ids: list[int]) -> list[dict[str, Any]]:
+    """
+    Retrieves several meals by ID over one connection, MAX_IDS_PER_QUERY ids per query.
+
+    Args:
+        meal_ids (list[int]): The IDs of the meals to retrieve. Repeated IDs are returned once.
+
+    Returns:
+        list[dict[str, Any]]: One entry per distinct ID, in the order requested, with the 'id' and a
+                              'status' of 'found' (with the Meal under 'meal'), 'deleted' (including
+                              archived meals) or 'missing'.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    meal_ids = list(dict.fromkeys(meal_ids))
+    rows = {}
+    archived = set()
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(meal_ids), MAX_IDS_PER_QUERY):
+                chunk = meal_ids[start:start + MAX_IDS_PER_QUERY]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id IN ({placeholders})
+                """, chunk)
+                rows.update((row[0], row) for row in cursor.fetchall())
+
+            unknown = [meal_id for meal_id in meal_ids if meal_id not in rows]
+            for start in range(0, len(unknown), MAX_IDS_PER_QUERY):
+                chunk = unknown[start:start + MAX_IDS_PER_QUERY]
+                archived.update(archived_ids(cursor, "meals", chunk))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    entries = []
+    for meal_id in meal_ids:
+        row = rows.get(meal_id)
+        if row is None:
+            entries.append({'id': meal_id, 'status': 'deleted' if meal_id in archived else 'missing'})
+        elif row[5]:  # deleted flag
+            entries.append({'id': meal_id, 'status': 'deleted'})
+        else:
+            meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+            entries.append({'id': meal_id, 'status': 'found', 'meal': meal})
+    logger.info("Retrieved %d of %d requested meals", sum(e['status'] == 'found' for e in entries), len(entries))
+    return entries
+
+@read_only
+def get_meal_stats(meal_ids: list[int]) -> dict[int, dict[str, int]]:
+    """
+    Retrieves the battle stats of several meals, including deleted ones.
+
+    Args:
+        meal_ids (list[int]): The IDs of the meals.
+
+    Returns:
+        dict[int, dict[str, int]]: Meal ID -> {'battles', 'wins'}. Meals that do not exist are left out.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    meal_ids = list(dict.fromkeys(meal_ids))
+    stats = {}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(meal_ids), MAX_IDS_PER_QUERY):
+                chunk = meal_ids[start:start + MAX_IDS_PER_QUERY]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"SELECT id, battles, wins FROM meals WHERE id IN ({placeholders})", chunk)
+                stats.update((row[0], {'battles': row[1], 'wins': row[2]}) for row in cursor.fetchall())
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    return stats
+
+@read_only
 def get_meal_by_name(meal_name: str) -> Meal:
     """
     Retrieves a meal from the catalog by its name.
@@ -248,7 +558,29 @@ def get_meal_by_name(meal_name: str) -> Meal:
         logger.error("Database error: %s", str(e))
         raise e
 
+def autocomplete_meals(prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict[str, Any]]:
+    """
+    Retrieves the non-deleted meals whose names start with a prefix, ignoring case.
+
+    Served from the in-memory name index (see get_name_index) without querying the database.
+
+    Args:
+        prefix (str): The start of the meal name.
+        limit (int): The maximum number of meals to return. Defaults to AUTOCOMPLETE_LIMIT.
+
+    Returns:
+        list[dict[str, Any]]: Up to `limit` dictionaries with the 'id' and 'meal' of each match,
+                              in alphabetical order.
 
+    Raises:
+        sqlite3.Error: If the index has to be built and there is a database error.
+    """
+    matches = get_name_index().complete(prefix, limit)
+    logger.info("Autocomplete for '%s' returned %d meals", prefix, len(matches))
+    return [{'id': meal_id, 'meal': meal} for meal_id, meal in matches]
+
+
+@retry_on_busy
 def update_meal_stats(meal_id: int, result: str) -> None:
     """
     Increments the win or loss count of a meal by meal id based off of the result.
@@ -272,6 +604,9 @@ def update_meal_stats(meal_id: int, result: str) -> None:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
             except TypeError:
+                if is_archived(cursor, "meals", meal_id):
+                    logger.info("Meal with ID %s has been archived", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
@@ -288,3 +623,423 @@ def update_meal_stats(meal_id: int, result: str) -> None:
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
+
+@retry_on_busy
+def record_battle_results(results: dict[int, tuple[int, int]]) -> int:
+    """
+    Adds the outcomes of many battles to the meals' stats in one transaction.
+
+    Args:
+        results (dict[int, tuple[int, int]]): Meal ID -> (battles fought, battles won).
+
+    Returns:
+        int: The number of meals updated. Meals deleted since they were looked up are skipped.
+
+    Raises:
+        sqlite3.Error: If there is a database error; no stats are changed.
+    """
+    if not results:
+        return 0
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE meals SET battles = battles + ?, wins = wins + ? WHERE id = ? AND deleted = false",
+                [(battles, wins, meal_id) for meal_id, (battles, wins) in results.items()]
+            )
+            updated = cursor.rowcount
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    logger.info("Recorded battle results for %d of %d meals", updated, len(results))
+    return updated
+
+@read_only
+def get_data_version() -> str:
+    """
+    Retrieves the current data version of the meals table.
+
+    The version is kept in the database (see ensure_data_version_schema): triggers bump it on
+    every write to meals, whichever process makes it, and its generation changes whenever the
+    table is recreated or restored, so a version is never reused for different data. Two reads
+    that observe the same version see the same data.
+
+    Returns:
+        str: The current data version. If it cannot be read (e.g. the database has no data_version
+             table) a new value is returned on every call, so nothing is cached and the read that
+             follows reports any database error itself.
+    """
+    try:
+        with get_db_connection() as conn:
+            generation, version = conn.execute("SELECT generation, version FROM data_version").fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Data version unavailable: %s", str(e))
+        return uuid.uuid4().hex
+    return f"{generation}.{version}"
+
+def _new_data_generation() -> None:
+    """
+    Starts a new data version generation after the database was replaced by a baseline, whose
+    data_version row may repeat a version already handed out.
+    """
+    try:
+        with get_db_connection() as conn:
+            conn.execute("UPDATE data_version SET generation = lower(hex(randomblob(8)))")
+            conn.commit()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            logger.error("Database error: %s", str(e))
+            raise e
+
+def ensure_data_version_schema() -> None:
+    """
+    Adds the data_version row and the triggers that bump it on every write to meals to a
+    database created without them. Skipped when already done, or if there is no meals table yet.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    try:
+        with get_db_connection() as conn:
+            if not conn.execute("PRAGMA table_info(meals)").fetchall():
+                return
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS data_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    generation TEXT NOT NULL,
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO data_version VALUES (1, lower(hex(randomblob(8))), 0)")
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS meals_data_version_{event.lower()} AFTER {event} ON meals
+                    BEGIN
+                        UPDATE data_version SET version = version + 1;
+                    END
+                """)
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error while adding the data version: %s", str(e))
+        raise e
+
+@read_only
+def get_name_index() -> RadixTrie:
+    """
+    Returns the trie of non-deleted meal names, building it from the database on first use.
+
+    The index is kept in sync with create_meal and delete_meal made in this process, and is
+    rebuilt after the table is cleared or restored.
+
+    Returns:
+        RadixTrie: The name index.
+
+    Raises:
+        sqlite3.Error: If there is a database error while building the index.
+    """
+    global _name_index
+    index = _name_index
+    if index is not None:
+        return index
+
+    with _name_index_lock:
+        if _name_index is None:
+            index = RadixTrie()
+            for meal_id, meal in _iter_rows("SELECT id, meal FROM meals WHERE deleted = false", (),
+                                            tuple, FETCH_BATCH_SIZE):
+                index.insert(meal_id, meal)
+            _name_index = index
+            logger.info("Built the meal name index with %d meals", len(index))
+        return _name_index
+
+def _index_meal_name(meal_id: int, meal: str) -> None:
+    """
+    Adds a new meal to the name index, if it has been built.
+    """
+    with _name_index_lock:
+        if _name_index is not None:
+            _name_index.insert(meal_id, meal)
+
+def _unindex_meal_name(meal_id: int) -> None:
+    """
+    Removes a deleted meal from the name index, if it has been built.
+    """
+    with _name_index_lock:
+        if _name_index is not None:
+            _name_index.remove(meal_id)
+
+def _reset_name_index() -> None:
+    """
+    Discards the name index after the whole table changed, so the next lookup rebuilds it.
+    """
+    global _name_index
+    with _name_index_lock:
+        _name_index = None
+
+def ensure_leaderboard_schema() -> None:
+    """
+    Brings a meals table created before the leaderboard columns existed up to date: adds the
+    win_pct and wilson generated columns and the partial index for each leaderboard sort key.
+    Every step is skipped when already done, as is everything if there is no meals table yet.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    try:
+        with get_db_connection() as conn:
+            columns = [column[1] for column in conn.execute("PRAGMA table_xinfo(meals)")]
+            if not columns:
+                return
+            for name, expression in (('win_pct', _WIN_PCT_SQL), ('wilson', _WILSON_SQL)):
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE meals ADD COLUMN {name} REAL GENERATED ALWAYS AS ({expression}) VIRTUAL")
+                    logger.info("Added the %s column to meals", name)
+            for key in LEADERBOARD_SORT_KEYS:
+                conn.execute(f"""
+                    CREATE INDEX IF NOT EXISTS meals_leaderboard_{key} ON meals ({key} DESC)
+                    WHERE deleted = false AND battles > 0
+                """)
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error while adding the leaderboard columns: %s", str(e))
+        raise e
+
+def ensure_season_schema(conn: sqlite3.Connection) -> None:
+    """
+    Creates the seasons and season_stats tables in a database created before seasons existed,
+    with everything played so far counting as season 1, and adds the deleted_at column the
+    rollover uses to leave out meals deleted before a season ended.
+
+    Args:
+        conn (sqlite3.Connection): An open write connection to the database.
+    """
+    ensure_deleted_at(conn, "meals")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS seasons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ended_at TIMESTAMP,
+            rollover_cursor INTEGER DEFAULT 0,
+            completed_at TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO seasons (id) SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM seasons)")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS season_stats (
+            season INTEGER NOT NULL,
+            meal_id INTEGER NOT NULL,
+            meal TEXT NOT NULL,
+            cuisine TEXT NOT NULL,
+            price REAL NOT NULL,
+            difficulty TEXT,
+            battles INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            win_pct REAL GENERATED ALWAYS AS ({_WIN_PCT_SQL}) VIRTUAL,
+            wilson REAL GENERATED ALWAYS AS ({_WILSON_SQL}) VIRTUAL,
+            PRIMARY KEY (season, meal_id)
+        )
+    """)
+    conn.commit()
+
+def rollover_season(chunk_size: int = SEASON_CHUNK_SIZE, pause: float = SEASON_CHUNK_PAUSE,
+                    writer: Callable[[], ContextManager[Any]] = contextlib.nullcontext) -> dict[str, Any]:
+    """
+    Ends the current season: archives every meal's battles and wins into season_stats and resets
+    them to zero, without touching the meals themselves. Meals deleted before the season ended
+    are left out.
+
+    Meals are processed in id order, `chunk_size` at a time, each chunk copied and reset in its
+    own short transaction, so battles are only held up for one chunk at a time. A battle fought
+    during the rollover counts towards the ending season if its meals have not been reached yet.
+    Progress is saved with every chunk, and a rollover that was interrupted is finished by the
+    next call instead of starting another one.
+
+    Args:
+        chunk_size (int): Meals per transaction.
+        pause (float): Seconds to wait between transactions.
+        writer (Callable[[], ContextManager]): Entered around each transaction, e.g. to hold a
+                                               writer slot for it only (see admission.writer_slot).
+
+    Returns:
+        dict[str, Any]: The season that ended, the new current season, the number of meals
+                        archived, the number of transactions and the seconds taken.
+
+    Raises:
+        sqlite3.Error: If there is a database error. The rollover can be resumed by calling again.
+        Exception: Whatever entering `writer` raises, e.g. WriterSlotUnavailable, with the same
+                   guarantee.
+    """
+    start = time.perf_counter()
+    with _season_lock:
+        try:
+            with writer(), get_db_connection() as conn:
+                ensure_season_schema(conn)
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, rollover_cursor FROM seasons
+                    WHERE ended_at IS NOT NULL AND completed_at IS NULL ORDER BY id LIMIT 1
+                """)
+                unfinished = cursor.fetchone()
+                if unfinished is not None:
+                    season, after = unfinished
+                    logger.info("Resuming the rollover of season %d after meal %d", season, after)
+                else:
+                    cursor.execute("SELECT MAX(id) FROM seasons")
+                    season, after = cursor.fetchone()[0], 0
+                    cursor.execute("UPDATE seasons SET ended_at = CURRENT_TIMESTAMP WHERE id = ?", (season,))
+                    cursor.execute("INSERT INTO seasons DEFAULT VALUES")
+                    conn.commit()
+                    logger.info("Season %d ended; rolling over its stats", season)
+
+        except sqlite3.Error as e:
+            logger.error("Database error while starting the season rollover: %s", str(e))
+            raise e
+
+        archived = chunks = 0
+        while True:
+            with writer():
+                chunk = _rollover_chunk(season, after, chunk_size)
+            if chunk is None:
+                break
+            after, count = chunk
+            archived += count
+            chunks += 1
+            if pause:
+                time.sleep(pause)
+
+        try:
+            with writer(), get_db_connection() as conn:
+                conn.execute("UPDATE seasons SET completed_at = CURRENT_TIMESTAMP WHERE id = ?", (season,))
+                conn.commit()
+                new_season = conn.execute("SELECT MAX(id) FROM seasons").fetchone()[0]
+
+        except sqlite3.Error as e:
+            logger.error("Database error while finishing the season rollover: %s", str(e))
+            raise e
+
+    seconds = time.perf_counter() - start
+    logger.info("Season %d rolled over: %d meals archived in %d transactions (%.3fs)",
+                season, archived, chunks, seconds)
+    return {'season': season, 'new_season': new_season, 'archived': archived, 'chunks': chunks, 'seconds': seconds}
+
+@retry_on_busy
+def _rollover_chunk(season: int, after: int, chunk_size: int) -> Optional[tuple[int, int]]:
+    """
+    Archives and resets the stats of the next `chunk_size` meals with an id above `after` in one
+    transaction, saving the last id as the season's rollover cursor.
+
+    Returns:
+        Optional[tuple[int, int]]: The last id processed and the number of meals archived, or None
+                                   when no meals are left.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM (SELECT id FROM meals WHERE id > ? ORDER BY id LIMIT ?)",
+                           (after, chunk_size))
+            last = cursor.fetchone()[0]
+            if last is None:
+                return None
+
+            # Meals deleted during the rollover still played in the season that ended
+            in_season = """
+                id > ? AND id <= ? AND battles > 0
+                AND (NOT deleted OR deleted_at > (SELECT ended_at FROM seasons WHERE id = ?))
+            """
+            cursor.execute(f"""
+                INSERT INTO season_stats (season, meal_id, meal, cuisine, price, difficulty, battles, wins)
+                SELECT ?, id, meal, cuisine, price, difficulty, battles, wins FROM meals WHERE {in_season}
+            """, (season, after, last, season))
+            archived = cursor.rowcount
+            cursor.execute(f"UPDATE meals SET battles = 0, wins = 0 WHERE {in_season}", (after, last, season))
+            cursor.execute("UPDATE seasons SET rollover_cursor = ? WHERE id = ?", (last, season))
+            conn.commit()
+            return last, archived
+
+    except sqlite3.Error as e:
+        logger.error("Database error while rolling over season %d: %s", season, str(e))
+        raise e
+
+@read_only
+def get_seasons() -> list[dict[str, Any]]:
+    """
+    Retrieves every season, oldest first.
+
+    Returns:
+        list[dict[str, Any]]: One entry per season with its 'season' number, 'started_at',
+                              'ended_at' (None for the current season), whether its rollover is
+                              'complete', and the number of 'meals' with archived stats.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT s.id, s.started_at, s.ended_at, s.completed_at,
+                       (SELECT COUNT(*) FROM season_stats WHERE season = s.id)
+                FROM seasons s ORDER BY s.id
+            """)
+            rows = cursor.fetchall()
+
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            logger.error("Database error: %s", str(e))
+            raise e
+        # Created before seasons existed: everything so far is the first season
+        return [{'season': 1, 'started_at': None, 'ended_at': None, 'complete': False, 'meals': 0}]
+
+    return [{'season': row[0], 'started_at': row[1], 'ended_at': row[2], 'complete': row[3] is not None,
+             'meals': row[4]} for row in rows]
+
+@read_only
+def get_season_leaderboard(season: int, sort_by: str = "wins") -> list[dict[str, Any]]:
+    """
+    Retrieves the leaderboard of a past season, as it stood when the season ended. A season whose
+    rollover is still running (or was interrupted) has only part of its standings archived, so
+    it is not served until the rollover completes.
+
+    Meals deleted since are included, so the standings do not change after the season.
+
+    Args:
+        season (int): The season number (see get_seasons).
+        sort_by (str): One of LEADERBOARD_SORT_KEYS. Defaults to 'wins'.
+
+    Returns:
+        list[dict[str, Any]]: Entries with the same keys as get_leaderboard.
+
+    Raises:
+        SeasonNotFoundError: If the season does not exist or its rollover has not completed.
+        ValueError: If `sort_by` is invalid.
+        sqlite3.Error: If there is a database error.
+    """
+    query = """
+        SELECT meal_id, meal, cuisine, price, difficulty, battles, wins, win_pct, wilson
+        FROM season_stats WHERE season = ?
+    """ + _leaderboard_order(sort_by)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT completed_at FROM seasons WHERE id = ? AND ended_at IS NOT NULL", (season,))
+            row = cursor.fetchone()
+            if row is None or row[0] is None:
+                logger.info("Season %d not found, still running or still rolling over", season)
+                raise SeasonNotFoundError(f"Season {season} not found or has not ended")
+            cursor.execute(query, (season,))
+            rows = cursor.fetchall()
+
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            logger.error("Database error: %s", str(e))
+            raise e
+        raise SeasonNotFoundError(f"Season {season} not found or has not ended")
+
+    logger.info("Leaderboard of season %d retrieved successfully", season)
+    return [_leaderboard_entry(row) for row in rows]
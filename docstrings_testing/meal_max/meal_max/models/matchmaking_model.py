@@ -0,0 +1,289 @@
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Deque, List, Optional
+
+from meal_max.models.battle_model import BattleModel, Matchup, run_battles
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Largest battle score difference a new arrival is paired across
+MATCH_WINDOW = float(os.getenv("MATCH_WINDOW", "5"))
+# How fast (score points per second) a waiting meal's window widens, and how wide it may get
+MATCH_WINDOW_GROWTH = float(os.getenv("MATCH_WINDOW_GROWTH", "2"))
+MATCH_WINDOW_MAX = float(os.getenv("MATCH_WINDOW_MAX", "100"))
+# Seconds a meal waits for an opponent before it is dropped from the queue (0 means no limit)
+MATCH_MAX_WAIT = float(os.getenv("MATCH_MAX_WAIT", "300"))
+# Seconds between background passes that widen windows and run the matched battles
+MATCH_INTERVAL = float(os.getenv("MATCH_INTERVAL", "0.5"))
+# Finished matches kept for GET /api/matchmaking
+MATCH_RESULTS_SIZE = int(os.getenv("MATCH_RESULTS_SIZE", "100"))
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "matchmaking_queue_depth", "Meals waiting for an opponent.")
+MATCHES = REGISTRY.counter(
+    "matchmaking_matches_total", "Pairs formed by the matchmaker, by how: arrival (paired on enqueue) or "
+    "sweep (paired once their windows widened).", ("how",))
+EXPIRED = REGISTRY.counter(
+    "matchmaking_expired_total", "Meals dropped from the queue after MATCH_MAX_WAIT without an opponent.")
+WAIT = REGISTRY.histogram(
+    "matchmaking_wait_seconds", "Time meals waited in the queue before being paired.",
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+
+# get_battle_score does not depend on the model's state
+_scorer = BattleModel()
+
+
+@dataclass
+class Ticket:
+    meal: Meal
+    score: float
+    seq: int  # arrival order; breaks ties between equal scores
+    queued_at: float  # time.monotonic()
+
+    @property
+    def key(self) -> tuple[float, int]:
+        return (self.score, self.seq)
+
+
+class Matchmaker:
+    """
+    Pairs queued meals with the waiting meal whose battle score is closest, and battles them.
+
+    Waiting meals are kept in a list sorted by score, so an arrival finds its nearest neighbours
+    with a binary search. It is paired with the closer one if the difference is within that meal's
+    window, which starts at `window` and widens by `growth` per second of waiting (up to
+    `max_window`). Meals that find no opponent wait; a background pass pairs neighbours once their
+    windows have widened enough and drops meals that waited longer than `max_wait`.
+
+    Pairs are battled by the background pass, all pairs formed since the last pass together with
+    run_battles (one random.org request and one transaction), the longer-waiting meal first.
+
+    Attributes:
+        window (float): The starting score window.
+        growth (float): Score points the window widens by per second of waiting.
+        max_window (float): The widest window.
+        max_wait (float): Seconds a meal may wait before it is dropped (0 means no limit).
+        interval (float): Seconds between background passes.
+    """
+
+    def __init__(self, window: float = MATCH_WINDOW, growth: float = MATCH_WINDOW_GROWTH,
+                 max_window: float = MATCH_WINDOW_MAX, max_wait: float = MATCH_MAX_WAIT,
+                 interval: float = MATCH_INTERVAL,
+                 run: Callable[[List[Matchup]], List[dict[str, Any]]] = run_battles):
+        self.window = window
+        self.growth = growth
+        self.max_window = max_window
+        self.max_wait = max_wait
+        self.interval = interval
+        self._run_battles = run
+        self._keys: List[tuple[float, int]] = []  # sorted keys of the waiting tickets
+        self._tickets: dict[tuple[float, int], Ticket] = {}
+        self._queued: dict[int, tuple[float, int]] = {}  # meal id -> key
+        self._pairs: List[tuple[Ticket, Ticket]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.results: Deque[dict[str, Any]] = deque(maxlen=MATCH_RESULTS_SIZE)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def window_for(self, ticket: Ticket, now: float) -> float:
+        """
+        Returns a waiting meal's current score window.
+        """
+        return min(self.max_window, self.window + self.growth * (now - ticket.queued_at))
+
+    def enqueue(self, meal: Meal) -> dict[str, Any]:
+        """
+        Queues a meal for a battle, pairing it at once if a close enough opponent is waiting.
+
+        Args:
+            meal (Meal): The meal.
+
+        Returns:
+            dict[str, Any]: The status ('matched' with the opponent, or 'queued') and the meal's score.
+
+        Raises:
+            ValueError: If the meal is already queued or waiting for its battle.
+        """
+        score = _scorer.get_battle_score(meal)
+        now = time.monotonic()
+        with self._lock:
+            if meal.id in self._queued or any(meal.id in (a.meal.id, b.meal.id) for a, b in self._pairs):
+                raise ValueError(f"Meal with ID {meal.id} is already queued")
+            ticket = Ticket(meal, score, next(self._seq), now)
+
+            opponent = self._nearest(ticket, now)
+            if opponent is None:
+                insort(self._keys, ticket.key)
+                self._tickets[ticket.key] = ticket
+                self._queued[meal.id] = ticket.key
+                QUEUE_DEPTH.inc()
+                logger.info("Queued %s (score %.2f); %d waiting", meal.meal, score, len(self._keys))
+                return {'status': 'queued', 'score': score}
+
+            self._remove(opponent)
+            self._pair(opponent, ticket, now, 'arrival')
+        self._wake.set()
+        return {'status': 'matched', 'score': score, 'opponent': opponent.meal.id}
+
+    def dequeue(self, meal_id: int) -> bool:
+        """
+        Takes a waiting meal out of the queue.
+
+        Args:
+            meal_id (int): The ID of the meal.
+
+        Returns:
+            bool: False if the meal was not waiting (e.g. it has already been paired).
+        """
+        with self._lock:
+            key = self._queued.get(meal_id)
+            if key is None:
+                return False
+            self._remove(self._tickets[key])
+        logger.info("Meal with ID %s left the matchmaking queue", meal_id)
+        return True
+
+    def sweep(self) -> int:
+        """
+        Pairs neighbouring waiting meals whose windows have widened enough and drops expired ones.
+
+        Returns:
+            int: The number of pairs formed.
+        """
+        now = time.monotonic()
+        formed = 0
+        with self._lock:
+            if self.max_wait > 0:
+                expired = [ticket for ticket in self._tickets.values() if now - ticket.queued_at > self.max_wait]
+                for ticket in expired:
+                    self._remove(ticket)
+                    EXPIRED.inc()
+                    logger.info("%s waited %.0fs without an opponent; dropped", ticket.meal.meal, self.max_wait)
+
+            i = 0
+            while i < len(self._keys) - 1:
+                a, b = self._tickets[self._keys[i]], self._tickets[self._keys[i + 1]]
+                if b.score - a.score <= max(self.window_for(a, now), self.window_for(b, now)):
+                    self._remove(a)
+                    self._remove(b)
+                    first, second = (a, b) if a.queued_at <= b.queued_at else (b, a)
+                    self._pair(first, second, now, 'sweep')
+                    formed += 1
+                else:
+                    i += 1
+        return formed
+
+    def run_pending(self) -> List[dict[str, Any]]:
+        """
+        Battles every pair formed since the last call.
+
+        If the battles cannot be run (e.g. random.org is down), every pair gets an error result
+        instead, so the meals' owners can see why and queue them again.
+
+        Returns:
+            List[dict[str, Any]]: The run_battles results, in pairing order.
+        """
+        with self._lock:
+            pairs, self._pairs = self._pairs, []
+        if not pairs:
+            return []
+        try:
+            results = self._run_battles([Matchup(a.meal.id, b.meal.id) for a, b in pairs])
+        except Exception as e:
+            logger.error("Matchmade battles failed: %s", str(e))
+            results = [{'meal_a': a.meal.id, 'meal_b': b.meal.id, 'status': 'error', 'error': str(e)}
+                       for a, b in pairs]
+        self.results.extend(results)
+        logger.info("Ran %d matchmade battles", len(results))
+        return results
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Returns the waiting meals (by score) with their windows, the pairs awaiting their battle
+        and the most recent results.
+        """
+        now = time.monotonic()
+        with self._lock:
+            waiting = [{
+                'id': ticket.meal.id,
+                'meal': ticket.meal.meal,
+                'score': ticket.score,
+                'waited': now - ticket.queued_at,
+                'window': self.window_for(ticket, now)
+            } for ticket in (self._tickets[key] for key in self._keys)]
+            pending = [[a.meal.id, b.meal.id] for a, b in self._pairs]
+        return {'waiting': waiting, 'pending': pending, 'results': list(self.results)}
+
+    def start(self) -> None:
+        """
+        Starts the background pass. Calling start again is a no-op.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="matchmaker", daemon=True)
+            self._thread.start()
+            logger.info("Matchmaker started (every %.1fs)", self.interval)
+
+    def stop(self) -> None:
+        """
+        Stops the background pass after battling any pairs already formed.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.run_pending()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.sweep()
+                self.run_pending()
+            except Exception as e:
+                logger.error("Matchmaking pass failed: %s", str(e))
+
+    def _nearest(self, ticket: Ticket, now: float) -> Optional[Ticket]:
+        """
+        Returns the waiting ticket with the closest score if it is within that ticket's window.
+        """
+        i = bisect_left(self._keys, ticket.key)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self._keys):
+                candidate = self._tickets[self._keys[j]]
+                difference = abs(candidate.score - ticket.score)
+                if difference <= self.window_for(candidate, now) and (
+                        best is None or difference < abs(best.score - ticket.score)):
+                    best = candidate
+        return best
+
+    def _remove(self, ticket: Ticket) -> None:
+        del self._keys[bisect_left(self._keys, ticket.key)]
+        del self._tickets[ticket.key]
+        del self._queued[ticket.meal.id]
+        QUEUE_DEPTH.dec()
+
+    def _pair(self, first: Ticket, second: Ticket, now: float, how: str) -> None:
+        self._pairs.append((first, second))
+        MATCHES.inc(how=how)
+        for ticket in (first, second):
+            WAIT.observe(now - ticket.queued_at)
+        logger.info("Paired %s (%.2f) with %s (%.2f)", first.meal.meal, first.score, second.meal.meal, second.score)
@@ -0,0 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional, TypeVar
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# SQLite serializes writers anyway, so a handful of threads is enough to keep the event loop free
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "4"))
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool used for database work, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared database executor.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                logger.info("Starting database executor with %d threads", DB_EXECUTOR_THREADS)
+                _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="meal_max_db")
+    return _executor
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking database function (e.g. a kitchen_model function) on the database executor.
+
+    Args:
+        fn (Callable[..., T]): The blocking function.
+        *args: Positional arguments for fn.
+        **kwargs: Keyword arguments for fn.
+
+    Returns:
+        T: The return value of fn. Exceptions raised by fn propagate to the caller.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
+def shutdown_db_executor() -> None:
+    """
+    Waits for pending database work to finish and stops the executor threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+            logger.info("Database executor stopped")
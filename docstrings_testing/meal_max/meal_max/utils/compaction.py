@@ -0,0 +1,308 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from meal_max.utils import sql_utils
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds between background compaction passes
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+# Soft-deleted rows are archived once they have been deleted for this many seconds
+COMPACTION_MIN_AGE = float(os.getenv("COMPACTION_MIN_AGE", str(7 * 24 * 3600)))
+# Rows moved per transaction, so writers are never blocked for long (and IN lists stay under 999)
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+
+
+def archive_table(table: str) -> str:
+    """
+    Returns the name of the archive table for `table`.
+    """
+    return f"{table}_archive"
+
+def ensure_deleted_at(conn: sqlite3.Connection, table: str) -> list[tuple]:
+    """
+    Adds the deleted_at column and the trigger that stamps it when a row is soft deleted, stamping
+    rows that were already deleted with the current time. Skipped when already done.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+        table (str): The soft-deleted table.
+
+    Returns:
+        list[tuple]: The table's columns (PRAGMA table_info) before deleted_at was added.
+    """
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    if not any(column[1] == 'deleted_at' for column in columns):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN deleted_at TIMESTAMP")
+        conn.execute(f"UPDATE {table} SET deleted_at = CURRENT_TIMESTAMP WHERE deleted")
+        logger.info("Added deleted_at to %s", table)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_deleted_at AFTER UPDATE OF deleted ON {table}
+        WHEN NEW.deleted AND NOT OLD.deleted
+        BEGIN
+            UPDATE {table} SET deleted_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    """)
+    return columns
+
+def ensure_archive_schema(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Brings a database created before archiving existed up to date.
+
+    Adds the deleted_at column and its trigger (see ensure_deleted_at), so rows that were already
+    deleted age from now, and creates the archive table. Every step is skipped when already done.
+    Converting the database to incremental auto-vacuum is a separate one-off step (see
+    enable_incremental_vacuum), because it rewrites the whole file.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+        table (str): The table whose soft-deleted rows are archived.
+    """
+    columns = ensure_deleted_at(conn, table)
+
+    # Same columns without the constraints, so archived rows never clash with live ones
+    definitions = ", ".join(
+        f"{name} {declared}" for _, name, declared, _, _, _ in columns if name not in ('id', 'deleted_at')
+    )
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {archive_table(table)} (
+            id INTEGER PRIMARY KEY, {definitions}, deleted_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Converts a database created without incremental auto-vacuum, so compact can return the pages
+    it frees to the file system. New databases get it from the create script.
+
+    This is a one-off migration: the conversion needs a full VACUUM, which rewrites the file and
+    blocks every writer while it runs, so run it during maintenance with
+    `python -m meal_max.utils.compaction` rather than from the app.
+
+    Returns:
+        bool: True if the database was converted, False if it already used incremental auto-vacuum.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with sql_utils.get_db_connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            logger.info("Converting the database to incremental auto-vacuum")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+    except sqlite3.Error as e:
+        logger.error("Database error while converting to incremental auto-vacuum: %s", str(e))
+        raise e
+
+def _page_counts(conn: sqlite3.Connection) -> tuple[int, int]:
+    return (conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA freelist_count").fetchone()[0])
+
+def compact(table: str, min_age: float = COMPACTION_MIN_AGE, batch_size: int = COMPACTION_BATCH_SIZE) -> dict[str, Any]:
+    """
+    Moves rows soft deleted more than `min_age` seconds ago into the archive table, then returns
+    the freed pages to the file system with an incremental vacuum. On a database without
+    incremental auto-vacuum (see enable_incremental_vacuum) the freed pages are only reused.
+
+    Each batch of `batch_size` rows is copied and deleted in its own transaction. Ids are never
+    reused (the tables are AUTOINCREMENT), so an archived id cannot collide with a live one.
+    Pages freed by one batch are mostly reused by the next batch's archive rows; reclaimed_pages
+    counts those left free at the end, which the vacuum truncates from the file.
+
+    Args:
+        table (str): The table to compact.
+        min_age (float): Seconds a row must have been deleted for before it is archived.
+        batch_size (int): Rows moved per transaction.
+
+    Returns:
+        dict: archived (rows moved), batches, pages_before, pages_after, freelist_before,
+              reclaimed_pages and reclaimed_bytes (truncated by the vacuum) and seconds.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    start = time.perf_counter()
+    archive = archive_table(table)
+    archived = 0
+    batches = 0
+    try:
+        with sql_utils.get_db_connection() as conn:
+            ensure_archive_schema(conn, table)
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                logger.warning("The database does not use incremental auto-vacuum; run enable_incremental_vacuum "
+                               "to reclaim the pages compaction frees")
+            columns = [column[1] for column in conn.execute(f"PRAGMA table_info({table})")]
+            column_list = ", ".join(columns)
+            pages_before, freelist_before = _page_counts(conn)
+
+            while True:
+                ids = [row[0] for row in conn.execute(f"""
+                    SELECT id FROM {table}
+                    WHERE deleted AND deleted_at <= datetime('now', ?)
+                    ORDER BY id LIMIT ?
+                """, (f"-{min_age} seconds", batch_size))]
+                if not ids:
+                    break
+                placeholders = ", ".join("?" * len(ids))
+                with conn:
+                    conn.execute(f"""
+                        INSERT OR REPLACE INTO {archive} ({column_list})
+                        SELECT {column_list} FROM {table} WHERE id IN ({placeholders})
+                    """, ids)
+                    conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+                archived += len(ids)
+                batches += 1
+
+            # The pragma frees one page per step and has no result columns, so execute() would
+            # only run the first step; executescript steps it to completion
+            _, freelist_vacuumed = _page_counts(conn)
+            conn.executescript("PRAGMA incremental_vacuum;")
+            pages_after, freelist_after = _page_counts(conn)
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while compacting %s: %s", table, str(e))
+        raise e
+
+    report = {
+        'table': table,
+        'archived': archived,
+        'batches': batches,
+        'pages_before': pages_before,
+        'pages_after': pages_after,
+        'freelist_before': freelist_before,
+        'reclaimed_pages': freelist_vacuumed - freelist_after,
+        'reclaimed_bytes': (freelist_vacuumed - freelist_after) * page_size,
+        'seconds': time.perf_counter() - start
+    }
+    logger.info("Compacted %s: archived %d rows in %d batches, reclaimed %d pages",
+                table, archived, batches, report['reclaimed_pages'])
+    return report
+
+def is_archived(cursor: sqlite3.Cursor, table: str, row_id: int) -> bool:
+    """
+    Checks whether a row missing from `table` has been moved to its archive.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor on an open connection.
+        table (str): The table the row was deleted from.
+        row_id (int): The id of the row.
+
+    Returns:
+        bool: True if the archive holds the row. False if it does not, or if the database has no
+              archive table yet.
+    """
+    try:
+        cursor.execute(f"SELECT 1 FROM {archive_table(table)} WHERE id = ?", (row_id,))
+    except sqlite3.OperationalError:
+        return False
+    return cursor.fetchone() is not None
+
+def archived_ids(cursor: sqlite3.Cursor, table: str, row_ids: list[int]) -> set[int]:
+    """
+    Returns which of several rows missing from `table` have been moved to its archive.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor on an open connection.
+        table (str): The table the rows were deleted from.
+        row_ids (list[int]): The ids of the rows, at most 999.
+
+    Returns:
+        set[int]: The ids held by the archive (none if the database has no archive table yet).
+    """
+    placeholders = ", ".join("?" * len(row_ids))
+    try:
+        cursor.execute(f"SELECT id FROM {archive_table(table)} WHERE id IN ({placeholders})", row_ids)
+    except sqlite3.OperationalError:
+        return set()
+    return {row[0] for row in cursor.fetchall()}
+
+
+class Compactor:
+    """
+    Runs compact for a table on a background thread.
+
+    Attributes:
+        table (str): The table to compact.
+        interval (float): Seconds between passes.
+        min_age (float): Seconds a row must have been deleted for before it is archived.
+        batch_size (int): Rows moved per transaction.
+    """
+
+    def __init__(self, table: str, interval: float = COMPACTION_INTERVAL, min_age: float = COMPACTION_MIN_AGE,
+                 batch_size: int = COMPACTION_BATCH_SIZE):
+        self.table = table
+        self.interval = interval
+        self.min_age = min_age
+        self.batch_size = batch_size
+        self._run_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._report: Optional[dict[str, Any]] = None
+
+    def start(self) -> None:
+        """
+        Starts compacting every `interval` seconds. The first pass runs after one interval.
+        Calling start again is a no-op.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"compactor-{self.table}", daemon=True)
+            self._thread.start()
+            logger.info("Compactor for %s started (every %.0fs)", self.table, self.interval)
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, waiting for a running pass to finish.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_now()
+            except sqlite3.Error:
+                # Already logged by compact; try again on the next pass
+                pass
+
+    def run_now(self) -> dict[str, Any]:
+        """
+        Runs one compaction pass, waiting for a pass already in progress.
+
+        Returns:
+            dict: The pass's report (see compact).
+
+        Raises:
+            sqlite3.Error: If any database error occurs.
+        """
+        with self._run_lock:
+            self._report = compact(self.table, self.min_age, self.batch_size)
+            return self._report
+
+    def last_report(self) -> Optional[dict[str, Any]]:
+        """
+        Returns the report of the most recent pass, or None if none has run.
+        """
+        return self._report
+
+
+if __name__ == '__main__':
+    enable_incremental_vacuum()
@@ -0,0 +1,146 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import logging
+from typing import Any, Optional, Union
+import uuid
+
+from flask import Flask, Response
+from flask.json.provider import JSONProvider
+
+# orjson is optional; without it the provider falls back to the stdlib encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def _default(obj: Any) -> Any:
+    """
+    Converts objects the encoders do not handle natively into JSON-serializable values.
+
+    Dataclasses (Meal, ...) are encoded from their instance ``__dict__`` directly, which avoids
+    the recursive deep copy made by ``dataclasses.asdict``.
+
+    Args:
+        obj (Any): The object to convert.
+
+    Returns:
+        Any: A JSON-serializable representation of the object.
+
+    Raises:
+        TypeError: If the object is not serializable.
+    """
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        if hasattr(obj, '__dict__'):
+            return obj.__dict__
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    A Flask JSON provider that serializes responses with orjson when it is installed.
+
+    orjson encodes dataclasses, dates and UUIDs natively. Without it, the stdlib encoder is used
+    with a default hook that encodes dataclasses from their ``__dict__`` instead of going through
+    ``dataclasses.asdict``. Like Flask's default provider, output is indented in debug mode and
+    compact otherwise.
+
+    Attributes:
+        compact (Optional[bool]): Force compact (True) or indented (False) output. None follows app.debug.
+        sort_keys (bool): Sort the keys of every object, as Flask's default provider does.
+    """
+
+    compact: Optional[bool] = None
+    sort_keys: bool = True
+
+    def _indent(self) -> bool:
+        """
+        Returns True if output should be indented.
+        """
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """
+        Serializes data as JSON.
+
+        Args:
+            obj (Any): The data to serialize.
+            **kwargs: Passed to ``json.dumps``. Passing any forces the stdlib encoder.
+
+        Returns:
+            str: The JSON document.
+        """
+        return self._dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def _dumps_bytes(self, obj: Any, **kwargs: Any) -> bytes:
+        """
+        Serializes data as UTF-8 encoded JSON.
+        """
+        if orjson is not None and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS
+            if self._indent():
+                option |= orjson.OPT_INDENT_2
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=_default, option=option)
+
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self._indent():
+            kwargs.setdefault('indent', 2)
+        else:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs).encode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """
+        Deserializes data from JSON.
+
+        Args:
+            s (Union[str, bytes]): The JSON document.
+            **kwargs: Passed to ``json.loads``. Passing any forces the stdlib decoder.
+
+        Returns:
+            Any: The deserialized data.
+        """
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """
+        Serializes the given arguments as JSON and returns a Response with the application/json
+        mimetype. Used by ``jsonify``.
+
+        Returns:
+            Response: The JSON response.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b'\n', mimetype='application/json')
+
+
+def install_json_provider(app: Flask) -> None:
+    """
+    Replaces the app's JSON provider with FastJSONProvider.
+
+    Args:
+        app (Flask): The Flask app.
+    """
+    app.json = FastJSONProvider(app)
+    logger.info("Using %s JSON encoder", "orjson" if orjson is not None else "stdlib")
@@ -0,0 +1,372 @@
+import bisect
+import logging
+import threading
+import time
+import weakref
+from typing import Callable, Iterator, Optional
+
+from flask import Flask, Response, g, request
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    """
+    Base class for metrics whose values are sharded per thread.
+
+    Every thread writes only to its own shard (a plain dict), so the request path never takes a
+    lock. Shards are merged when the metric is rendered; the lock is only taken the first time a
+    thread touches the metric and while collecting. When a thread goes away (the threaded server
+    starts one per request) its shard is folded into a base total, so the shards only ever cover
+    the live threads.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): The help text shown in the exposition.
+        labelnames (tuple[str, ...]): The names of the metric's labels.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._base: dict = {}  # the folded shards of threads that have finished
+        self._shards: dict[int, dict] = {}  # id(shard) -> shard, for the live threads
+        # Reentrant: a thread can be collected (and its shard retired) while the lock is held
+        self._shards_lock = threading.RLock()
+
+    def _shard(self) -> dict:
+        """
+        Returns the calling thread's shard, registering it on first use.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            self._local.shard = shard
+            weakref.finalize(threading.current_thread(), self._retire, shard)
+            return shard
+
+    def _retire(self, shard: dict) -> None:
+        """
+        Folds a finished thread's shard into the base total and forgets it.
+        """
+        with self._shards_lock:
+            self._fold(self._base, shard)
+            del self._shards[id(shard)]
+
+    def _fold(self, total: dict, shard: dict) -> dict:
+        """
+        Adds a shard's values into `total` and returns it.
+        """
+        raise NotImplementedError
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        """
+        Orders label values by labelnames.
+        """
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_string(self, key: LabelValues, extra: Optional[dict[str, str]] = None) -> str:
+        """
+        Formats label values in the Prometheus text format.
+        """
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _merged(self) -> dict:
+        """
+        Returns the base total merged with every live thread's shard.
+        """
+        with self._shards_lock:
+            total = self._fold({}, self._base)
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._fold(total, shard)
+        return total
+
+    def collect(self) -> Iterator[str]:
+        """
+        Yields the metric's samples in the Prometheus text format.
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Renders the metric (HELP, TYPE and samples) in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.collect())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing counter.
+    """
+
+    type = "counter"
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        """
+        Increments the counter for the given labels.
+
+        Args:
+            value (float): The amount to add. Defaults to 1.
+            **labels: A value for each of the counter's labelnames.
+        """
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def _fold(self, total: dict, shard: dict) -> dict:
+        for key, value in list(shard.items()):
+            total[key] = total.get(key, 0) + value
+        return total
+
+    def values(self) -> dict[LabelValues, float]:
+        """
+        Returns the current totals, merged across threads, keyed by label values.
+        """
+        return self._merged()
+
+    def collect(self) -> Iterator[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{self._label_string(key)} {_format(value)}"
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down (e.g. requests in flight).
+
+    Increments and decrements are sharded like a counter and summed at collection time. A gauge
+    can instead be backed by a callback returning the current value.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames)
+        self._function = function
+
+    def dec(self, value: float = 1, **labels: str) -> None:
+        """
+        Decrements the gauge for the given labels.
+        """
+        self.inc(-value, **labels)
+
+    def values(self) -> dict[LabelValues, float]:
+        if self._function is not None:
+            return {(): self._function()}
+        return super().values()
+
+
+class Histogram(_Metric):
+    """
+    A histogram of observed values with cumulative buckets, a sum and a count.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Records an observation for the given labels.
+
+        Args:
+            value (float): The observed value (e.g. a latency in seconds).
+            **labels: A value for each of the histogram's labelnames.
+        """
+        shard = self._shard()
+        key = self._key(labels)
+        series = shard.get(key)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _fold(self, total: dict, shard: dict) -> dict:
+        for key, series in list(shard.items()):
+            folded = total.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, value in enumerate(series):
+                folded[i] += value
+        return total
+
+    def collect(self) -> Iterator[str]:
+        for key, series in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{self._label_string(key, {'le': _format(bound)})} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{self._label_string(key, {'le': '+Inf'})} {cumulative}"
+            yield f"{self.name}_sum{self._label_string(key)} {_format(series[-1])}"
+            yield f"{self.name}_count{self._label_string(key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    A collection of metrics rendered together at /api/metrics.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Adds a metric to the registry, returning the already registered one if the name is taken.
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """
+        Creates (or returns the existing) counter with the given name.
+        """
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        """
+        Creates (or returns the existing) gauge with the given name.
+        """
+        return self.register(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Creates (or returns the existing) histogram with the given name.
+        """
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Renders every registered metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# The process-wide registry used by the request middleware and other modules
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Total HTTP requests by route, method and status code.", ("route", "method", "status"))
+ERRORS = REGISTRY.counter(
+    "http_request_errors_total", "Total HTTP requests that failed with a 5xx status.", ("route", "method"))
+LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds.", ("route", "method"))
+IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("route", "method"))
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a label value for the Prometheus text format.
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format(value: float) -> str:
+    """
+    Formats a sample value, dropping the fraction of whole numbers.
+    """
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+####################################################
+#
+# Request middleware
+#
+####################################################
+
+
+def _route() -> str:
+    """
+    Returns the matched route rule (e.g. /api/get-meal-by-id/<int:meal_id>) so path parameters
+    do not create a new series per value.
+    """
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+def _before_request() -> None:
+    """
+    Starts the request timer and counts the request as in flight.
+    """
+    g.metrics_start = time.perf_counter()
+    g.metrics_route = _route()
+    IN_FLIGHT.inc(route=g.metrics_route, method=request.method)
+
+def _after_request(response: Response) -> Response:
+    """
+    Remembers the response status for the teardown handler.
+    """
+    g.metrics_status = response.status_code
+    return response
+
+def _teardown_request(exc: Optional[BaseException]) -> None:
+    """
+    Records the request's count, latency and error status once it is fully served.
+    """
+    # Teardown also runs for unhandled exceptions, and only once a streamed body is finished
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    route = g.pop("metrics_route")
+    status = g.pop("metrics_status", 500 if exc is not None else 200)
+    method = request.method
+
+    IN_FLIGHT.dec(route=route, method=method)
+    REQUESTS.inc(route=route, method=method, status=str(status))
+    LATENCY.observe(elapsed, route=route, method=method)
+    if status >= 500:
+        ERRORS.inc(route=route, method=method)
+
+def metrics_endpoint() -> Response:
+    """
+    Route to expose the service's metrics in the Prometheus text format.
+
+    Returns:
+        text/plain response with every registered metric.
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+def install_metrics(app: Flask) -> None:
+    """
+    Registers the request metrics middleware and the /api/metrics route on an app.
+
+    Args:
+        app (Flask): The Flask app.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_endpoint, methods=['GET'])
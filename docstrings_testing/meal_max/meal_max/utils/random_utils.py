@@ -1,26 +1,89 @@
 import logging
+import os
+import random
+import re
+import threading
+from typing import Optional
+
 import requests
 
+# httpx is only needed by the asyncio app (asgi_app.py)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 from meal_max.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Overridable so load tests can point the service at a local stub instead of random.org
+RANDOM_ORG_URL = os.getenv(
+    "RANDOM_ORG_URL", "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+)
+# Numbers requested per call in get_random_batch (random.org serves at most 10,000 at once)
+RANDOM_ORG_MAX_BATCH = 10000
+
+
+class SeededRandom:
+    """
+    A reproducible stand-in for random.org: the same seed always yields the same numbers, with
+    the same two decimal places (0.00 to 0.99) random.org returns.
+
+    Attributes:
+        seed (int): The seed of the stream.
+        draws (int): How many numbers have been drawn so far.
+    """
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.draws = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> tuple[float, int]:
+        """
+        Draws the next number of the stream.
+
+        Returns:
+            tuple[float, int]: The number and its position in the stream (starting at 0).
+        """
+        with self._lock:
+            number = self._random.randrange(100) / 100
+            self.draws += 1
+            return number, self.draws - 1
+
+    def draw_many(self, count: int) -> list[float]:
+        """
+        Draws the next `count` numbers of the stream.
+
+        Args:
+            count (int): How many numbers to draw.
+
+        Returns:
+            list[float]: The numbers, in stream order.
+        """
+        with self._lock:
+            self.draws += count
+            return [self._random.randrange(100) / 100 for _ in range(count)]
+
+
 def get_random() -> float:
 
     """
     Fetches a random number from random.org
 
-    Returns: 
+    Returns:
         random_number (float): A random number
-    
+
     Raises:
         ValueError: If the response from random.org is invalid.
         RuntimeError: If the request to random.org times out.
         RuntimeError: If the request to random.org fails.
     """
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+    url = RANDOM_ORG_URL
 
     try:
         # Log the request to random.org
@@ -31,20 +94,116 @@ def get_random() -> float:
         # Check if the request was successful
         response.raise_for_status()
 
-        random_number_str = response.text.strip()
+        return _parse_random(response.text)
+
+    except requests.exceptions.Timeout:
+        logger.error("Request to random.org timed out.")
+        raise RuntimeError("Request to random.org timed out.")
+
+    except requests.exceptions.RequestException as e:
+        logger.error("Request to random.org failed: %s", e)
+        raise RuntimeError("Request to random.org failed: %s" % e)
+
+def get_random_batch(count: int) -> list[float]:
+
+    """
+    Fetches several random numbers from random.org, RANDOM_ORG_MAX_BATCH per request.
+
+    Args:
+        count (int): How many numbers to fetch.
+
+    Returns:
+        list[float]: `count` random numbers.
+
+    Raises:
+        ValueError: If the response from random.org is invalid or holds the wrong number of values.
+        RuntimeError: If the request to random.org times out or fails.
+    """
+    numbers: list[float] = []
+    while len(numbers) < count:
+        num = min(count - len(numbers), RANDOM_ORG_MAX_BATCH)
+        url = re.sub(r"num=\d+", f"num={num}", RANDOM_ORG_URL)
 
         try:
-            random_number = float(random_number_str)
+            logger.info("Fetching %d random numbers from %s", num, url)
+
+            response = requests.get(url, timeout=5)
+            response.raise_for_status()
+
+        except requests.exceptions.Timeout:
+            logger.error("Request to random.org timed out.")
+            raise RuntimeError("Request to random.org timed out.")
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+
+        try:
+            batch = [float(value) for value in response.text.split()]
         except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+            raise ValueError("Invalid response from random.org: %s" % response.text.strip()[:100])
+        if len(batch) != num:
+            raise ValueError("Expected %d numbers from random.org, got %d" % (num, len(batch)))
+        numbers.extend(batch)
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+    logger.info("Received %d random numbers", len(numbers))
+    return numbers
 
-    except requests.exceptions.Timeout:
+async def get_random_async(client: Optional["httpx.AsyncClient"] = None) -> float:
+
+    """
+    Fetches a random number from random.org without blocking the event loop.
+
+    Args:
+        client (Optional[httpx.AsyncClient]): A shared client to reuse pooled connections.
+                                              A short-lived client is created if not provided.
+
+    Returns:
+        random_number (float): A random number
+
+    Raises:
+        ValueError: If the response from random.org is invalid.
+        RuntimeError: If the request to random.org times out, fails, or httpx is not installed.
+    """
+    if httpx is None:
+        raise RuntimeError("httpx is required for get_random_async")
+
+    url = RANDOM_ORG_URL
+
+    try:
+        logger.info("Fetching random number from %s", url)
+
+        if client is None:
+            async with httpx.AsyncClient() as own_client:
+                response = await own_client.get(url, timeout=5)
+        else:
+            response = await client.get(url, timeout=5)
+
+        response.raise_for_status()
+
+        return _parse_random(response.text)
+
+    except httpx.TimeoutException:
         logger.error("Request to random.org timed out.")
         raise RuntimeError("Request to random.org timed out.")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+def _parse_random(text: str) -> float:
+    """
+    Parses the body of a random.org response.
+
+    Raises:
+        ValueError: If the response is not a valid float.
+    """
+    random_number_str = text.strip()
+
+    try:
+        random_number = float(random_number_str)
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % random_number_str)
+
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
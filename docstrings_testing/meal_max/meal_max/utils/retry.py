@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import logging
+import os
+import random
+import sqlite3
+import time
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from flask import Flask, g
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Retries of a write that failed with "database is locked" / "database is busy" (0 disables them)
+SQL_BUSY_RETRIES = int(os.getenv("SQL_BUSY_RETRIES", "5"))
+# Backoff before retry n is a random time up to min(SQL_BUSY_BACKOFF_MAX, SQL_BUSY_BACKOFF * 2**n) seconds
+SQL_BUSY_BACKOFF = float(os.getenv("SQL_BUSY_BACKOFF", "0.01"))
+SQL_BUSY_BACKOFF_MAX = float(os.getenv("SQL_BUSY_BACKOFF_MAX", "0.5"))
+# Seconds a request may take before retries stop (0 means no deadline)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "30"))
+
+RETRIES = REGISTRY.counter(
+    "sql_busy_retries_total", "Writes retried after a transient database lock error.", ("function",))
+FAILURES = REGISTRY.counter(
+    "sql_busy_failures_total", "Writes that still failed with a lock error, by reason: exhausted (out of "
+    "retries) or deadline (no time left before the request's deadline).", ("function", "reason"))
+
+# SQLite result codes for a database locked by another connection (extended codes share the low byte)
+_BUSY_CODES = (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+
+# Monotonic time by which the current request must finish, if it has a deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+# Set while a retrying function runs, so the writes it calls leave the retries to it
+_retrying: ContextVar[bool] = ContextVar("retrying", default=False)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def is_busy(error: BaseException) -> bool:
+    """
+    Checks whether an error is a transient lock error that is worth retrying.
+
+    Args:
+        error (BaseException): The error.
+
+    Returns:
+        bool: True for "database is locked" and "database is busy" errors.
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xff in _BUSY_CODES
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message or "table is locked" in message
+
+def remaining() -> Optional[float]:
+    """
+    Returns the seconds left before the current deadline.
+
+    Returns:
+        Optional[float]: The seconds left (negative once it has passed), or None without a deadline.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Sets a deadline for the code in the block; an earlier deadline already in effect is kept.
+
+    Args:
+        seconds (float): Seconds from now.
+    """
+    current = _deadline.get()
+    new = time.monotonic() + seconds
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def retry_on_busy(fn: F) -> F:
+    """
+    Retries a function that fails with a transient lock error (see is_busy).
+
+    Up to SQL_BUSY_RETRIES retries are made, each after a random backoff that doubles in range
+    every attempt (full jitter). It stops early, re-raising the error, when the backoff would run
+    past the current deadline; each attempt's connection also waits on the lock only for the time
+    left (see sql_utils.busy_timeout). Other errors are raised at once. The function must be safe
+    to re-run, i.e. use its own connection and commit only at the end.
+
+    Args:
+        fn (Callable): The function.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _retrying.get():
+            return fn(*args, **kwargs)
+        token = _retrying.set(True)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return fn(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_busy(e):
+                        raise
+                    if attempt >= SQL_BUSY_RETRIES:
+                        FAILURES.inc(function=name, reason='exhausted')
+                        logger.error("%s still locked out after %d retries", name, attempt)
+                        raise
+                    backoff = random.uniform(0, min(SQL_BUSY_BACKOFF_MAX, SQL_BUSY_BACKOFF * 2 ** attempt))
+                    left = remaining()
+                    if left is not None and left < backoff:
+                        FAILURES.inc(function=name, reason='deadline')
+                        logger.error("%s locked out with %.3fs left before the deadline", name, max(left, 0))
+                        raise
+                    attempt += 1
+                    RETRIES.inc(function=name)
+                    logger.warning("%s hit a locked database (%s); retry %d in %.3fs", name, e, attempt, backoff)
+                    time.sleep(backoff)
+        finally:
+            _retrying.reset(token)
+    return wrapper  # type: ignore[return-value]
+
+def _start_deadline() -> None:
+    token = _deadline.set(time.monotonic() + REQUEST_DEADLINE)
+    g.setdefault('_deadline_token', token)
+
+def _end_deadline(exc: Optional[BaseException]) -> None:
+    token = g.pop('_deadline_token', None)
+    if token is not None:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Streamed responses finish in a different context; it is discarded with them
+            pass
+
+def install_request_deadline(app: Flask) -> None:
+    """
+    Gives every request of an app a deadline of REQUEST_DEADLINE seconds for retry_on_busy.
+
+    Args:
+        app (Flask): The app to configure.
+    """
+    if REQUEST_DEADLINE > 0:
+        app.before_request(_start_deadline)
+        app.teardown_request(_end_deadline)
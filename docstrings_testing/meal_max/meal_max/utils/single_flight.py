@@ -0,0 +1,125 @@
+import functools
+import logging
+import os
+import threading
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds a coalesced call waits for the in-flight one before computing the result itself
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "10"))
+
+CALLS = REGISTRY.counter(
+    "single_flight_calls_total",
+    "Calls to single-flight functions by outcome: leader (ran the computation), coalesced (shared "
+    "an in-flight result) or timeout (gave up waiting and ran it again).", ("name", "outcome"))
+IN_FLIGHT = REGISTRY.gauge(
+    "single_flight_in_flight", "Computations currently running for single-flight functions.", ("name",))
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Call:
+    """
+    One in-flight computation and its outcome, shared by every caller with the same key.
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time; callers arriving while it runs wait for it
+    and share its result (or its exception).
+
+    Results are shared, not copied, so callers must not modify them.
+
+    Attributes:
+        name (str): The name used in logs and metrics.
+        timeout (float): Seconds a waiting caller waits before running the computation itself.
+    """
+
+    def __init__(self, name: str, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Returns fn(*args, **kwargs), joining a computation already running for `key` if there is one.
+
+        Args:
+            key (Hashable): Identifies calls that may share a result.
+            fn (Callable): The computation.
+            *args, **kwargs: Its arguments.
+
+        Returns:
+            Any: The computation's result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.timeout):
+                CALLS.inc(name=self.name, outcome='coalesced')
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            CALLS.inc(name=self.name, outcome='timeout')
+            logger.warning("Gave up after %.1fs waiting for %s %r; running it again", self.timeout, self.name, key)
+            return fn(*args, **kwargs)
+
+        CALLS.inc(name=self.name, outcome='leader')
+        IN_FLIGHT.inc(name=self.name)
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+            IN_FLIGHT.dec(name=self.name)
+
+
+def single_flight(name: str, version: Optional[Callable[[], Any]] = None,
+                  timeout: float = SINGLE_FLIGHT_TIMEOUT) -> Callable[[F], F]:
+    """
+    Coalesces concurrent calls to a function that have the same arguments (see SingleFlight).
+
+    Args:
+        name (str): The name used in logs and metrics.
+        version (Optional[Callable]): Returns the current data version. It is part of the key, so
+                                      calls made after a write never share a result computed before it.
+        timeout (float): Seconds a waiting caller waits before running the function itself.
+
+    Returns:
+        Callable: A decorator.
+    """
+    group = SingleFlight(name, timeout)
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (version() if version is not None else None, args, tuple(sorted(kwargs.items())))
+            return group.do(key, fn, *args, **kwargs)
+        wrapper.single_flight = group  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+    return decorate
@@ -1,9 +1,22 @@
+import atexit
+from collections import deque
 from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import inspect
 import logging
+import math
 import os
+import re
 import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional, TypeVar
+from urllib.parse import quote
+import weakref
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.retry import remaining
 
 
 logger = logging.getLogger(__name__)
@@ -13,10 +26,104 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# Opt-in statement tracing for connections opened with get_db_connection
+SQL_TRACE = os.getenv("SQL_TRACE", "false").lower() == "true"
+# Statements slower than this are logged with their query plan
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+# Number of recent timings kept per statement for the percentiles
+SQL_TRACE_SAMPLES = int(os.getenv("SQL_TRACE_SAMPLES", "1024"))
+
+# Keep the database in a shared-cache in-memory copy of DB_PATH, persisted with periodic snapshots
+SQL_IN_MEMORY = os.getenv("SQL_IN_MEMORY", "false").lower() == "true"
+# Seconds between snapshots of the in-memory database to DB_PATH (0 only snapshots at exit)
+SQL_SNAPSHOT_INTERVAL = float(os.getenv("SQL_SNAPSHOT_INTERVAL", "60"))
+# PRAGMA synchronous for snapshot files: OFF, NORMAL, FULL or EXTRA (FULL/EXTRA also sync the rename)
+SQL_SNAPSHOT_SYNCHRONOUS = os.getenv("SQL_SNAPSHOT_SYNCHRONOUS", "FULL").upper()
+# Pages copied per backup step; -1 copies everything in one step
+SQL_SNAPSHOT_PAGES = int(os.getenv("SQL_SNAPSHOT_PAGES", "-1"))
+
+# journal_mode set on write connections (e.g. WAL, so readers never wait for the writer); empty leaves it alone
+SQL_JOURNAL_MODE = os.getenv("SQL_JOURNAL_MODE", "").upper()
+# Idle read-only connections kept open for functions marked @read_only
+SQL_READ_POOL_SIZE = int(os.getenv("SQL_READ_POOL_SIZE", "8"))
+# Connections get_db_connection hands out at once, for reads and for writes (0 means no limit)
+SQL_MAX_READERS = int(os.getenv("SQL_MAX_READERS", "0"))
+SQL_MAX_WRITERS = int(os.getenv("SQL_MAX_WRITERS", "0"))
+# Seconds get_db_connection waits for a free slot before raising
+SQL_CONNECTION_WAIT = float(os.getenv("SQL_CONNECTION_WAIT", "30"))
+# Seconds a write connection waits for a lock held by another connection (sqlite3's default);
+# capped at the time left before the current deadline (see busy_timeout)
+SQL_BUSY_TIMEOUT = float(os.getenv("SQL_BUSY_TIMEOUT", "5"))
+
+
+def connect(**kwargs: Any) -> sqlite3.Connection:
+    """
+    Opens a connection to the configured database.
+
+    Connects to the DB_PATH file, or to its shared in-memory copy when SQL_IN_MEMORY is set
+    (loading it on first use).
+
+    Args:
+        **kwargs: Extra arguments for sqlite3.connect (e.g. factory, timeout).
+
+    Returns:
+        sqlite3.Connection: The new connection.
+    """
+    if SQL_IN_MEMORY:
+        start_in_memory_database()
+        return install_sql_functions(sqlite3.connect(memory_uri(), uri=True, **kwargs))
+    conn = install_sql_functions(sqlite3.connect(DB_PATH, **kwargs))
+    if SQL_JOURNAL_MODE:
+        conn.execute(f"PRAGMA journal_mode = {SQL_JOURNAL_MODE}").fetchone()
+    return conn
+
+@functools.lru_cache(maxsize=None)
+def _has_math_functions() -> bool:
+    """
+    Checks whether SQLite was built with its math functions (3.35+ with SQLITE_ENABLE_MATH_FUNCTIONS).
+    The result is cached, so the probe connection is only opened once per process.
+    """
+    probe = sqlite3.connect(":memory:")
+    try:
+        probe.execute("SELECT sqrt(4)").fetchone()
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+
+def _sqrt(value: Optional[float]) -> Optional[float]:
+    return None if value is None or value < 0 else math.sqrt(value)
+
+def install_sql_functions(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Registers sqrt on a connection when SQLite lacks its built-in math functions, so the meals
+    table's generated columns (see create_meal_table.sql) can be computed.
+
+    Args:
+        conn (sqlite3.Connection): The connection.
+
+    Returns:
+        sqlite3.Connection: The same connection.
+    """
+    if not _has_math_functions():
+        conn.create_function("sqrt", 1, _sqrt, deterministic=True)
+    return conn
+
+def busy_timeout() -> float:
+    """
+    Returns the busy timeout for a new write connection: SQL_BUSY_TIMEOUT, capped at the seconds
+    left before the current deadline (see retry.deadline), so a write never waits past it.
+
+    Returns:
+        float: The timeout in seconds.
+    """
+    left = remaining()
+    return SQL_BUSY_TIMEOUT if left is None else max(0.0, min(SQL_BUSY_TIMEOUT, left))
 
 def check_database_connection():
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         # This ensures the connection is actually active
         cursor.execute("SELECT 1;")
@@ -28,7 +135,7 @@ def check_database_connection():
 
 def check_table_exists(tablename: str):
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
         conn.close()
@@ -45,14 +152,708 @@ def check_table_exists(tablename: str):
 ###################################################
 @contextmanager
 def get_db_connection():
+    # Inside a @read_only function the connection is borrowed from the read pool
+    read_only_call = _read_only.get()
+    slots = _reader_slots if read_only_call else _writer_slots
+    slots.acquire(SQL_MAX_READERS if read_only_call else SQL_MAX_WRITERS)
     conn = None
+    failed = False
     try:
-        conn = sqlite3.connect(DB_PATH)
+        if read_only_call:
+            conn = _read_pool.acquire()
+        elif SQL_TRACE:
+            conn = connect(factory=TracingConnection, timeout=busy_timeout())
+        else:
+            conn = connect(timeout=busy_timeout())
         yield conn
     except sqlite3.Error as e:
+        failed = True
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
+        if conn and read_only_call:
+            _read_pool.release(conn, discard=failed)
+        elif conn:
             conn.close()
             logger.info("Database connection closed.")
+        slots.release()
+
+
+####################################################
+#
+# Statement tracing
+#
+####################################################
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalizes a statement so executions that differ only in literals share one entry.
+
+    Literals become ?, IN lists collapse to IN (?...) and whitespace is collapsed.
+
+    Args:
+        sql (str): The statement as executed.
+
+    Returns:
+        str: The normalized statement.
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";")
+
+
+class StatementStats:
+    """
+    Aggregated timings for one normalized statement.
+
+    Attributes:
+        count (int): Number of executions.
+        rows (int): Rows fetched (SELECT) or affected (DML) across all executions.
+        total_seconds (float): Total time spent executing and fetching.
+        samples (deque[float]): The most recent SQL_TRACE_SAMPLES durations in seconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.samples: deque = deque(maxlen=SQL_TRACE_SAMPLES)
+
+    def record(self, seconds: float, rows: int) -> None:
+        self.count += 1
+        self.rows += rows
+        self.total_seconds += seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Returns the count, rows and timings (in milliseconds) for this statement.
+        """
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': self.total_seconds * 1000,
+            'p50_ms': _percentile(ordered, 0.50) * 1000,
+            'p99_ms': _percentile(ordered, 0.99) * 1000,
+            'max_ms': (ordered[-1] if ordered else 0.0) * 1000
+        }
+
+
+_stats: dict[str, StatementStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+def _record_statement(sql: str, seconds: float, rows: int) -> None:
+    """
+    Adds one execution to the stats for its normalized statement.
+    """
+    key = normalize_sql(sql)
+    with _stats_lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats()
+        stats.record(seconds, rows)
+
+def get_sql_stats() -> dict[str, dict[str, Any]]:
+    """
+    Returns the traced statements and their stats, slowest total time first.
+
+    Returns:
+        dict[str, dict]: Normalized statement -> count, rows, total_ms, p50_ms, p99_ms and max_ms.
+    """
+    with _stats_lock:
+        summaries = {sql: stats.summary() for sql, stats in _stats.items()}
+    return dict(sorted(summaries.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+def reset_sql_stats() -> None:
+    """
+    Clears the collected statement stats.
+    """
+    with _stats_lock:
+        _stats.clear()
+
+
+class TracingCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement from execute() until the next execute() or close.
+
+    sqlite3 runs the first step of a SELECT in execute() and the rest in the fetch calls, so the
+    time spent in both is attributed to the statement, along with the number of rows fetched.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # [sql, parameters, seconds, rows] of the statement currently open on this cursor
+        self._current: Optional[list] = None
+
+    def _timed(self, fn, *args: Any):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if self._current is not None:
+                self._current[2] += time.perf_counter() - start
+
+    def _begin(self, sql: str, parameters: Any) -> None:
+        self._finish()
+        self._current = [sql, parameters, 0.0, 0]
+
+    def _finish(self) -> None:
+        """
+        Records the open statement, logging it with its query plan if it was slow.
+        """
+        current, self._current = self._current, None
+        if current is None:
+            return
+        sql, parameters, seconds, rows = current
+        _record_statement(sql, seconds, rows)
+        if seconds * 1000 >= SQL_SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms, %d rows): %s\n%s",
+                           seconds * 1000, rows, _WHITESPACE.sub(" ", sql).strip(),
+                           self._explain(sql, parameters))
+
+    def _explain(self, sql: str, parameters: Any) -> str:
+        """
+        Returns the EXPLAIN QUERY PLAN output for a statement, one plan step per line.
+        """
+        if parameters is None:
+            return "  (no plan for scripts or executemany)"
+        try:
+            # A plain cursor, so the EXPLAIN itself is not traced
+            plan = self.connection.cursor(sqlite3.Cursor).execute(
+                "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            return f"  (no plan: {e})"
+        return "\n".join(f"  {row[-1]}" for row in plan)
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TracingCursor":
+        self._begin(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        self._note_rowcount()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "TracingCursor":
+        self._begin(sql, None)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._note_rowcount()
+        return self
+
+    def executescript(self, sql_script: str) -> "TracingCursor":
+        self._begin(sql_script, None)
+        self._timed(super().executescript, sql_script)
+        return self
+
+    def _note_rowcount(self) -> None:
+        # rowcount is -1 for SELECT; rows are counted as they are fetched instead
+        if self._current is not None and self.rowcount > 0:
+            self._current[3] += self.rowcount
+
+    def fetchone(self) -> Any:
+        row = self._timed(super().fetchone)
+        if row is not None and self._current is not None:
+            self._current[3] += 1
+        return row
+
+    def fetchmany(self, *args: Any) -> list:
+        rows = self._timed(super().fetchmany, *args)
+        if self._current is not None:
+            self._current[3] += len(rows)
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self._timed(super().fetchall)
+        if self._current is not None:
+            self._current[3] += len(rows)
+        return rows
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        if getattr(self, "_current", None) is not None:
+            self._finish()
+
+
+class TracingConnection(sqlite3.Connection):
+    """
+    Connection whose cursors (including those made by conn.execute) are TracingCursors.
+
+    Open statements are recorded before the connection closes so their query plan can still be read.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._cursors: weakref.WeakSet = weakref.WeakSet()
+
+    def cursor(self, factory: type = TracingCursor) -> sqlite3.Cursor:
+        cursor = super().cursor(factory)
+        if isinstance(cursor, TracingCursor):
+            self._cursors.add(cursor)
+        return cursor
+
+    # The built-in shortcuts create their cursor internally, bypassing cursor()
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
+
+    def close(self) -> None:
+        for cursor in list(self._cursors):
+            cursor._finish()
+        super().close()
+
+
+####################################################
+#
+# Read-only connections
+#
+####################################################
+
+
+_read_only: ContextVar[bool] = ContextVar("sql_read_only", default=False)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def read_only(fn: F) -> F:
+    """
+    Marks a model function as read-only.
+
+    Connections the function opens with get_db_connection are borrowed from a pool of read-only
+    connections (opened with mode=ro and PRAGMA query_only) instead of being opened for writing,
+    and count against SQL_MAX_READERS instead of SQL_MAX_WRITERS. A returned generator keeps the
+    mark while it is being iterated.
+
+    Args:
+        fn (Callable): The function to mark.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _read_only.set(True)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+        if inspect.isgenerator(result):
+            return _iter_read_only(result)
+        return result
+    return wrapper  # type: ignore[return-value]
+
+def _iter_read_only(gen: Iterator[Any]) -> Iterator[Any]:
+    """
+    Iterates a generator with the read-only mark set only while the generator runs.
+    """
+    try:
+        while True:
+            token = _read_only.set(True)
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            finally:
+                _read_only.reset(token)
+            yield item
+    finally:
+        gen.close()
+
+
+class ReadOnlyConnection(sqlite3.Connection):
+    """
+    Pooled read-only connection that closes the cursors left open by a borrower when it is returned,
+    so no unfinished statement keeps an old read snapshot alive for the next borrower.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._open_cursors: weakref.WeakSet = weakref.WeakSet()
+        self.pool_key: Optional[tuple] = None
+
+    def cursor(self, *args: Any, **kwargs: Any) -> sqlite3.Cursor:
+        cursor = super().cursor(*args, **kwargs)
+        self._open_cursors.add(cursor)
+        return cursor
+
+    # The built-in shortcuts create their cursor internally, bypassing cursor()
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
+
+    def close_cursors(self) -> None:
+        for cursor in list(self._open_cursors):
+            cursor.close()
+
+
+class TracingReadOnlyConnection(ReadOnlyConnection, TracingConnection):
+    """
+    ReadOnlyConnection whose cursors are TracingCursors (used when SQL_TRACE is set).
+    """
+
+
+class _ConnectionSlots:
+    """
+    Counts the connections in use and blocks new ones while a limit is reached.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, limit: int) -> None:
+        with self._cond:
+            if not self._cond.wait_for(lambda: limit <= 0 or self.active < limit, timeout=SQL_CONNECTION_WAIT):
+                raise sqlite3.OperationalError(
+                    f"Timed out after {SQL_CONNECTION_WAIT}s waiting for one of {limit} {self.kind} connections")
+            self.active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class _ReadPool:
+    """
+    Idle read-only connections to the current database, reused by @read_only functions.
+
+    Connections are keyed on the database they point at (DB_PATH, in-memory mode, tracing), so
+    idle ones are dropped when any of those change.
+    """
+
+    def __init__(self):
+        self._idle: list[ReadOnlyConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> ReadOnlyConnection:
+        key = (DB_PATH, SQL_IN_MEMORY, SQL_TRACE)
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if conn.pool_key == key:
+                    return conn
+                conn.close()
+        return _connect_read_only(key)
+
+    def release(self, conn: ReadOnlyConnection, discard: bool = False) -> None:
+        conn.close_cursors()
+        with self._lock:
+            if not discard and conn.pool_key == (DB_PATH, SQL_IN_MEMORY, SQL_TRACE) \
+                    and len(self._idle) < SQL_READ_POOL_SIZE:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def _connect_read_only(key: tuple) -> ReadOnlyConnection:
+    """
+    Opens a connection that cannot write: mode=ro on the database file, and PRAGMA query_only
+    (the only option for the shared in-memory database).
+    """
+    factory = TracingReadOnlyConnection if SQL_TRACE else ReadOnlyConnection
+    if SQL_IN_MEMORY:
+        start_in_memory_database()
+        conn = sqlite3.connect(memory_uri(), uri=True, factory=factory, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(DB_PATH))}?mode=ro", uri=True, factory=factory,
+                               check_same_thread=False)
+    install_sql_functions(conn)
+    conn.execute("PRAGMA query_only = ON").close()
+    conn.pool_key = key
+    logger.info("Opened a read-only connection.")
+    return conn
+
+def close_read_connections() -> None:
+    """
+    Closes the idle read-only connections. Connections that are in use are closed when returned.
+    """
+    _read_pool.close()
+
+def get_connection_stats() -> dict[str, Any]:
+    """
+    Reports the connections handed out by get_db_connection.
+
+    Returns:
+        dict: readers and writers (each with active and limit, 0 meaning no limit) and the number
+              of idle connections in the read pool.
+    """
+    return {
+        'readers': {'active': _reader_slots.active, 'limit': SQL_MAX_READERS},
+        'writers': {'active': _writer_slots.active, 'limit': SQL_MAX_WRITERS},
+        'idle_read_connections': _read_pool.idle()
+    }
+
+
+_read_pool = _ReadPool()
+_reader_slots = _ConnectionSlots("read")
+_writer_slots = _ConnectionSlots("write")
+
+
+####################################################
+#
+# Baselines for fast resets
+#
+####################################################
+
+
+# name -> private in-memory database holding the baseline
+_baselines: dict[str, sqlite3.Connection] = {}
+_baselines_lock = threading.Lock()
+
+
+def snapshot_baseline(name: str, source: Optional[str] = None) -> None:
+    """
+    Copies a database into a named in-memory baseline that restore_baseline can bring back.
+
+    Args:
+        name (str): The baseline name (e.g. a seeded fixture).
+        source (Optional[str]): Path of a database file to copy. Defaults to the current database.
+
+    Raises:
+        sqlite3.Error: If the source cannot be read.
+    """
+    baseline = sqlite3.connect(":memory:", check_same_thread=False)
+    conn = sqlite3.connect(source) if source is not None else connect()
+    try:
+        conn.backup(baseline)
+    finally:
+        conn.close()
+    _store_baseline(name, baseline)
+
+def snapshot_baseline_from_script(name: str, script: str) -> None:
+    """
+    Builds a named baseline by running a SQL script (e.g. the create table script) once.
+
+    Args:
+        name (str): The baseline name.
+        script (str): The SQL script to run on an empty database.
+
+    Raises:
+        sqlite3.Error: If the script fails.
+    """
+    baseline = install_sql_functions(sqlite3.connect(":memory:", check_same_thread=False))
+    baseline.executescript(script)
+    _store_baseline(name, baseline)
+
+def _store_baseline(name: str, baseline: sqlite3.Connection) -> None:
+    with _baselines_lock:
+        previous = _baselines.get(name)
+        _baselines[name] = baseline
+    if previous is not None:
+        previous.close()
+    logger.info("Baseline '%s' saved", name)
+
+def has_baseline(name: str) -> bool:
+    """
+    Returns whether a baseline with this name has been saved.
+    """
+    return name in _baselines
+
+def drop_baseline(name: str) -> None:
+    """
+    Discards a saved baseline. Unknown names are ignored.
+    """
+    with _baselines_lock:
+        baseline = _baselines.pop(name, None)
+    if baseline is not None:
+        baseline.close()
+
+def restore_baseline(name: str) -> None:
+    """
+    Replaces the current database with a saved baseline using the backup API.
+
+    The cost depends only on the size of the baseline, not on the schema or the data being
+    replaced, and every table, index and trigger is restored exactly as it was snapshotted.
+
+    Args:
+        name (str): The baseline to restore.
+
+    Raises:
+        ValueError: If no baseline with this name has been saved.
+        sqlite3.Error: If the database cannot be written.
+    """
+    with _baselines_lock:
+        baseline = _baselines.get(name)
+        if baseline is None:
+            raise ValueError(f"No baseline named '{name}'")
+
+        start = time.perf_counter()
+        with get_db_connection() as conn:
+            baseline.backup(conn)
+    logger.info("Baseline '%s' restored in %.2f ms", name, (time.perf_counter() - start) * 1000)
+
+####################################################
+#
+# In-memory mode
+#
+####################################################
+
+
+_memory_lock = threading.Lock()
+# Connection that keeps the shared in-memory database alive, and the DB_PATH it was loaded from
+_memory_anchor: Optional[sqlite3.Connection] = None
+_memory_path: Optional[str] = None
+_snapshot_thread: Optional[threading.Thread] = None
+_snapshot_stop = threading.Event()
+
+
+def memory_uri(path: Optional[str] = None) -> str:
+    """
+    Returns the URI of the shared-cache in-memory database that mirrors a database file.
+
+    Args:
+        path (Optional[str]): The database file. Defaults to DB_PATH.
+
+    Returns:
+        str: A file: URI naming one in-memory database per file path.
+    """
+    name = re.sub(r"\W", "_", os.path.abspath(path or DB_PATH))
+    return f"file:{name}?mode=memory&cache=shared"
+
+def start_in_memory_database() -> None:
+    """
+    Loads DB_PATH into the shared in-memory database and starts the periodic snapshots.
+
+    Called by connect() on first use when SQL_IN_MEMORY is set; calling it again is a no-op unless
+    DB_PATH has changed. A missing DB_PATH file starts an empty database.
+
+    Raises:
+        sqlite3.Error: If the database file cannot be read.
+    """
+    global _memory_anchor, _memory_path, _snapshot_thread
+    with _memory_lock:
+        if _memory_anchor is not None and _memory_path == DB_PATH:
+            return
+        if _memory_anchor is not None:
+            _stop_snapshots()
+            _memory_anchor.close()
+
+        anchor = sqlite3.connect(memory_uri(), uri=True, check_same_thread=False)
+        if os.path.exists(DB_PATH):
+            start = time.perf_counter()
+            disk = sqlite3.connect(DB_PATH)
+            try:
+                disk.backup(anchor)
+            finally:
+                disk.close()
+            logger.info("Loaded %s into memory in %.1f ms", DB_PATH, (time.perf_counter() - start) * 1000)
+        else:
+            logger.warning("%s does not exist; starting with an empty in-memory database", DB_PATH)
+        _memory_anchor, _memory_path = anchor, DB_PATH
+
+        if SQL_SNAPSHOT_INTERVAL > 0:
+            _snapshot_stop.clear()
+            _snapshot_thread = threading.Thread(target=_snapshot_loop, name="sqlite-snapshot", daemon=True)
+            _snapshot_thread.start()
+
+def stop_in_memory_database(snapshot: bool = True) -> None:
+    """
+    Stops the periodic snapshots, optionally writes a final one, and drops the in-memory database.
+
+    Args:
+        snapshot (bool): Whether to persist the in-memory database to DB_PATH first.
+    """
+    global _memory_anchor, _memory_path
+    with _memory_lock:
+        if _memory_anchor is None:
+            return
+        _stop_snapshots()
+        if snapshot:
+            snapshot_to_disk()
+        # Pooled readers would otherwise keep the in-memory database alive
+        close_read_connections()
+        _memory_anchor.close()
+        _memory_anchor, _memory_path = None, None
+
+def _stop_snapshots() -> None:
+    global _snapshot_thread
+    _snapshot_stop.set()
+    if _snapshot_thread is not None and _snapshot_thread is not threading.current_thread():
+        _snapshot_thread.join()
+    _snapshot_thread = None
+
+def _snapshot_loop() -> None:
+    while not _snapshot_stop.wait(SQL_SNAPSHOT_INTERVAL):
+        try:
+            snapshot_to_disk()
+        except (sqlite3.Error, OSError) as e:
+            logger.error("Snapshot of the in-memory database failed: %s", str(e))
+
+def snapshot_to_disk() -> None:
+    """
+    Persists the in-memory database to DB_PATH with the online backup API.
+
+    The backup is written to a temporary file next to DB_PATH, synced according to
+    SQL_SNAPSHOT_SYNCHRONOUS and then renamed over DB_PATH, so a crash mid-snapshot leaves the
+    previous snapshot intact. Readers are never blocked; with SQL_SNAPSHOT_PAGES > 0 the copy is
+    done in steps so writers only wait for one step at a time.
+
+    Raises:
+        sqlite3.Error: If the backup fails.
+        OSError: If the snapshot file cannot be written or renamed.
+    """
+    path = _memory_path or DB_PATH
+    tmp_path = f"{path}.snapshot"
+    start = time.perf_counter()
+
+    source = sqlite3.connect(memory_uri(path), uri=True)
+    target = sqlite3.connect(tmp_path)
+    try:
+        target.execute(f"PRAGMA synchronous = {SQL_SNAPSHOT_SYNCHRONOUS}")
+        source.backup(target, pages=SQL_SNAPSHOT_PAGES, sleep=0.001)
+    finally:
+        target.close()
+        source.close()
+
+    os.replace(tmp_path, path)
+    if SQL_SNAPSHOT_SYNCHRONOUS in ("FULL", "EXTRA"):
+        # Make the rename itself durable
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    logger.info("Snapshot of the in-memory database written to %s in %.1f ms",
+                path, (time.perf_counter() - start) * 1000)
+
+@atexit.register
+def _final_snapshot() -> None:
+    if _memory_anchor is not None:
+        stop_in_memory_database(snapshot=True)
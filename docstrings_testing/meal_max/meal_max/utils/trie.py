@@ -0,0 +1,166 @@
+import threading
+from typing import Iterator, Optional
+
+
+class _Node:
+    """
+    A trie node. `label` is the edge from the parent; `entries` maps ids to the names ending here.
+    """
+    __slots__ = ('label', 'children', 'entries')
+
+    def __init__(self, label: str):
+        self.label = label
+        self.children: dict[str, "_Node"] = {}
+        self.entries: dict[int, str] = {}
+
+
+class RadixTrie:
+    """
+    A compressed (radix) trie mapping names to ids, for case-insensitive prefix completion.
+
+    Chains of single-child nodes are merged into one edge, so the trie has at most one node per
+    name plus one per branching point. Completions come back in alphabetical order and the walk
+    stops after `limit` of them, so a lookup only touches the prefix path and the nodes it returns.
+    All methods are safe to call from several threads.
+    """
+
+    def __init__(self):
+        self._root = _Node("")
+        self._names: dict[int, str] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, row_id: int) -> bool:
+        return row_id in self._names
+
+    def insert(self, row_id: int, name: str) -> None:
+        """
+        Adds a name, replacing the name previously stored for `row_id`.
+
+        Args:
+            row_id (int): The id the name belongs to.
+            name (str): The name to index.
+        """
+        with self._lock:
+            if row_id in self._names:
+                self.remove(row_id)
+            self._names[row_id] = name
+
+            node = self._root
+            key = name.casefold()
+            while key:
+                child = node.children.get(key[0])
+                if child is None:
+                    child = node.children[key[0]] = _Node(key)
+                    node = child
+                    break
+                common = _common_prefix_length(child.label, key)
+                if common < len(child.label):
+                    # Split the edge at the point where the new key diverges
+                    middle = _Node(child.label[:common])
+                    child.label = child.label[common:]
+                    middle.children[child.label[0]] = child
+                    node.children[key[0]] = middle
+                    child = middle
+                node = child
+                key = key[common:]
+            node.entries[row_id] = name
+
+    def remove(self, row_id: int) -> bool:
+        """
+        Removes the name stored for `row_id`.
+
+        Args:
+            row_id (int): The id to remove.
+
+        Returns:
+            bool: True if the id was indexed, False otherwise.
+        """
+        with self._lock:
+            name = self._names.pop(row_id, None)
+            if name is None:
+                return False
+
+            path = [self._root]
+            key = name.casefold()
+            while key:
+                child = path[-1].children[key[0]]
+                path.append(child)
+                key = key[len(child.label):]
+            del path[-1].entries[row_id]
+
+            # Drop nodes left empty and merge nodes left with a single child into it
+            for depth in range(len(path) - 1, 0, -1):
+                node, parent = path[depth], path[depth - 1]
+                if node.entries:
+                    break
+                if not node.children:
+                    del parent.children[node.label[0]]
+                elif len(node.children) == 1:
+                    (child,) = node.children.values()
+                    child.label = node.label + child.label
+                    parent.children[child.label[0]] = child
+                    break
+                else:
+                    break
+            return True
+
+    def complete(self, prefix: str, limit: int) -> list[tuple[int, str]]:
+        """
+        Finds the names starting with `prefix`, ignoring case.
+
+        Args:
+            prefix (str): The prefix to complete.
+            limit (int): The maximum number of completions.
+
+        Returns:
+            list[tuple[int, str]]: Up to `limit` (id, name) pairs in alphabetical order.
+        """
+        with self._lock:
+            node = self._find(prefix.casefold())
+            if node is None or limit <= 0:
+                return []
+            completions = []
+            for entry in self._walk(node):
+                completions.append(entry)
+                if len(completions) == limit:
+                    break
+            return completions
+
+    def _find(self, key: str) -> Optional[_Node]:
+        """
+        Returns the highest node whose path starts with `key`, or None if no name does.
+        """
+        node = self._root
+        while key:
+            child = node.children.get(key[0])
+            if child is None:
+                return None
+            if key.startswith(child.label):
+                key = key[len(child.label):]
+            elif child.label.startswith(key):
+                key = ""
+            else:
+                return None
+            node = child
+        return node
+
+    def _walk(self, node: _Node) -> Iterator[tuple[int, str]]:
+        """
+        Yields the entries under `node` in alphabetical order (a name comes before its extensions).
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from sorted(node.entries.items(), key=lambda entry: entry[1])
+            stack.extend(node.children[first] for first in sorted(node.children, reverse=True))
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
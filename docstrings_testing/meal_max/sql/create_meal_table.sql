@@ -1,4 +1,9 @@
+PRAGMA auto_vacuum = INCREMENTAL;
 DROP TABLE IF EXISTS meals;
+DROP TABLE IF EXISTS meals_archive;
+DROP TABLE IF EXISTS season_stats;
+DROP TABLE IF EXISTS seasons;
+DROP TABLE IF EXISTS data_version;
 CREATE TABLE meals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     meal TEXT NOT NULL UNIQUE,
@@ -7,5 +12,71 @@ CREATE TABLE meals (
     difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
-    deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+    deleted BOOLEAN DEFAULT FALSE,
+    deleted_at TIMESTAMP,
+    -- Leaderboard sort keys: the win fraction and the lower bound of its 95% Wilson score interval
+    win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles END) VIRTUAL,
+    wilson REAL GENERATED ALWAYS AS ((win_pct + 1.9208 / battles - 1.96 * sqrt((win_pct * (1 - win_pct) + 0.9604 / battles) / battles)) / (1 + 3.8416 / battles)) VIRTUAL
+);
+-- One index per leaderboard sort key, over the rows the leaderboard shows
+CREATE INDEX meals_leaderboard_wins ON meals (wins DESC) WHERE deleted = false AND battles > 0;
+CREATE INDEX meals_leaderboard_battles ON meals (battles DESC) WHERE deleted = false AND battles > 0;
+CREATE INDEX meals_leaderboard_win_pct ON meals (win_pct DESC) WHERE deleted = false AND battles > 0;
+CREATE INDEX meals_leaderboard_wilson ON meals (wilson DESC) WHERE deleted = false AND battles > 0;
+CREATE TRIGGER meals_deleted_at AFTER UPDATE OF deleted ON meals
+WHEN NEW.deleted AND NOT OLD.deleted
+BEGIN
+    UPDATE meals SET deleted_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+-- Bumped by every write to meals, for cache validators; a new generation each time the table is recreated
+CREATE TABLE data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+INSERT INTO data_version VALUES (1, lower(hex(randomblob(8))), 0);
+CREATE TRIGGER meals_data_version_insert AFTER INSERT ON meals
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+CREATE TRIGGER meals_data_version_update AFTER UPDATE ON meals
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+CREATE TRIGGER meals_data_version_delete AFTER DELETE ON meals
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+CREATE TABLE meals_archive (
+    id INTEGER PRIMARY KEY,
+    meal TEXT,
+    cuisine TEXT,
+    price REAL,
+    difficulty TEXT,
+    battles INTEGER,
+    wins INTEGER,
+    deleted BOOLEAN,
+    deleted_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE seasons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ended_at TIMESTAMP,
+    rollover_cursor INTEGER DEFAULT 0,
+    completed_at TIMESTAMP
+);
+INSERT INTO seasons DEFAULT VALUES;
+CREATE TABLE season_stats (
+    season INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    meal TEXT NOT NULL,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL,
+    difficulty TEXT,
+    battles INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles END) VIRTUAL,
+    wilson REAL GENERATED ALWAYS AS ((win_pct + 1.9208 / battles - 1.96 * sqrt((win_pct * (1 - win_pct) + 0.9604 / battles) / battles)) / (1 + 3.8416 / battles)) VIRTUAL,
+    PRIMARY KEY (season, meal_id)
+);
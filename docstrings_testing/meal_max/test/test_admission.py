@@ -0,0 +1,161 @@
+import threading
+
+from flask import Flask
+import pytest
+
+from meal_max.utils import admission
+from meal_max.utils.admission import (
+    AdmissionController,
+    REJECTIONS,
+    TokenBuckets,
+    WriterGate,
+    admit_writes,
+    hold_writer_slot,
+    limit_write_rate,
+    writer_slot,
+    WriterSlotUnavailable
+)
+
+
+@pytest.fixture()
+def app():
+    """Fixture to provide an app with one write route whose body can be held open."""
+    app = Flask(__name__)
+    app.extensions['write_admission'] = AdmissionController(TokenBuckets(rate=1, burst=2),
+                                                            WriterGate(limit=1, max_queue=1, max_wait=0.05))
+    app.release = threading.Event()
+    app.entered = threading.Event()
+
+    @app.route('/write', methods=['POST'])
+    @admit_writes
+    def write():
+        app.entered.set()
+        app.release.wait(5)
+        return {'status': 'success'}
+
+    return app
+
+
+def test_token_bucket_refills(mocker):
+    """Test that a client gets `burst` requests at once, then one per 1/rate seconds."""
+    now = mocker.patch("meal_max.utils.admission.time.monotonic", return_value=100.0)
+    buckets = TokenBuckets(rate=2, burst=3)
+
+    assert [buckets.take("a") for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a") == pytest.approx(0.5)
+    assert buckets.take("b") == 0
+
+    now.return_value = 100.5
+    assert buckets.take("a") == 0
+
+def test_token_buckets_prune_full_buckets(mocker):
+    """Test that idle clients are dropped once max_clients is reached."""
+    now = mocker.patch("meal_max.utils.admission.time.monotonic", return_value=100.0)
+    buckets = TokenBuckets(rate=1, burst=1, max_clients=2)
+    buckets.take("a")
+    buckets.take("b")
+
+    now.return_value = 102.0
+    buckets.take("c")
+
+    assert set(buckets._buckets) == {"c"}
+
+def test_rate_limited_client_gets_retry_after(app):
+    """Test that a client over its rate gets 429 with Retry-After without waiting for a slot."""
+    app.release.set()
+    client = app.test_client()
+    before = REJECTIONS.values().get(('rate_limited',), 0)
+
+    statuses = [client.post('/write').status_code for _ in range(3)]
+    response = client.post('/write')
+
+    assert statuses == [200, 200, 429]
+    assert response.headers['Retry-After'] == '1'
+    assert REJECTIONS.values()[('rate_limited',)] == before + 2
+
+def test_writer_queue_full_and_timeout(app, mocker):
+    """Test that requests beyond the writer limit wait, then time out, or are rejected when the queue is full."""
+    mocker.patch.object(app.extensions['write_admission'].buckets, 'rate', 0)
+    gate = app.extensions['write_admission'].gate
+    holder = threading.Thread(target=lambda: app.test_client().post('/write'))
+    holder.start()
+    app.entered.wait(5)
+
+    gate.waiting = gate.max_queue
+    queue_full = app.test_client().post('/write')
+    gate.waiting = 0
+    timed_out = app.test_client().post('/write')
+    app.release.set()
+    holder.join()
+
+    assert queue_full.status_code == 429
+    assert "queue_full" in queue_full.get_json()['error']
+    assert timed_out.status_code == 429
+    assert "timeout" in timed_out.get_json()['error']
+    assert app.test_client().post('/write').status_code == 200
+    assert gate.active == 0
+
+def test_writer_slot_only_around_the_write(app):
+    """Test that a rate-limited route can do slow work before taking a writer slot for its write."""
+    gate = app.extensions['write_admission'].gate
+
+    @hold_writer_slot
+    def write_stats():
+        return {'active': gate.active}
+
+    @app.route('/battle', methods=['POST'])
+    @limit_write_rate
+    def battle():
+        app.entered.set()
+        app.release.wait(5)
+        return write_stats()
+
+    responses = []
+    holder = threading.Thread(target=lambda: responses.append(app.test_client().post('/battle')))
+    holder.start()
+    app.entered.wait(5)
+    active_while_drawing = gate.active
+    app.release.set()
+    holder.join()
+
+    assert active_while_drawing == 0
+    assert responses[0].get_json() == {'active': 1}
+    assert gate.active == 0
+
+def test_writer_slot_per_step(app):
+    """Test that a multi-step write holds a writer slot only for each step, and raises when none is free."""
+    gate = app.extensions['write_admission'].gate
+    held = []
+
+    with app.test_request_context('/migrate', method='POST'):
+        for _ in range(2):
+            with writer_slot():
+                held.append(gate.active)
+            held.append(gate.active)
+
+        gate.active = gate.limit
+        with pytest.raises(WriterSlotUnavailable) as rejected:
+            with writer_slot():
+                pass
+        gate.active = 0
+
+    assert held == [1, 0, 1, 0]
+    assert rejected.value.reason == 'timeout'
+
+def test_disabled_without_controller(app, mocker):
+    """Test that routes run unchanged when the app has no admission controller."""
+    app.release.set()
+    del app.extensions['write_admission']
+
+    assert all(app.test_client().post('/write').status_code == 200 for _ in range(10))
+
+def test_install_admission_control(mocker):
+    """Test that ADMISSION_CONTROL decides whether an app gets a controller."""
+    app = Flask(__name__)
+    mocker.patch.object(admission, "ADMISSION_CONTROL", False)
+    admission.install_admission_control(app)
+    assert 'write_admission' not in app.extensions
+
+    mocker.patch.object(admission, "ADMISSION_CONTROL", True)
+    admission.install_admission_control(app)
+    assert isinstance(app.extensions['write_admission'], AdmissionController)
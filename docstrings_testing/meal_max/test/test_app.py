@@ -0,0 +1,324 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from app import create_app
+from meal_max.models import kitchen_model
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture()
+def client():
+    """Fixture to provide a test client for a fresh app."""
+    return create_app().test_client()
+
+@pytest.fixture()
+def meals_db(tmp_path, mocker):
+    """Fixture to provide an empty meals database and a name index that is rebuilt for it."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")) as fh:
+        with sql_utils.get_db_connection() as conn:
+            conn.executescript(fh.read())
+    kitchen_model._reset_name_index()
+    yield
+    kitchen_model._reset_name_index()
+
+
+def test_create_app_registers_routes(client):
+    """Test that the factory registers the API routes and the metrics endpoint."""
+    assert client.get('/api/health').get_json() == {'status': 'healthy'}
+    assert client.get('/api/metrics').status_code == 200
+
+def test_battle_model_created_on_first_use():
+    """Test that each app gets its own BattleModel, created when a route first needs it."""
+    app = create_app()
+    assert 'battle_model' not in app.extensions
+
+    response = app.test_client().get('/api/get-combatants')
+
+    assert response.status_code == 200
+    assert response.get_json()['combatants'] == []
+    assert 'battle_model' in app.extensions
+    assert 'battle_model' not in create_app().extensions
+
+def test_startup_defers_http_clients():
+    """Test that importing the app and calling create_app does not import the random.org clients."""
+    probe = (
+        "import sys, app; app.create_app(); "
+        "print(sorted(m for m in ('meal_max.models.battle_model', 'requests', 'httpx') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=os.path.join(os.path.dirname(__file__), ".."),
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+def test_autocomplete_follows_creates_and_deletes(meals_db):
+    """Test that the autocomplete index is built at startup and kept in sync with writes."""
+    kitchen_model.create_meal("Pasta", "Italian", 10.0, "LOW")
+    client = create_app().test_client()
+    kitchen_model.create_meal("Pastrami", "Deli", 12.0, "MED")
+    kitchen_model.create_meal("Pho", "Vietnamese", 11.0, "MED")
+    kitchen_model.delete_meal(1)
+
+    response = client.get('/api/meals/autocomplete?prefix=pa')
+
+    assert response.get_json()['meals'] == [{'id': 2, 'meal': 'Pastrami'}]
+    assert client.get('/api/meals/autocomplete?prefix=p&limit=0').status_code == 400
+
+def test_get_meals_by_ids(meals_db, mocker):
+    """Test that a multi-get reports found, deleted and missing meals in the order requested."""
+    mocker.patch.object(kitchen_model, "MAX_IDS_PER_QUERY", 2)
+    for name in ("Pasta", "Tacos", "Pho"):
+        kitchen_model.create_meal(name, "Any", 10.0, "LOW")
+    kitchen_model.delete_meal(2)
+    client = create_app().test_client()
+
+    response = client.get('/api/get-meals?ids=3,2,99,1,3')
+
+    meals = response.get_json()['meals']
+    assert [(meal['id'], meal['status']) for meal in meals] == [(3, 'found'), (2, 'deleted'), (99, 'missing'),
+                                                                 (1, 'found')]
+    assert meals[0]['meal']['meal'] == 'Pho'
+    assert client.get('/api/get-meals?ids=1,x').status_code == 400
+    assert client.get('/api/get-meals').status_code == 400
+
+def test_leaderboard_export(meals_db):
+    """Test that the leaderboard export streams the same rows as CSV and NDJSON."""
+    for name in ("Pasta", "Tacos"):
+        kitchen_model.create_meal(name, "Any", 10.0, "LOW")
+    kitchen_model.update_meal_stats(1, "loss")
+    kitchen_model.update_meal_stats(2, "win")
+    client = create_app().test_client()
+
+    ndjson = client.get('/api/leaderboard/export?format=ndjson&sort=win_pct').get_data(as_text=True)
+    exported = client.get('/api/leaderboard/export?sort=win_pct')
+    rows = list(csv.DictReader(io.StringIO(exported.get_data(as_text=True))))
+
+    assert [json.loads(line)['meal'] for line in ndjson.splitlines()] == ['Tacos', 'Pasta']
+    assert exported.headers['Content-Disposition'] == 'attachment; filename=leaderboard.csv'
+    assert [(row['meal'], row['win_pct']) for row in rows] == [('Tacos', '100.0'), ('Pasta', '0.0')]
+    assert client.get('/api/leaderboard/export?format=xml').status_code == 400
+    assert client.get('/api/leaderboard/export?sort=price').status_code == 400
+
+def test_etag_follows_database_writes(meals_db):
+    """Test that ETags are weak and change with writes made outside this process and with fixture restores."""
+    kitchen_model.create_meal("Pasta", "Any", 10.0, "LOW")
+    kitchen_model.register_fixture("one_meal")
+    client = create_app().test_client()
+
+    # The leaderboard is streamed, so each body is read before the next request
+    first = client.get('/api/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    first.get_data()
+    etag = first.headers['ETag']
+    cached = client.get('/api/leaderboard', headers={'If-None-Match': etag})
+    conn = sqlite3.connect(sql_utils.DB_PATH)
+    conn.execute("UPDATE meals SET battles = 1, wins = 1 WHERE id = 1")
+    conn.commit()
+    conn.close()
+    written = client.get('/api/leaderboard', headers={'If-None-Match': etag})
+    written.get_data()
+    kitchen_model.restore_fixture("one_meal")
+    restored = client.get('/api/leaderboard')
+    restored.get_data()
+
+    assert etag.startswith('W/"')
+    assert cached.status_code == 304
+    assert written.status_code == 200
+    assert len({etag, written.headers['ETag'], restored.headers['ETag']}) == 3
+
+def test_leaderboard_shares_only_short_leaderboards(meals_db, mocker):
+    """Test that the leaderboard reads the data version once and streams past LEADERBOARD_SHARED_ROWS."""
+    for name in ("Pasta", "Tacos", "Pho"):
+        kitchen_model.create_meal(name, "Any", 10.0, "LOW")
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE meals SET battles = 3, wins = 4 - id")
+        conn.commit()
+    client = create_app().test_client()
+    get_version = mocker.spy(kitchen_model, "get_data_version")
+    stream = mocker.spy(kitchen_model, "iter_leaderboard")
+
+    shared = client.get('/api/leaderboard').get_json()['leaderboard']
+    assert get_version.call_count == 1
+    assert stream.call_count == 0
+
+    mocker.patch.object(kitchen_model, "LEADERBOARD_SHARED_ROWS", 2)
+    streamed = client.get('/api/leaderboard').get_json()['leaderboard']
+
+    assert stream.call_count == 1
+    assert [e['meal'] for e in streamed] == [e['meal'] for e in shared] == ["Pasta", "Tacos", "Pho"]
+
+def test_batch_battles(meals_db, mocker):
+    """Test that a batch of matchups and series is decided by one draw and recorded in one write."""
+    for name, price in (("Pasta", 10.0), ("Tacos", 30.0), ("Pho", 11.0)):
+        kitchen_model.create_meal(name, "Any", price, "LOW")
+    kitchen_model.delete_meal(3)
+    # Scores are 27 and 87, so Pasta (meal_a) wins a game when the number is below 0.6
+    draw = mocker.patch("meal_max.models.battle_model.get_random_batch", return_value=[0.9, 0.1, 0.2, 0.3, 0.7, 0.5])
+    record = mocker.spy(kitchen_model, "record_battle_results")
+    client = create_app().test_client()
+
+    response = client.post('/api/battles', json={'matchups': [
+        [1, 2], {'meal_a': 1, 'meal_b': 2, 'best_of': 5}, [1, 3]]})
+
+    results = response.get_json()['results']
+    draw.assert_called_once_with(6)
+    record.assert_called_once()
+    assert [(r['status'], r.get('score'), r.get('winner')) for r in results] == [
+        ('completed', [0, 1], 'Tacos'), ('completed', [3, 0], 'Pasta'), ('error', None, None)]
+    assert results[2]['error'] == "Meal with ID 3 has been deleted"
+    assert {(e['meal'], e['battles'], e['wins']) for e in kitchen_model.get_leaderboard()} == {
+        ('Pasta', 4, 3), ('Tacos', 4, 1)}
+    assert client.post('/api/battles', json={'matchups': [[1, 2]], 'best_of': 2}).status_code == 400
+    assert client.post('/api/battles', json={'matchups': [[1, 1]]}).status_code == 400
+    assert client.post('/api/battles', json={'matchups': []}).status_code == 400
+
+def test_seeded_battles_replay(meals_db, mocker):
+    """Test that seeded battles are logged with their draws and replay to the same stats on a fixture."""
+    for name, price in (("Pasta", 10.0), ("Tacos", 30.0)):
+        kitchen_model.create_meal(name, "Any", price, "LOW")
+    kitchen_model.register_fixture("two_meals")
+    random_org = mocker.patch("meal_max.models.battle_model.get_random")
+    client = create_app().test_client()
+
+    assert client.post('/api/battle/seed', json={'seed': 7}).get_json()['seed'] == 7
+    for _ in range(4):
+        client.post('/api/clear-combatants')
+        client.post('/api/prep-combatant', json={'meal': 'Pasta'})
+        client.post('/api/prep-combatant', json={'meal': 'Tacos'})
+        assert client.get('/api/battle').get_json()['seed'] == 7
+
+    log = client.get('/api/battle/log').get_json()['battles']
+    stats = kitchen_model.get_meal_stats([1, 2])
+    expected = {str(meal_id): meal_stats for meal_id, meal_stats in stats.items()}
+    from_log = client.post('/api/battle/replay', json={'fixture': 'two_meals', 'battles': log, 'expected': expected})
+    from_seed = client.post('/api/battle/replay', json={
+        'fixture': 'two_meals', 'seed': 7, 'expected': expected,
+        'battles': [{'meal_a': battle['meal_a'], 'meal_b': battle['meal_b']} for battle in log]})
+    wrong = client.post('/api/battle/replay', json={
+        'fixture': 'two_meals', 'battles': log, 'expected': {'1': {'battles': 99}}})
+
+    random_org.assert_not_called()
+    assert [battle['draw'] for battle in log] == [0, 1, 2, 3]
+    assert stats[1]['battles'] == 4
+    assert from_log.get_json()['match'] and from_seed.get_json()['match']
+    assert from_log.get_json()['stats'] == from_seed.get_json()['stats'] == expected
+    assert wrong.get_json()['match'] is False
+    assert client.post('/api/battle/replay', json={'fixture': 'missing', 'battles': log}).status_code == 400
+
+def test_matchmaking_runs_battles(meals_db, mocker):
+    """Test that queued meals with close scores are paired and battled automatically."""
+    for name, price in (("Pasta", 10.0), ("Tacos", 11.0)):
+        kitchen_model.create_meal(name, "Any", price, "LOW")
+    # Scores are 27 and 30, so Tacos wins unless the number is below 0.03
+    mocker.patch("meal_max.models.battle_model.get_random_batch", return_value=[0.5])
+    app = create_app()
+    client = app.test_client()
+
+    assert client.post('/api/matchmaking/queue', json={'meal_id': 1}).get_json()['status'] == 'queued'
+    assert client.post('/api/matchmaking/queue', json={'meal_id': 2}).get_json()['opponent'] == 1
+    assert client.post('/api/matchmaking/queue', json={'meal_id': 99}).status_code == 400
+    app.extensions['matchmaker'].stop()
+
+    results = client.get('/api/matchmaking').get_json()['results']
+    assert [(r['meal_a'], r['meal_b'], r['winner']) for r in results] == [(1, 2, 'Tacos')]
+    assert kitchen_model.get_meal_stats([1, 2]) == {1: {'battles': 1, 'wins': 0}, 2: {'battles': 1, 'wins': 1}}
+
+def test_season_rollover(meals_db, mocker):
+    """Test that a rollover archives and resets undeleted meals in chunks, resumes if interrupted, and keeps past leaderboards."""
+    for name in ("Pasta", "Tacos", "Pho", "Ramen", "Curry"):
+        kitchen_model.create_meal(name, "Any", 10.0, "LOW")
+    kitchen_model.record_battle_results({1: (3, 1), 2: (3, 2), 4: (2, 2), 5: (2, 1)})
+    kitchen_model.delete_meal(5)
+    chunk = kitchen_model._rollover_chunk
+    calls = []
+
+    def interrupted(season, after, chunk_size):
+        calls.append(after)
+        if len(calls) == 2:
+            raise sqlite3.OperationalError("disk I/O error")
+        return chunk(season, after, chunk_size)
+
+    mocker.patch.object(kitchen_model, "_rollover_chunk", interrupted)
+    with pytest.raises(sqlite3.OperationalError):
+        kitchen_model.rollover_season(chunk_size=2, pause=0)
+    with pytest.raises(kitchen_model.SeasonNotFoundError):
+        kitchen_model.get_season_leaderboard(1)
+    report = kitchen_model.rollover_season(chunk_size=2, pause=0)
+    client = create_app().test_client()
+
+    assert calls == [0, 2, 2, 4, 5]
+    assert (report['season'], report['new_season'], report['archived'], report['chunks']) == (1, 2, 1, 2)
+    assert kitchen_model.get_meal_stats([1, 2, 4]) == {meal_id: {'battles': 0, 'wins': 0} for meal_id in (1, 2, 4)}
+    assert kitchen_model.get_leaderboard() == []
+    seasons = client.get('/api/seasons').get_json()['seasons']
+    assert [(s['season'], s['complete'], s['meals']) for s in seasons] == [(1, True, 3), (2, False, 0)]
+    leaderboard = client.get('/api/seasons/1/leaderboard?sort=win_pct').get_json()['leaderboard']
+    assert [(e['meal'], e['win_pct']) for e in leaderboard] == [('Ramen', 100.0), ('Tacos', 66.7), ('Pasta', 33.3)]
+    assert client.get('/api/seasons/2/leaderboard').status_code == 404
+    assert client.get('/api/seasons/1/leaderboard?sort=price').status_code == 400
+    assert client.post('/api/seasons/rollover').get_json()['season'] == 2
+
+def test_maintenance_routes_take_writer_slots(meals_db, mocker):
+    """Test that the compact, restore-fixture and rollover routes wait for a writer slot like the other write routes."""
+    kitchen_model.create_meal("Pasta", "Any", 10.0, "LOW")
+    app = create_app()
+    client = app.test_client()
+    gate = app.extensions['write_admission'].gate
+    mocker.patch.object(gate, "max_wait", 0.01)
+
+    gate.active = gate.limit
+    rejected = [client.post('/api/compact'), client.post('/api/restore-fixture/missing'),
+                client.post('/api/seasons/rollover')]
+    gate.active = 0
+    slots = mocker.spy(gate, "enter")
+    rollover = client.post('/api/seasons/rollover')
+
+    assert [response.status_code for response in rejected] == [429, 429, 429]
+    assert 'Retry-After' in rejected[2].headers
+    assert rollover.status_code == 200
+    # The start and finish transactions and one per chunk (the last finds no meals left)
+    assert slots.call_count == 2 + rollover.get_json()['chunks'] + 1
+    assert gate.active == 0
+
+def test_leaderboard_sort_keys_use_indexes(meals_db):
+    """Test that every leaderboard sort key is served by an index scan and sorts as expected."""
+    for name in ("Pasta", "Tacos", "Pho"):
+        kitchen_model.create_meal(name, "Any", 10.0, "LOW")
+    kitchen_model.record_battle_results({1: (1, 1), 2: (20, 15), 3: (40, 20)})
+    client = create_app().test_client()
+
+    orders = {key: [e['meal'] for e in client.get(f'/api/leaderboard?sort={key}').get_json()['leaderboard']]
+              for key in kitchen_model.LEADERBOARD_SORT_KEYS}
+    with sql_utils.get_db_connection() as conn:
+        plans = {key: conn.execute("EXPLAIN QUERY PLAN " + kitchen_model._leaderboard_query(key)).fetchall()
+                 for key in kitchen_model.LEADERBOARD_SORT_KEYS}
+
+    assert orders == {'wins': ['Pho', 'Tacos', 'Pasta'], 'battles': ['Pho', 'Tacos', 'Pasta'],
+                      'win_pct': ['Pasta', 'Tacos', 'Pho'], 'wilson': ['Tacos', 'Pho', 'Pasta']}
+    assert all(f"USING INDEX meals_leaderboard_{key}" in plan[-1][3] and "TEMP B-TREE" not in str(plan)
+               for key, plan in plans.items())
+    assert kitchen_model.get_leaderboard('wilson')[0]['wilson'] == 53.1
+    assert client.get('/api/leaderboard?sort=price').status_code == 400
+
+def test_ensure_leaderboard_schema_migrates_old_table(tmp_path, mocker):
+    """Test that a meals table without the generated columns gets them and the sort indexes."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "old.db"))
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("""CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT, cuisine TEXT, price REAL,
+                        difficulty TEXT, battles INTEGER DEFAULT 0, wins INTEGER DEFAULT 0, deleted BOOLEAN DEFAULT FALSE)""")
+        conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES ('Pasta', 'Any', 10, 'LOW', 4, 3)")
+        conn.commit()
+
+    kitchen_model.ensure_leaderboard_schema()
+    kitchen_model.ensure_leaderboard_schema()
+
+    with sql_utils.get_db_connection() as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert [e['win_pct'] for e in kitchen_model.get_leaderboard('win_pct')] == [75.0]
+    assert indexes == {f"meals_leaderboard_{key}" for key in kitchen_model.LEADERBOARD_SORT_KEYS}
@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import pytest
+
+import asgi_app
+from asgi_app import create_app
+from meal_max.models import kitchen_model
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture()
+def meals_db(tmp_path, mocker):
+    """Fixture to provide an empty meals database and a name index that is rebuilt for it."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")) as fh:
+        with sql_utils.get_db_connection() as conn:
+            conn.executescript(fh.read())
+    kitchen_model._reset_name_index()
+    yield
+    kitchen_model._reset_name_index()
+
+def serve(test):
+    """Runs test(client) against a fresh app, with its startup and shutdown hooks."""
+    async def main():
+        app = create_app()
+        async with app.test_app() as test_app:
+            return await test(test_app.test_client())
+    return asyncio.run(main())
+
+async def prep(client, *meals):
+    """Creates the meals and prepares them as combatants."""
+    for meal in meals:
+        await client.post('/api/create-meal', json={'meal': meal, 'cuisine': 'Any', 'price': 10.0, 'difficulty': 'LOW'})
+        await client.post('/api/prep-combatant', json={'meal': meal})
+
+
+def test_healthcheck():
+    """Test that the ASGI app answers the health check."""
+    async def test(client):
+        response = await client.get('/api/health')
+        assert response.status_code == 200
+        assert await response.get_json() == {'status': 'healthy'}
+    serve(test)
+
+def test_create_meal_validation(meals_db):
+    """Test that the ASGI create route rejects the same input as app.add_meal."""
+    async def test(client):
+        response = await client.post('/api/create-meal', json={'meal': 'Pasta', 'cuisine': 'Italian', 'price': 10.123, 'difficulty': 'LOW'})
+        assert response.status_code == 400
+        response = await client.post('/api/create-meal', json={'meal': 'Pasta', 'cuisine': 'Italian', 'price': 10.0, 'difficulty': 'EASY'})
+        assert response.status_code == 400
+    serve(test)
+
+def test_get_meal_by_id_revalidates(meals_db):
+    """Test that the ASGI meal lookup sends a weak ETag and answers a matching If-None-Match with 304."""
+    async def test(client):
+        await client.post('/api/create-meal', json={'meal': 'Pasta', 'cuisine': 'Italian', 'price': 10.0, 'difficulty': 'LOW'})
+
+        response = await client.get('/api/get-meal-by-id/1')
+        assert response.status_code == 200
+        assert (await response.get_json())['meal']['meal'] == 'Pasta'
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+
+        assert (await client.get('/api/get-meal-by-id/1', headers={'If-None-Match': etag})).status_code == 304
+
+        await client.delete('/api/delete-meal/1')
+        assert (await client.get('/api/get-meal-by-id/1', headers={'If-None-Match': etag})).status_code != 304
+    serve(test)
+
+def test_battle_returns_record(meals_db, mocker):
+    """Test that the ASGI battle reports the winner and the number that decided it, like app.battle."""
+    mocker.patch.object(asgi_app, "get_random_async", mocker.AsyncMock(return_value=0.42))
+
+    async def test(client):
+        await prep(client, 'Pasta', 'Tacos')
+
+        response = await client.get('/api/battle')
+        assert response.status_code == 200
+        body = await response.get_json()
+        assert body['winner'] in ('Pasta', 'Tacos')
+        assert body['random_number'] == 0.42
+        assert body['seed'] is None and body['draw'] is None
+
+        leaderboard = await (await client.get('/api/leaderboard')).get_json()
+        assert sum(row['battles'] for row in leaderboard['leaderboard']) == 2
+    serve(test)
+
+def test_battle_requires_two_combatants(meals_db, mocker):
+    """Test that the ASGI battle fails without fetching a random number if fewer than two meals are prepped."""
+    fetch = mocker.patch.object(asgi_app, "get_random_async", mocker.AsyncMock(return_value=0.42))
+
+    async def test(client):
+        await prep(client, 'Pasta')
+        response = await client.get('/api/battle')
+        assert response.status_code == 500
+        assert 'Two combatants' in (await response.get_json())['error']
+    serve(test)
+
+    fetch.assert_not_called()
+
+def test_concurrent_battles_overlap_random_requests(meals_db, mocker):
+    """Test that concurrent battles await random.org together, and only one battles the prepared pair."""
+    in_flight = []
+
+    async def fetch_random(client):
+        in_flight.append(None)
+        # Only returns once both battles are waiting on random.org, so a lock held here would time out
+        while len(in_flight) < 2:
+            await asyncio.sleep(0.001)
+        return 0.42
+
+    mocker.patch.object(asgi_app, "get_random_async", fetch_random)
+
+    async def test(client):
+        await prep(client, 'Pasta', 'Tacos')
+
+        responses = await asyncio.wait_for(asyncio.gather(client.get('/api/battle'), client.get('/api/battle')), 5)
+
+        assert sorted(response.status_code for response in responses) == [200, 500]
+        combatants = await (await client.get('/api/get-combatants')).get_json()
+        assert len(combatants['combatants']) == 1
+    serve(test)
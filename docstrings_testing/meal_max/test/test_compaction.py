@@ -0,0 +1,95 @@
+import os
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.utils import sql_utils
+from meal_max.utils.compaction import compact, Compactor, enable_incremental_vacuum
+
+
+CREATE_TABLE_SQL = os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")
+
+
+@pytest.fixture()
+def meals_db(tmp_path, mocker):
+    """Fixture to provide a meals database with 200 meals, the first 150 of them deleted."""
+    path = str(tmp_path / "meal_max.db")
+    conn = sqlite3.connect(path)
+    with open(CREATE_TABLE_SQL) as fh:
+        conn.executescript(fh.read())
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, 'Italian', 10.0, 'LOW')",
+        [(f"Meal {i} " + "x" * 500,) for i in range(200)]
+    )
+    conn.execute("UPDATE meals SET deleted = TRUE WHERE id <= 150")
+    conn.commit()
+    conn.close()
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    return path
+
+
+def test_deleted_at_stamped_on_delete(meals_db):
+    """Test that soft deleting a meal records when it was deleted."""
+    kitchen_model.delete_meal(151)
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT deleted_at FROM meals WHERE id = 151").fetchone()[0] is not None
+        assert conn.execute("SELECT deleted_at FROM meals WHERE id = 152").fetchone()[0] is None
+
+def test_compact_archives_in_batches_and_reclaims_pages(meals_db):
+    """Test that old deleted meals move to the archive in batches and free pages are truncated."""
+    report = compact("meals", min_age=0, batch_size=40)
+
+    assert report['archived'] == 150
+    assert report['batches'] == 4
+    assert report['reclaimed_pages'] > 0
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM meals").fetchone() == (50,)
+        assert conn.execute("SELECT COUNT(*) FROM meals_archive WHERE deleted_at IS NOT NULL").fetchone() == (150,)
+        assert conn.execute("PRAGMA freelist_count").fetchone() == (0,)
+
+def test_compact_skips_recent_deletes(meals_db):
+    """Test that meals deleted more recently than min_age are left in place."""
+    report = compact("meals", min_age=3600)
+
+    assert report['archived'] == 0
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM meals").fetchone() == (200,)
+
+def test_archived_meal_lookups(meals_db):
+    """Test that id lookups report archived meals as deleted rather than not found."""
+    Compactor("meals", min_age=0).run_now()
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        kitchen_model.get_meal_by_id(1)
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        kitchen_model.delete_meal(1)
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        kitchen_model.update_meal_stats(1, "win")
+    with pytest.raises(ValueError, match="Meal with ID 999 not found"):
+        kitchen_model.get_meal_by_id(999)
+    assert kitchen_model.get_meal_by_id(151).id == 151
+    assert [entry['status'] for entry in kitchen_model.get_meals_by_ids([1, 151, 999])] == ['deleted', 'found',
+                                                                                          'missing']
+
+def test_compact_migrates_old_schema(tmp_path, mocker):
+    """Test that an old database gets the archive schema on the first pass and its vacuum mode from the one-off step."""
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT, deleted BOOLEAN DEFAULT FALSE)")
+    conn.executemany("INSERT INTO meals (meal, deleted) VALUES (?, ?)", [("Pasta", True), ("Tacos", False)])
+    conn.commit()
+    conn.close()
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+
+    report = compact("meals", min_age=0)
+
+    assert report['archived'] == 1
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone() == (0,)
+        assert conn.execute("SELECT id, meal FROM meals_archive").fetchall() == [(1, "Pasta")]
+    assert enable_incremental_vacuum() is True
+    assert enable_incremental_vacuum() is False
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone() == (2,)
@@ -0,0 +1,137 @@
+import csv
+import gzip
+import io
+import json
+
+from flask import Flask, make_response
+import pytest
+
+from meal_max.utils.http_utils import (
+    compress_response,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    stream_csv,
+    stream_json_list,
+    stream_ndjson
+)
+
+
+@pytest.fixture
+def app():
+    """Fixture to provide a bare Flask app for request contexts."""
+    return Flask(__name__)
+
+
+def test_make_etag_is_stable():
+    """Test that the same parts always produce the same ETag."""
+    assert make_etag('leaderboard', 'wins', 3) == make_etag('leaderboard', 'wins', 3)
+
+def test_make_etag_changes_with_version():
+    """Test that bumping the data version produces a different ETag."""
+    assert make_etag('leaderboard', 'wins', 3) != make_etag('leaderboard', 'wins', 4)
+
+def test_is_not_modified_matching(app):
+    """Test that a matching If-None-Match header is detected."""
+    etag = make_etag('get-meal-by-id', 1, 0)
+    with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+        assert is_not_modified(etag)
+
+def test_is_not_modified_weak(app):
+    """Test that the weak ETag sent with a response matches when sent back."""
+    etag = make_etag('get-meal-by-id', 1, 0)
+    with app.test_request_context(headers={'If-None-Match': f'W/"{etag}"'}):
+        assert is_not_modified(etag)
+
+def test_is_not_modified_stale(app):
+    """Test that a stale If-None-Match header is not treated as a match."""
+    etag = make_etag('get-meal-by-id', 1, 0)
+    with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+        assert not is_not_modified(make_etag('get-meal-by-id', 1, 1))
+
+def test_is_not_modified_missing_header(app):
+    """Test that a request without If-None-Match is never a match."""
+    with app.test_request_context():
+        assert not is_not_modified(make_etag('leaderboard', 'wins', 0))
+
+def test_not_modified_response(app):
+    """Test that the 304 response is empty and carries the weak ETag."""
+    etag = make_etag('leaderboard', 'wins', 0)
+    with app.test_request_context():
+        response = not_modified_response(etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == f'W/"{etag}"'
+
+def test_compress_response_gzip(app):
+    """Test that a large response is gzip encoded when the client accepts it."""
+    body = b'{"meal": "Spaghetti"}' * 200
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(make_response(body))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()) == body
+
+def test_compress_response_small_body(app):
+    """Test that responses below the size threshold are sent uncompressed."""
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(make_response(b'{}'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == b'{}'
+
+def test_compress_response_not_accepted(app):
+    """Test that nothing is compressed when the client does not accept any encoding."""
+    body = b'x' * 4096
+    with app.test_request_context():
+        response = compress_response(make_response(body))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == body
+
+def test_stream_json_list(app):
+    """Test that a streamed list decodes to the same document as jsonify would produce."""
+    items = [{'id': i, 'meal': f'Meal {i}'} for i in range(1234)]
+    with app.test_request_context():
+        response = stream_json_list({'status': 'success'}, 'leaderboard', iter(items))
+        body = b''.join(response.iter_encoded())
+    assert json.loads(body) == {'status': 'success', 'leaderboard': items}
+
+def test_stream_json_list_empty(app):
+    """Test streaming an empty list."""
+    with app.test_request_context():
+        response = stream_json_list({'status': 'success'}, 'leaderboard', iter([]))
+        body = b''.join(response.iter_encoded())
+    assert json.loads(body) == {'status': 'success', 'leaderboard': []}
+
+def test_stream_json_list_compressed(app):
+    """Test that a streamed response is compressed incrementally."""
+    items = [{'id': i} for i in range(2000)]
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(stream_json_list({'status': 'success'}, 'leaderboard', iter(items)))
+        body = b''.join(response.iter_encoded())
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(body))['leaderboard'] == items
+
+def test_stream_ndjson(app):
+    """Test that every item is streamed as one JSON document per line."""
+    items = [{'id': i, 'meal': f'Meal {i}'} for i in range(1234)]
+    with app.test_request_context():
+        response = stream_ndjson(iter(items))
+        body = b''.join(response.iter_encoded()).decode()
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in body.splitlines()] == items
+
+def test_stream_csv(app):
+    """Test that rows are streamed as CSV with a header, quoting values where needed."""
+    rows = [{'id': i, 'meal': f'Meal, {i}', 'extra': True} for i in range(1234)]
+    with app.test_request_context():
+        response = stream_csv(['id', 'meal'], iter(rows))
+        chunks = list(response.iter_encoded())
+    parsed = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+    assert len(chunks) > 1
+    assert parsed == [{'id': str(i), 'meal': f'Meal, {i}'} for i in range(1234)]
+
+def test_stream_csv_empty(app):
+    """Test that an empty export still has its header row."""
+    with app.test_request_context():
+        body = b''.join(stream_csv(['id', 'meal'], iter([])).iter_encoded())
+    assert body == b'id,meal\r\n'
@@ -0,0 +1,62 @@
+import json
+
+from flask import Flask
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils import json_provider
+from meal_max.utils.json_provider import FastJSONProvider
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def app(request, mocker):
+    """Fixture to provide an app using FastJSONProvider, once with each encoder."""
+    if request.param == 'stdlib':
+        mocker.patch.object(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+@pytest.fixture
+def sample_meal():
+    return Meal(1, "Spaghetti", "Italian", 10.0, "LOW")
+
+
+def test_dumps_dataclass(app, sample_meal):
+    """Test that a Meal is serialized with all of its fields."""
+    with app.app_context():
+        data = json.loads(app.json.dumps({'status': 'success', 'meal': sample_meal}))
+    assert data == {
+        'status': 'success',
+        'meal': {'id': 1, 'meal': 'Spaghetti', 'cuisine': 'Italian', 'price': 10.0, 'difficulty': 'LOW'}
+    }
+
+def test_dumps_compact_unless_debug(app):
+    """Test that output is compact by default and indented in debug mode."""
+    assert app.json.dumps({'status': 'success'}) == '{"status":"success"}'
+    app.debug = True
+    assert '"status": "success"' in app.json.dumps({'status': 'success'})
+
+def test_dumps_sort_keys(app):
+    """Test that keys are sorted unless sort_keys is turned off."""
+    assert app.json.dumps({'b': 1, 'a': {'d': 2, 'c': 3}}) == '{"a":{"c":3,"d":2},"b":1}'
+    app.json.sort_keys = False
+    assert app.json.dumps({'b': 1, 'a': 2}) == '{"b":1,"a":2}'
+
+def test_response(app, sample_meal):
+    """Test that jsonify responses go through the provider."""
+    with app.app_context():
+        response = app.json.response({'status': 'success', 'combatants': [sample_meal]})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data())['combatants'][0]['meal'] == 'Spaghetti'
+
+def test_loads(app):
+    """Test deserializing JSON."""
+    assert app.json.loads('{"meal": "Pizza", "price": 15.0}') == {'meal': 'Pizza', 'price': 15.0}
+
+def test_dumps_unsupported_type(app):
+    """Test that unsupported objects raise a TypeError."""
+    with pytest.raises(TypeError):
+        app.json.dumps({'value': object()})
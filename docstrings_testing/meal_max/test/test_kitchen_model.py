@@ -309,7 +309,7 @@ def test_get_leaderboard(mock_cursor):
 
     # Ensure the SQL query was executed correctly
     expected_query = normalize_whitespace("""
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, wilson
         FROM meals WHERE deleted = FALSE AND battles > 0
         ORDER BY wins DESC
     """)
@@ -334,7 +334,7 @@ def test_get_leaderboard_empty(mock_cursor, caplog):
 
     # Ensure the SQL query was executed correctly
     expected_query = normalize_whitespace("""
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, wilson
         FROM meals WHERE deleted = FALSE AND battles > 0
         ORDER BY wins DESC
     """)
@@ -367,7 +367,7 @@ def test_get_leaderboard_ordered_by_win_pct(mock_cursor):
 
     # Ensure the SQL query was executed correctly
     expected_query = normalize_whitespace("""
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct, wilson
         FROM meals WHERE deleted = false AND battles > 0
         ORDER BY win_pct DESC
     """)
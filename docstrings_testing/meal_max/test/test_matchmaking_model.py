@@ -0,0 +1,89 @@
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.matchmaking_model import Matchmaker
+
+
+def meal(meal_id, price):
+    """Returns a meal whose battle score is price - 3."""
+    return Meal(id=meal_id, meal=f"Meal {meal_id}", cuisine="A", price=price, difficulty="LOW")
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control the matchmaker's clock."""
+    return mocker.patch("meal_max.models.matchmaking_model.time.monotonic", return_value=100.0)
+
+@pytest.fixture
+def battles():
+    """Fixture to record the matchups the matchmaker battles."""
+    return []
+
+@pytest.fixture
+def matchmaker(battles):
+    """Fixture to provide a matchmaker with a window of 5 widening by 1 per second."""
+    def run(matchups):
+        battles.extend((m.meal_a, m.meal_b) for m in matchups)
+        return [{'meal_a': m.meal_a, 'meal_b': m.meal_b, 'status': 'completed'} for m in matchups]
+    return Matchmaker(window=5, growth=1, max_window=20, max_wait=60, run=run)
+
+
+def test_arrival_pairs_with_nearest_score(matchmaker, battles, clock):
+    """Test that an arrival is paired with the closest waiting score inside the window."""
+    for meal_id, price in ((1, 10), (2, 30), (3, 20)):
+        assert matchmaker.enqueue(meal(meal_id, price))['status'] == 'queued'
+
+    result = matchmaker.enqueue(meal(4, 22))
+
+    assert result == {'status': 'matched', 'score': 19, 'opponent': 3}
+    assert [m['id'] for m in matchmaker.snapshot()['waiting']] == [1, 2]
+    assert matchmaker.run_pending() == [{'meal_a': 3, 'meal_b': 4, 'status': 'completed'}]
+    assert battles == [(3, 4)]
+    assert matchmaker.run_pending() == []
+
+def test_window_widens_while_waiting(matchmaker, battles, clock):
+    """Test that meals too far apart are paired by a sweep once their windows have widened."""
+    matchmaker.enqueue(meal(1, 10))
+    matchmaker.enqueue(meal(2, 18))
+    assert matchmaker.sweep() == 0
+
+    clock.return_value = 103.0
+    assert matchmaker.sweep() == 1
+    matchmaker.run_pending()
+
+    assert battles == [(1, 2)]
+    assert matchmaker.snapshot()['waiting'] == []
+
+def test_duplicates_dequeue_and_expiry(matchmaker, clock):
+    """Test that a meal cannot queue twice, can leave, and is dropped after max_wait."""
+    matchmaker.enqueue(meal(1, 10))
+    with pytest.raises(ValueError, match="already queued"):
+        matchmaker.enqueue(meal(1, 10))
+    assert matchmaker.dequeue(1)
+    assert not matchmaker.dequeue(1)
+
+    matchmaker.enqueue(meal(2, 10))
+    clock.return_value = 161.0
+    matchmaker.sweep()
+
+    assert matchmaker.snapshot()['waiting'] == []
+
+def test_equal_scores_pair(matchmaker, battles, clock):
+    """Test that meals with the same score are paired and removed by their own keys."""
+    matchmaker.enqueue(meal(1, 10))
+    matchmaker.enqueue(meal(2, 50))
+    assert matchmaker.enqueue(meal(3, 10))['opponent'] == 1
+    assert [m['id'] for m in matchmaker.snapshot()['waiting']] == [2]
+
+def test_failed_battles_are_reported(clock):
+    """Test that pairs whose battles fail get an error result instead of being dropped."""
+    def run(matchups):
+        raise RuntimeError("random.org is down")
+    matchmaker = Matchmaker(window=5, growth=1, max_window=20, max_wait=60, run=run)
+    matchmaker.enqueue(meal(1, 10))
+    matchmaker.enqueue(meal(2, 10))
+
+    expected = [{'meal_a': 1, 'meal_b': 2, 'status': 'error', 'error': "random.org is down"}]
+    assert matchmaker.run_pending() == expected
+    assert matchmaker.snapshot()['results'] == expected
+    assert matchmaker.snapshot()['pending'] == []
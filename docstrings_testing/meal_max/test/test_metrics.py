@@ -0,0 +1,128 @@
+import gc
+import threading
+
+from flask import Flask, jsonify
+import pytest
+
+from meal_max.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, install_metrics
+
+
+@pytest.fixture()
+def app():
+    """Fixture to provide a bare Flask app with the metrics middleware installed."""
+    app = Flask(__name__)
+    install_metrics(app)
+
+    @app.route('/api/thing/<int:thing_id>')
+    def thing(thing_id):
+        return jsonify({'status': 'success'})
+
+    @app.route('/api/boom')
+    def boom():
+        return jsonify({'error': 'boom'}), 500
+
+    return app
+
+
+######################################################
+#
+#    Metric types
+#
+######################################################
+
+
+def test_counter_sums_across_threads():
+    """Test that increments from different threads are merged when rendered."""
+    counter = Counter("things_total", "Things.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(kind="a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(2, kind="b")
+
+    assert counter.values() == {("a",): 4000, ("b",): 2}
+    assert 'things_total{kind="a"} 4000' in counter.render()
+
+def test_finished_threads_shards_are_folded():
+    """Test that a finished thread's shard is folded into the base total instead of being kept."""
+    counter = Counter("things_total", "Things.")
+    histogram = Histogram("latency", "Latency.", buckets=(1.0,))
+
+    def work():
+        counter.inc()
+        histogram.observe(0.5)
+
+    for _ in range(10):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        del thread
+    gc.collect()
+
+    assert counter._shards == {} and histogram._shards == {}
+    assert counter.values() == {(): 10}
+    assert 'latency_count 10' in histogram.render()
+
+def test_gauge_inc_dec():
+    """Test that a gauge can go up and down."""
+    gauge = Gauge("busy", "Busy.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert gauge.values() == {(): 1}
+
+def test_histogram_buckets():
+    """Test that histogram buckets are cumulative and include +Inf, sum and count."""
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = list(histogram.collect())
+
+    assert lines == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 3.65',
+        'latency_seconds_count 4',
+    ]
+
+def test_registry_reuses_metric_names():
+    """Test that registering a name twice returns the existing metric."""
+    registry = MetricsRegistry()
+    first = registry.counter("dupes_total", "Dupes.")
+
+    assert registry.counter("dupes_total", "Dupes.") is first
+    assert registry.render().startswith("# HELP dupes_total Dupes.\n# TYPE dupes_total counter")
+
+
+######################################################
+#
+#    Middleware
+#
+######################################################
+
+
+def test_metrics_endpoint_records_routes(app):
+    """Test that requests are counted by route rule, with 5xx counted as errors."""
+    client = app.test_client()
+    client.get('/api/thing/1')
+    client.get('/api/thing/2')
+    client.get('/api/boom')
+
+    response = client.get('/api/metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'route="/api/thing/<int:thing_id>",method="GET",status="200"}' in body
+    assert 'http_request_errors_total{route="/api/boom",method="GET"}' in body
+    assert 'http_request_duration_seconds_count{route="/api/thing/<int:thing_id>",method="GET"}' in body
+    assert 'http_requests_in_flight{route="/api/metrics",method="GET"} 1' in body
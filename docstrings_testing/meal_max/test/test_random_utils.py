@@ -1,7 +1,11 @@
+import asyncio
+
+import httpx
 import pytest
 import requests
 
-from meal_max.utils.random_utils import get_random
+from meal_max.utils import random_utils
+from meal_max.utils.random_utils import RANDOM_ORG_URL, get_random, get_random_async, get_random_batch, SeededRandom
 
 
 RANDOM_NUMBER = 42
@@ -47,4 +51,52 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_MEALS)
\ No newline at end of file
+        get_random(NUM_MEALS)
+
+def test_get_random_async(mocker):
+    """Test retrieving a random number from random.org with the async client."""
+    mock_response = mocker.Mock()
+    mock_response.text = "0.42\n"
+    mock_client = mocker.Mock()
+    mock_client.get = mocker.AsyncMock(return_value=mock_response)
+
+    result = asyncio.run(get_random_async(mock_client))
+
+    assert result == 0.42, f"Expected random number 0.42, but got {result}"
+    mock_client.get.assert_awaited_once_with(RANDOM_ORG_URL, timeout=5)
+
+def test_get_random_async_timeout(mocker):
+    """Simulate a timeout with the async client."""
+    mock_client = mocker.Mock()
+    mock_client.get = mocker.AsyncMock(side_effect=httpx.TimeoutException("timed out"))
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        asyncio.run(get_random_async(mock_client))
+
+def test_get_random_batch(mocker):
+    """Test that a batch is fetched RANDOM_ORG_MAX_BATCH numbers per request."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_MAX_BATCH", 3)
+    responses = [mocker.Mock(text="0.10\n0.20\n0.30\n"), mocker.Mock(text="0.40\n0.50\n")]
+    mocker.patch("requests.get", side_effect=responses)
+
+    assert get_random_batch(5) == [0.1, 0.2, 0.3, 0.4, 0.5]
+    assert [call.args[0] for call in requests.get.call_args_list] == [
+        RANDOM_ORG_URL.replace("num=1", "num=3"), RANDOM_ORG_URL.replace("num=1", "num=2")]
+
+def test_get_random_batch_short_response(mocker):
+    """Test that a response with the wrong number of values is rejected."""
+    mocker.patch("requests.get", return_value=mocker.Mock(text="0.10\n"))
+
+    with pytest.raises(ValueError, match="Expected 2 numbers from random.org, got 1"):
+        get_random_batch(2)
+
+def test_seeded_random_is_reproducible():
+    """Test that a seed always yields the same two-decimal numbers and counts its draws."""
+    first, second = SeededRandom(7), SeededRandom(7)
+
+    numbers = [first.draw() for _ in range(3)]
+
+    assert [index for _, index in numbers] == [0, 1, 2]
+    assert second.draw_many(3) == [number for number, _ in numbers]
+    assert all(0 <= number <= 0.99 and round(number, 2) == number for number, _ in numbers)
+    assert first.draws == second.draws == 3
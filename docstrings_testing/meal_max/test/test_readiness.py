@@ -0,0 +1,75 @@
+import sqlite3
+import time
+
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.readiness import ReadinessMonitor
+
+
+@pytest.fixture()
+def db_path(tmp_path, mocker):
+    """Fixture to provide a database with a meals table."""
+    path = str(tmp_path / "meal_max.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY)")
+    conn.close()
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    return path
+
+@pytest.fixture()
+def monitor():
+    """Fixture to provide a monitor that is stopped after the test."""
+    monitor = ReadinessMonitor(("meals",), interval=60)
+    yield monitor
+    monitor.stop()
+
+
+def test_not_ready_before_first_check(monitor):
+    """Test that a monitor that has never checked is not ready."""
+    status = monitor.status()
+
+    assert status['ready'] is False
+    assert status['error'] == "Readiness has not been checked yet"
+
+def test_ready_with_latencies(db_path, monitor):
+    """Test that a successful check is cached with its per-check latencies."""
+    monitor.start()
+
+    status = monitor.status()
+
+    assert status['ready'] is True
+    assert status['error'] is None
+    assert set(status['checks_ms']) == {'connection', 'table:meals'}
+    assert status['latency_ms'] >= 0
+
+def test_not_ready_when_table_missing(db_path):
+    """Test that a missing table makes the service not ready."""
+    monitor = ReadinessMonitor(("songs",), interval=60)
+
+    result = monitor.check_now()
+
+    assert result['ready'] is False
+    assert "no such table: songs" in result['error']
+
+def test_status_does_not_touch_database(db_path, monitor, mocker):
+    """Test that probes read the cached result and checks reuse one connection."""
+    monitor.start()
+    connect = mocker.patch("meal_max.utils.readiness.sqlite3.connect")
+
+    for _ in range(10):
+        monitor.status()
+    monitor.check_now()
+
+    connect.assert_not_called()
+
+def test_stale_result_not_ready(db_path, monitor, mocker):
+    """Test that a cached result older than max_age is reported as not ready."""
+    monitor.start()
+    monitor.max_age = 5
+    mocker.patch("meal_max.utils.readiness.time.time", return_value=time.time() + 10)
+
+    status = monitor.status()
+
+    assert status['ready'] is False
+    assert "old" in status['error']
@@ -0,0 +1,101 @@
+import sqlite3
+
+from flask import Flask
+import pytest
+
+from meal_max.utils import retry
+from meal_max.utils.retry import FAILURES, RETRIES, deadline, install_request_deadline, is_busy, remaining, retry_on_busy
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(mocker):
+    """Fixture to record backoffs instead of sleeping."""
+    return mocker.patch("meal_max.utils.retry.time.sleep")
+
+
+def flaky(failures, error="database is locked"):
+    """Returns a function that raises `error` the first `failures` times it is called."""
+    calls = []
+
+    def write():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise sqlite3.OperationalError(error)
+        return len(calls)
+    write.calls = calls
+    return write
+
+
+def test_is_busy():
+    """Test that only lock errors are treated as transient."""
+    assert is_busy(sqlite3.OperationalError("database is locked"))
+    assert not is_busy(sqlite3.OperationalError("no such table: meals"))
+    assert not is_busy(sqlite3.IntegrityError("UNIQUE constraint failed"))
+
+def test_retries_until_success(no_sleep, mocker):
+    """Test that lock errors are retried with jittered, growing backoffs and counted per function."""
+    mocker.patch.object(retry, "SQL_BUSY_BACKOFF", 0.01)
+    write = retry_on_busy(flaky(3))
+    before = RETRIES.values().get(("write",), 0)
+
+    assert write() == 4
+    backoffs = [call.args[0] for call in no_sleep.call_args_list]
+    assert len(backoffs) == 3
+    assert all(0 <= backoff <= 0.01 * 2 ** n for n, backoff in enumerate(backoffs))
+    assert RETRIES.values()[("write",)] == before + 3
+
+def test_gives_up_after_max_retries(mocker):
+    """Test that the error is raised once the retries are used up."""
+    mocker.patch.object(retry, "SQL_BUSY_RETRIES", 2)
+    write = flaky(10)
+
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        retry_on_busy(write)()
+
+    assert len(write.calls) == 3
+    assert FAILURES.values()[("write", "exhausted")] >= 1
+
+def test_other_errors_are_not_retried():
+    """Test that errors other than lock errors are raised at once."""
+    write = flaky(1, error="no such table: meals")
+
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        retry_on_busy(write)()
+
+    assert len(write.calls) == 1
+
+def test_respects_deadline(mocker):
+    """Test that no retry is attempted when its backoff would run past the deadline."""
+    mocker.patch.object(retry, "SQL_BUSY_BACKOFF", 1)
+    mocker.patch("meal_max.utils.retry.random.uniform", return_value=0.5)
+    write = flaky(10)
+
+    with deadline(0.1), pytest.raises(sqlite3.OperationalError):
+        retry_on_busy(write)()
+
+    assert len(write.calls) == 1
+    assert remaining() is None
+
+def test_nested_writes_retry_once():
+    """Test that a retrying function called by another one leaves the retries to the outer one."""
+    inner = flaky(1)
+    inner_write = retry_on_busy(inner)
+
+    @retry_on_busy
+    def outer():
+        return inner_write()
+
+    assert outer() == 2
+    assert len(inner.calls) == 2
+
+def test_request_deadline(mocker):
+    """Test that each request gets a deadline that is cleared afterwards."""
+    mocker.patch.object(retry, "REQUEST_DEADLINE", 5)
+    app = Flask(__name__)
+    install_request_deadline(app)
+    app.route('/left')(lambda: {'left': remaining()})
+
+    left = app.test_client().get('/left').get_json()['left']
+
+    assert 0 < left <= 5
+    assert remaining() is None
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from meal_max.utils.single_flight import CALLS, SingleFlight, single_flight
+
+
+def test_concurrent_calls_share_one_computation():
+    """Test that identical concurrent calls run the function once and get the same result."""
+    calls = []
+    release = threading.Event()
+
+    @single_flight("test_share")
+    def expensive(sort_by):
+        calls.append(sort_by)
+        release.wait(5)
+        return [sort_by]
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(expensive, "wins") for _ in range(8)]
+        time.sleep(0.1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == ["wins"]
+    assert all(result is results[0] for result in results)
+    assert CALLS.values()[("test_share", "leader")] == 1
+    assert CALLS.values()[("test_share", "coalesced")] == 7
+
+def test_different_arguments_and_versions_do_not_share():
+    """Test that calls only share a result when their arguments and data version match."""
+    version = [1]
+    calls = []
+
+    @single_flight("test_keys", version=lambda: version[0])
+    def expensive(sort_by):
+        calls.append(sort_by)
+        return sort_by
+
+    expensive("wins")
+    expensive("win_pct")
+    version[0] = 2
+    expensive("wins")
+
+    assert calls == ["wins", "win_pct", "wins"]
+
+def test_error_is_shared():
+    """Test that waiting callers receive the in-flight computation's exception."""
+    started = threading.Event()
+    release = threading.Event()
+    group = SingleFlight("test_error")
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(group.do, "key", failing)
+        started.wait(5)
+        follower = pool.submit(group.do, "key", failing)
+        time.sleep(0.05)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+def test_waiting_caller_times_out_and_runs_itself():
+    """Test that a caller that waits longer than the timeout computes the result itself."""
+    started = threading.Event()
+    release = threading.Event()
+    group = SingleFlight("test_timeout", timeout=0.05)
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(group.do, "key", slow)
+        started.wait(5)
+        assert group.do("key", lambda: "fresh") == "fresh"
+        release.set()
+        assert leader.result() == "slow"
+
+    assert CALLS.values()[("test_timeout", "timeout")] == 1
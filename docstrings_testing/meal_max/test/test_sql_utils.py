@@ -0,0 +1,314 @@
+import logging
+import os
+import sqlite3
+import time
+
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import (
+    close_read_connections,
+    drop_baseline,
+    get_connection_stats,
+    get_db_connection,
+    get_sql_stats,
+    has_baseline,
+    normalize_sql,
+    read_only,
+    reset_sql_stats,
+    restore_baseline,
+    snapshot_baseline,
+    snapshot_baseline_from_script,
+    snapshot_to_disk,
+    stop_in_memory_database
+)
+from meal_max.utils.retry import deadline
+
+
+@pytest.fixture()
+def traced_db(tmp_path, mocker):
+    """Fixture to provide a small meals database with SQL tracing turned on."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    mocker.patch.object(sql_utils, "SQL_TRACE", True)
+    reset_sql_stats()
+
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT, wins INTEGER DEFAULT 0)")
+        conn.executemany("INSERT INTO meals (meal) VALUES (?)", [(f"Meal {i}",) for i in range(10)])
+        conn.commit()
+
+    yield
+    reset_sql_stats()
+
+
+def test_normalize_sql():
+    """Test that literals, IN lists and whitespace are normalized."""
+    sql = """SELECT * FROM meals
+             WHERE id IN (1, 2, 3) AND meal = 'Pasta' AND price > 9.5;"""
+
+    assert normalize_sql(sql) == "SELECT * FROM meals WHERE id IN (?...) AND meal = ? AND price > ?"
+
+def test_traced_statements_are_aggregated(traced_db):
+    """Test that executions are grouped per normalized statement with their row counts."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for meal_id in (1, 2, 3):
+            cursor.execute(f"SELECT meal FROM meals WHERE id = {meal_id}")
+            cursor.fetchone()
+        conn.execute("UPDATE meals SET wins = wins + 1 WHERE id <= 4")
+        conn.execute("SELECT * FROM meals").fetchall()
+
+    stats = get_sql_stats()
+
+    assert stats["SELECT meal FROM meals WHERE id = ?"]["count"] == 3
+    assert stats["SELECT meal FROM meals WHERE id = ?"]["rows"] == 3
+    assert stats["UPDATE meals SET wins = wins + ? WHERE id <= ?"]["rows"] == 4
+    assert stats["SELECT * FROM meals"]["rows"] == 10
+    assert stats["INSERT INTO meals (meal) VALUES (?)"]["rows"] == 10
+    assert stats["SELECT * FROM meals"]["p99_ms"] >= stats["SELECT * FROM meals"]["p50_ms"] >= 0
+
+def test_slow_query_logged_with_plan(traced_db, mocker, caplog):
+    """Test that statements over the threshold are logged with their query plan."""
+    mocker.patch.object(sql_utils, "SQL_SLOW_QUERY_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="meal_max.utils.sql_utils"):
+        with get_db_connection() as conn:
+            conn.execute("SELECT meal FROM meals WHERE id = ?", (1,)).fetchone()
+
+    assert "Slow query" in caplog.text
+    assert "SEARCH meals USING INTEGER PRIMARY KEY" in caplog.text
+
+def test_tracing_disabled_by_default(tmp_path, mocker):
+    """Test that plain connections are used unless SQL_TRACE is set."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    mocker.patch.object(sql_utils, "SQL_TRACE", False)
+    reset_sql_stats()
+
+    with get_db_connection() as conn:
+        conn.execute("SELECT 1").fetchone()
+
+    assert get_sql_stats() == {}
+
+
+######################################################
+#
+#    In-memory mode
+#
+######################################################
+
+
+@pytest.fixture()
+def in_memory_db(tmp_path, mocker):
+    """Fixture to provide a meals database file with in-memory mode turned on."""
+    path = str(tmp_path / "meal_max.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT)")
+    conn.execute("INSERT INTO meals (meal) VALUES ('Pasta')")
+    conn.commit()
+    conn.close()
+
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    mocker.patch.object(sql_utils, "SQL_IN_MEMORY", True)
+    mocker.patch.object(sql_utils, "SQL_SNAPSHOT_INTERVAL", 0)
+    yield path
+    stop_in_memory_database(snapshot=False)
+
+
+def test_in_memory_loads_from_disk(in_memory_db):
+    """Test that the in-memory database starts as a copy of DB_PATH and is shared by connections."""
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT meal FROM meals").fetchall() == [("Pasta",)]
+        conn.execute("INSERT INTO meals (meal) VALUES ('Tacos')")
+        conn.commit()
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM meals").fetchone() == (2,)
+
+    # The file is untouched until a snapshot
+    disk = sqlite3.connect(in_memory_db)
+    assert disk.execute("SELECT COUNT(*) FROM meals").fetchone() == (1,)
+    disk.close()
+
+def test_snapshot_to_disk(in_memory_db):
+    """Test that a snapshot persists the in-memory database to DB_PATH."""
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO meals (meal) VALUES ('Tacos')")
+        conn.commit()
+
+    snapshot_to_disk()
+
+    disk = sqlite3.connect(in_memory_db)
+    assert disk.execute("SELECT meal FROM meals ORDER BY id").fetchall() == [("Pasta",), ("Tacos",)]
+    disk.close()
+    assert not os.path.exists(in_memory_db + ".snapshot")
+
+
+######################################################
+#
+#    Baselines
+#
+######################################################
+
+
+@pytest.fixture()
+def baseline_db(tmp_path, mocker):
+    """Fixture to provide a meals database file, dropping saved baselines afterwards."""
+    path = str(tmp_path / "meal_max.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT)")
+    conn.commit()
+    conn.close()
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    yield path
+    for name in ("empty", "seeded"):
+        drop_baseline(name)
+
+
+def test_restore_baseline(baseline_db):
+    """Test that restoring a baseline discards everything written since the snapshot."""
+    snapshot_baseline("empty")
+    with get_db_connection() as conn:
+        conn.executemany("INSERT INTO meals (meal) VALUES (?)", [(f"Meal {i}",) for i in range(100)])
+        conn.execute("CREATE TABLE extra (id INTEGER)")
+        conn.commit()
+
+    restore_baseline("empty")
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM meals").fetchone() == (0,)
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    assert tables == [("meals",)]
+
+def test_restore_baseline_from_script_and_file(baseline_db, tmp_path):
+    """Test baselines built from a SQL script and from a seeded fixture file."""
+    fixture = str(tmp_path / "seeded.db")
+    conn = sqlite3.connect(fixture)
+    conn.executescript(
+        "CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT); INSERT INTO meals (meal) VALUES ('Pasta');"
+    )
+    conn.close()
+    snapshot_baseline("seeded", fixture)
+    snapshot_baseline_from_script("empty", "CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT);")
+
+    restore_baseline("seeded")
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT meal FROM meals").fetchall() == [("Pasta",)]
+
+    restore_baseline("empty")
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT meal FROM meals").fetchall() == []
+
+def test_restore_unknown_baseline(baseline_db):
+    """Test error when restoring a baseline that was never saved."""
+    assert not has_baseline("missing")
+
+    with pytest.raises(ValueError, match="No baseline named 'missing'"):
+        restore_baseline("missing")
+
+
+######################################################
+#
+#    Read-only connections
+#
+######################################################
+
+
+@read_only
+def count_meals() -> int:
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0]
+
+@read_only
+def iter_meals():
+    with get_db_connection() as conn:
+        yield from conn.execute("SELECT meal FROM meals ORDER BY id")
+
+@read_only
+def write_meal() -> None:
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO meals (meal) VALUES ('Tacos')")
+
+
+@pytest.fixture()
+def pooled_db(baseline_db):
+    """Fixture to provide a meals database, closing pooled read connections afterwards."""
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO meals (meal) VALUES ('Pasta')")
+        conn.commit()
+    yield baseline_db
+    close_read_connections()
+
+
+def test_read_only_connections_are_pooled(pooled_db, mocker):
+    """Test that @read_only functions reuse one pooled connection and see committed writes."""
+    connect = mocker.spy(sql_utils, "_connect_read_only")
+
+    assert count_meals() == 1
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO meals (meal) VALUES ('Tacos')")
+        conn.commit()
+    assert count_meals() == 2
+    assert [row[0] for row in iter_meals()] == ["Pasta", "Tacos"]
+
+    assert connect.call_count == 1
+    assert get_connection_stats()['idle_read_connections'] == 1
+
+def test_read_only_connections_cannot_write(pooled_db):
+    """Test that a write through a read-only connection fails."""
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        write_meal()
+
+def test_reader_limit(pooled_db, mocker):
+    """Test that a reader waits for a free slot and times out when none frees up."""
+    mocker.patch.object(sql_utils, "SQL_MAX_READERS", 1)
+    mocker.patch.object(sql_utils, "SQL_CONNECTION_WAIT", 0.05)
+
+    rows = iter_meals()
+    next(rows)
+    assert get_connection_stats()['readers']['active'] == 1
+    with pytest.raises(sqlite3.OperationalError, match="waiting for one of 1 read connections"):
+        count_meals()
+
+    rows.close()
+    assert count_meals() == 1
+    assert get_connection_stats()['readers']['active'] == 0
+
+def test_install_sql_functions_registers_sqrt_fallback(mocker):
+    """Test that sqrt is provided on connections when SQLite lacks its math functions."""
+    mocker.patch.object(sql_utils, "_has_math_functions", return_value=False)
+    conn = mocker.Mock()
+
+    sql_utils.install_sql_functions(conn)
+
+    conn.create_function.assert_called_once_with("sqrt", 1, sql_utils._sqrt, deterministic=True)
+    assert [sql_utils._sqrt(value) for value in (4, -1, None)] == [2.0, None, None]
+
+def test_math_functions_probed_once(mocker):
+    """Test that the math function probe opens and closes one connection, however many connections are set up."""
+    sql_utils._has_math_functions.cache_clear()
+    connect = mocker.spy(sqlite3, "connect")
+
+    for _ in range(3):
+        sql_utils.install_sql_functions(mocker.Mock())
+
+    assert connect.call_count == 1
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        connect.spy_return.execute("SELECT 1")
+
+def test_busy_timeout_capped_by_deadline(tmp_path, mocker):
+    """Test that a write connection waits on a locked database no longer than the time left before the deadline."""
+    path = str(tmp_path / "meal_max.db")
+    mocker.patch.object(sql_utils, "DB_PATH", path)
+    blocker = sqlite3.connect(path)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    start = time.monotonic()
+    with deadline(0.2), pytest.raises(sqlite3.OperationalError, match="locked"):
+        with get_db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+    waited = time.monotonic() - start
+    blocker.rollback()
+    blocker.close()
+
+    assert waited < 1
+    assert sql_utils.busy_timeout() == sql_utils.SQL_BUSY_TIMEOUT
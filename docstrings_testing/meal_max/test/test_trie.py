@@ -0,0 +1,51 @@
+import pytest
+
+from meal_max.utils.trie import RadixTrie
+
+
+@pytest.fixture()
+def trie():
+    """Fixture to provide a trie with a few overlapping meal names."""
+    trie = RadixTrie()
+    for row_id, name in enumerate(["Pasta", "Pastrami", "Pad Thai", "Paella", "Pho", "Pasta Bake", "Tacos"], 1):
+        trie.insert(row_id, name)
+    return trie
+
+
+def test_complete_in_alphabetical_order(trie):
+    """Test that completions are case-insensitive and sorted, with a name before its extensions."""
+    assert trie.complete("pas", 10) == [(1, "Pasta"), (6, "Pasta Bake"), (2, "Pastrami")]
+    assert trie.complete("PA", 10) == [(3, "Pad Thai"), (4, "Paella"), (1, "Pasta"), (6, "Pasta Bake"),
+                                       (2, "Pastrami")]
+
+def test_complete_limit_and_misses(trie):
+    """Test that only `limit` completions are returned and unknown prefixes return nothing."""
+    assert trie.complete("p", 2) == [(3, "Pad Thai"), (4, "Paella")]
+    assert trie.complete("pasz", 10) == []
+    assert trie.complete("sushi", 10) == []
+
+def test_prefix_ending_inside_an_edge(trie):
+    """Test a prefix that stops partway along a compressed edge."""
+    assert trie.complete("pastr", 10) == [(2, "Pastrami")]
+    assert trie.complete("pasta b", 10) == [(6, "Pasta Bake")]
+
+def test_remove_merges_nodes(trie):
+    """Test that removed names are no longer completed and the remaining ones still are."""
+    assert trie.remove(1)
+    assert not trie.remove(1)
+
+    assert trie.complete("pas", 10) == [(6, "Pasta Bake"), (2, "Pastrami")]
+    assert trie.remove(6) and trie.remove(2)
+    assert trie.complete("pa", 10) == [(3, "Pad Thai"), (4, "Paella")]
+    assert len(trie) == 4
+    assert 2 not in trie
+
+def test_same_name_different_case():
+    """Test that names equal ignoring case are kept apart by id."""
+    trie = RadixTrie()
+    trie.insert(1, "Pho")
+    trie.insert(2, "PHO")
+
+    trie.remove(1)
+
+    assert trie.complete("pho", 10) == [(2, "PHO")]
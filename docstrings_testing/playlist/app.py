@@ -1,17 +1,100 @@
+import os
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Blueprint, current_app, Flask, jsonify, make_response, Response, request
 
 from music_collection.models import song_model
-from music_collection.models.playlist_model import PlaylistModel
-from music_collection.utils.sql_utils import check_database_connection, check_table_exists
+from music_collection.utils.admission import admit_writes, install_admission_control
+from music_collection.utils.compaction import Compactor
+from music_collection.utils.http_utils import compress_response, stream_json_list
+from music_collection.utils.json_provider import install_json_provider
+from music_collection.utils.metrics import install_metrics
+from music_collection.utils.readiness import ReadinessMonitor
+from music_collection.utils.retry import install_request_deadline
+from music_collection.utils import sql_utils
+
+if TYPE_CHECKING:
+    from music_collection.models.playlist_model import PlaylistModel
+
+
+api = Blueprint('api', __name__)
+
+
+def create_app() -> Flask:
+    """
+    Creates and configures the Flask app.
+
+    Only the app, its hooks and the routes are set up here. The PlaylistModel (and the HTTP client
+    libraries behind random_utils) are created the first time a route needs them; see
+    get_playlist_model.
+
+    Returns:
+        Flask: The configured application.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    app = Flask(__name__)
+
+    # Compress large responses for clients that accept gzip or brotli
+    app.after_request(compress_response)
+
+    # Serialize responses with orjson (or the stdlib fallback) instead of Flask's default provider
+    if os.getenv("FAST_JSON_PROVIDER", "true").lower() == "true":
+        install_json_provider(app)
+
+    # Per-route request counts, errors, latency histograms and in-flight gauges at /api/metrics
+    install_metrics(app)
+
+    # Per-client rate limit and a single-writer queue in front of the write routes (429 when full)
+    install_admission_control(app)
 
+    # Writes retry transient "database is locked" errors until the request's deadline
+    install_request_deadline(app)
 
-# Load environment variables from .env file
-load_dotenv()
+    # Clear by restoring an empty snapshot instead of re-running the create table script
+    if os.getenv("FAST_RESET", "false").lower() == "true":
+        song_model.enable_fast_reset()
 
-app = Flask(__name__)
+    # Seeded fixtures for /api/restore-fixture, given as name=path,name=path
+    for fixture in filter(None, os.getenv("RESET_FIXTURES", "").split(",")):
+        name, _, path = fixture.partition("=")
+        song_model.register_fixture(name.strip(), path.strip())
 
-playlist_model = PlaylistModel()
+    # Archive old soft-deleted songs in the background (POST /api/compact runs a pass on demand)
+    compactor = app.extensions['compactor'] = Compactor("songs")
+    if os.getenv("COMPACTION_ENABLED", "false").lower() == "true":
+        compactor.start()
+
+    app.register_blueprint(api)
+    return app
+
+def get_playlist_model() -> "PlaylistModel":
+    """
+    Returns the app's PlaylistModel, creating it on first use.
+
+    Returns:
+        PlaylistModel: The model shared by every request to this app.
+    """
+    model = current_app.extensions.get('playlist_model')
+    if model is None:
+        from music_collection.models.playlist_model import PlaylistModel
+        model = current_app.extensions.setdefault('playlist_model', PlaylistModel())
+    return model
+
+def get_readiness_monitor() -> ReadinessMonitor:
+    """
+    Returns the app's ReadinessMonitor, starting it on first use.
+
+    Returns:
+        ReadinessMonitor: The monitor checking the database and songs table in the background.
+    """
+    monitor = current_app.extensions.get('readiness_monitor')
+    if monitor is None:
+        monitor = current_app.extensions.setdefault('readiness_monitor', ReadinessMonitor(("songs",)))
+        monitor.start()
+    return monitor
 
 
 ####################################################
@@ -20,7 +103,7 @@ playlist_model = PlaylistModel()
 #
 ####################################################
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def healthcheck() -> Response:
     """
     Health check route to verify the service is running.
@@ -28,30 +111,83 @@ def healthcheck() -> Response:
     Returns:
         JSON response indicating the health status of the service.
     """
-    app.logger.info('Health check')
+    current_app.logger.info('Health check')
     return make_response(jsonify({'status': 'healthy'}), 200)
 
 
-@app.route('/api/db-check', methods=['GET'])
+@api.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
     Route to check if the database connection and songs table are functional.
 
+    Serves the result of the most recent background check (see get_readiness_monitor), so probes
+    do not open database connections.
+
     Returns:
-        JSON response indicating the database health status.
+        JSON response indicating the database health status and how long the check took.
     Raises:
         404 error if there is an issue with the database.
     """
+    status = get_readiness_monitor().status()
+    if not status['ready']:
+        current_app.logger.error("Database check failed: %s", status['error'])
+        return make_response(jsonify({'error': status['error']}), 404)
+    return make_response(jsonify({
+        'database_status': 'healthy',
+        'latency_ms': status['latency_ms'],
+        'age_seconds': status['age_seconds']
+    }), 200)
+
+
+@api.route('/api/ready', methods=['GET'])
+def readiness() -> Response:
+    """
+    Readiness route for orchestrator probes. Liveness is /api/health, which never touches the database.
+
+    Returns:
+        JSON response with the cached readiness result, per-check latencies and its age.
+    Raises:
+        503 error if the last check failed or is older than READINESS_MAX_AGE.
+    """
+    status = get_readiness_monitor().status()
+    return make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@api.route('/api/sql-stats', methods=['GET'])
+def sql_stats() -> Response:
+    """
+    Route to get per-statement SQL timings collected when SQL_TRACE is enabled.
+
+    Returns:
+        JSON response with count, rows and p50/p99 latency for each normalized statement, and the
+        read and write connections in use.
+    """
+    current_app.logger.info("Retrieving SQL stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': sql_utils.SQL_TRACE,
+        'statements': sql_utils.get_sql_stats(),
+        'connections': sql_utils.get_connection_stats()
+    }), 200)
+
+@api.route('/api/compact', methods=['POST'])
+@admit_writes
+def compact() -> Response:
+    """
+    Route to archive soft-deleted songs past the age threshold and reclaim the freed pages now.
+
+    Returns:
+        JSON response with the compaction report (rows archived, batches and reclaimed pages).
+    Raises:
+        500 error if there is an issue compacting the table.
+    """
+    current_app.logger.info("Compacting songs")
     try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if songs table exists...")
-        check_table_exists("songs")
-        app.logger.info("songs table exists.")
-        return make_response(jsonify({'database_status': 'healthy'}), 200)
+        report = current_app.extensions['compactor'].run_now()
+        return make_response(jsonify({'status': 'success', 'report': report}), 200)
     except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
+        current_app.logger.error("Failed to compact songs: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
 
 
 ##########################################################
@@ -60,7 +196,8 @@ def db_check() -> Response:
 #
 ##########################################################
 
-@app.route('/api/create-song', methods=['POST'])
+@api.route('/api/create-song', methods=['POST'])
+@admit_writes
 def add_song() -> Response:
     """
     Route to add a new song to the playlist.
@@ -78,7 +215,7 @@ def add_song() -> Response:
         400 error if input validation fails.
         500 error if there is an issue adding the song to the playlist.
     """
-    app.logger.info('Adding a new song to the catalog')
+    current_app.logger.info('Adding a new song to the catalog')
     try:
         data = request.get_json()
 
@@ -92,15 +229,16 @@ def add_song() -> Response:
             return make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
 
         # Add the song to the playlist
-        app.logger.info('Adding song: %s - %s', artist, title)
+        current_app.logger.info('Adding song: %s - %s', artist, title)
         song_model.create_song(artist=artist, title=title, year=year, genre=genre, duration=duration)
-        app.logger.info("Song added to playlist: %s - %s", artist, title)
+        current_app.logger.info("Song added to playlist: %s - %s", artist, title)
         return make_response(jsonify({'status': 'success', 'song': title}), 201)
     except Exception as e:
-        app.logger.error("Failed to add song: %s", str(e))
+        current_app.logger.error("Failed to add song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/clear-catalog', methods=['DELETE'])
+@api.route('/api/clear-catalog', methods=['DELETE'])
+@admit_writes
 def clear_catalog() -> Response:
     """
     Route to clear the entire song catalog (recreates the table).
@@ -109,14 +247,40 @@ def clear_catalog() -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info("Clearing the song catalog")
+        current_app.logger.info("Clearing the song catalog")
         song_model.clear_catalog()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error clearing catalog: {e}")
+        current_app.logger.error(f"Error clearing catalog: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@api.route('/api/restore-fixture/<string:name>', methods=['POST'])
+@admit_writes
+def restore_fixture(name: str) -> Response:
+    """
+    Route to replace the song catalog with a seeded fixture registered through RESET_FIXTURES.
+
+    Path Parameter:
+        - name (str): The name of the fixture.
+
+    Returns:
+        JSON response indicating success of the operation or error message.
+    Raises:
+        400 error if no fixture with this name is registered.
+        500 error if there is an issue restoring the fixture.
+    """
+    try:
+        current_app.logger.info(f"Restoring fixture: {name}")
+        song_model.restore_fixture(name)
+        return make_response(jsonify({'status': 'success', 'fixture': name}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        current_app.logger.error(f"Error restoring fixture: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/delete-song/<int:song_id>', methods=['DELETE'])
+@api.route('/api/delete-song/<int:song_id>', methods=['DELETE'])
+@admit_writes
 def delete_song(song_id: int) -> Response:
     """
     Route to delete a song by its ID (soft delete).
@@ -128,15 +292,15 @@ def delete_song(song_id: int) -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info(f"Deleting song by ID: {song_id}")
+        current_app.logger.info(f"Deleting song by ID: {song_id}")
         song_model.delete_song(song_id)
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error deleting song: {e}")
+        current_app.logger.error(f"Error deleting song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
-@app.route('/api/get-all-songs-from-catalog', methods=['GET'])
+@api.route('/api/get-all-songs-from-catalog', methods=['GET'])
 def get_all_songs() -> Response:
     """
     Route to retrieve all songs in the catalog (non-deleted), with an option to sort by play count.
@@ -151,16 +315,17 @@ def get_all_songs() -> Response:
         # Extract query parameter for sorting by play count
         sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
 
-        app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
-        songs = song_model.get_all_songs(sort_by_play_count=sort_by_play_count)
+        current_app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
+        # Stream the rows straight from the cursor instead of building the whole list
+        songs = song_model.iter_all_songs(sort_by_play_count=sort_by_play_count)
 
-        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+        return stream_json_list({'status': 'success'}, 'songs', songs)
     except Exception as e:
-        app.logger.error(f"Error retrieving songs: {e}")
+        current_app.logger.error(f"Error retrieving songs: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
-@app.route('/api/get-song-from-catalog-by-id/<int:song_id>', methods=['GET'])
+@api.route('/api/get-song-from-catalog-by-id/<int:song_id>', methods=['GET'])
 def get_song_by_id(song_id: int) -> Response:
     """
     Route to retrieve a song by its ID.
@@ -172,14 +337,14 @@ def get_song_by_id(song_id: int) -> Response:
         JSON response with the song details or error message.
     """
     try:
-        app.logger.info(f"Retrieving song by ID: {song_id}")
+        current_app.logger.info(f"Retrieving song by ID: {song_id}")
         song = song_model.get_song_by_id(song_id)
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving song by ID: {e}")
+        current_app.logger.error(f"Error retrieving song by ID: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-song-from-catalog-by-compound-key', methods=['GET'])
+@api.route('/api/get-song-from-catalog-by-compound-key', methods=['GET'])
 def get_song_by_compound_key() -> Response:
     """
     Route to retrieve a song by its compound key (artist, title, year).
@@ -207,15 +372,15 @@ def get_song_by_compound_key() -> Response:
         except ValueError:
             return make_response(jsonify({'error': 'Year must be an integer'}), 400)
 
-        app.logger.info(f"Retrieving song by compound key: {artist}, {title}, {year}")
+        current_app.logger.info(f"Retrieving song by compound key: {artist}, {title}, {year}")
         song = song_model.get_song_by_compound_key(artist, title, year)
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving song by compound key: {e}")
+        current_app.logger.error(f"Error retrieving song by compound key: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-random-song', methods=['GET'])
+@api.route('/api/get-random-song', methods=['GET'])
 def get_random_song() -> Response:
     """
     Route to retrieve a random song from the catalog.
@@ -224,11 +389,11 @@ def get_random_song() -> Response:
         JSON response with the details of a random song or error message.
     """
     try:
-        app.logger.info("Retrieving a random song from the catalog")
+        current_app.logger.info("Retrieving a random song from the catalog")
         song = song_model.get_random_song()
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving a random song: {e}")
+        current_app.logger.error(f"Error retrieving a random song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -238,7 +403,7 @@ def get_random_song() -> Response:
 #
 ############################################################
 
-@app.route('/api/add-song-to-playlist', methods=['POST'])
+@api.route('/api/add-song-to-playlist', methods=['POST'])
 def add_song_to_playlist() -> Response:
     """
     Route to add a song to the playlist by compound key (artist, title, year).
@@ -265,16 +430,16 @@ def add_song_to_playlist() -> Response:
         song = song_model.get_song_by_compound_key(artist, title, year)
 
         # Add song to playlist
-        playlist_model.add_song_to_playlist(song)
+        get_playlist_model().add_song_to_playlist(song)
 
-        app.logger.info(f"Song added to playlist: {artist} - {title} ({year})")
+        current_app.logger.info(f"Song added to playlist: {artist} - {title} ({year})")
         return make_response(jsonify({'status': 'success', 'message': 'Song added to playlist'}), 201)
 
     except Exception as e:
-        app.logger.error(f"Error adding song to playlist: {e}")
+        current_app.logger.error(f"Error adding song to playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/remove-song-from-playlist', methods=['DELETE'])
+@api.route('/api/remove-song-from-playlist', methods=['DELETE'])
 def remove_song_by_song_id() -> Response:
     """
     Route to remove a song from the playlist by compound key (artist, title, year).
@@ -301,16 +466,16 @@ def remove_song_by_song_id() -> Response:
         song = song_model.get_song_by_compound_key(artist, title, year)
 
         # Remove song from playlist
-        playlist_model.remove_song_by_song_id(song.id)
+        get_playlist_model().remove_song_by_song_id(song.id)
 
-        app.logger.info(f"Song removed from playlist: {artist} - {title} ({year})")
+        current_app.logger.info(f"Song removed from playlist: {artist} - {title} ({year})")
         return make_response(jsonify({'status': 'success', 'message': 'Song removed from playlist'}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error removing song from playlist: {e}")
+        current_app.logger.error(f"Error removing song from playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/remove-song-from-playlist-by-track-number/<int:track_number>', methods=['DELETE'])
+@api.route('/api/remove-song-from-playlist-by-track-number/<int:track_number>', methods=['DELETE'])
 def remove_song_by_track_number(track_number: int) -> Response:
     """
     Route to remove a song from the playlist by track number.
@@ -322,21 +487,21 @@ def remove_song_by_track_number(track_number: int) -> Response:
         JSON response indicating success of the removal or an error message.
     """
     try:
-        app.logger.info(f"Removing song from playlist by track number: {track_number}")
+        current_app.logger.info(f"Removing song from playlist by track number: {track_number}")
 
         # Remove song by track number
-        playlist_model.remove_song_by_track_number(track_number)
+        get_playlist_model().remove_song_by_track_number(track_number)
 
         return make_response(jsonify({'status': 'success', 'message': f'Song at track number {track_number} removed from playlist'}), 200)
 
     except ValueError as e:
-        app.logger.error(f"Error removing song by track number: {e}")
+        current_app.logger.error(f"Error removing song by track number: {e}")
         return make_response(jsonify({'error': str(e)}), 404)
     except Exception as e:
-        app.logger.error(f"Error removing song from playlist: {e}")
+        current_app.logger.error(f"Error removing song from playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/clear-playlist', methods=['POST'])
+@api.route('/api/clear-playlist', methods=['POST'])
 def clear_playlist() -> Response:
     """
     Route to clear all songs from the playlist.
@@ -345,15 +510,15 @@ def clear_playlist() -> Response:
         JSON response indicating success of the operation or an error message.
     """
     try:
-        app.logger.info('Clearing the playlist')
+        current_app.logger.info('Clearing the playlist')
 
         # Clear the entire playlist
-        playlist_model.clear_playlist()
+        get_playlist_model().clear_playlist()
 
         return make_response(jsonify({'status': 'success', 'message': 'Playlist cleared'}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error clearing the playlist: {e}")
+        current_app.logger.error(f"Error clearing the playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 ############################################################
@@ -362,7 +527,8 @@ def clear_playlist() -> Response:
 #
 ############################################################
 
-@app.route('/api/play-current-song', methods=['POST'])
+@api.route('/api/play-current-song', methods=['POST'])
+@admit_writes
 def play_current_song() -> Response:
     """
     Route to play the current song in the playlist.
@@ -373,9 +539,9 @@ def play_current_song() -> Response:
         500 error if there is an issue playing the current song.
     """
     try:
-        app.logger.info('Playing current song')
-        current_song = playlist_model.get_current_song()
-        playlist_model.play_current_song()
+        current_app.logger.info('Playing current song')
+        current_song = get_playlist_model().get_current_song()
+        get_playlist_model().play_current_song()
 
         return make_response(jsonify({
             'status': 'success',
@@ -389,11 +555,12 @@ def play_current_song() -> Response:
             }
         }), 200)
     except Exception as e:
-        app.logger.error(f"Error playing current song: {e}")
+        current_app.logger.error(f"Error playing current song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
-@app.route('/api/play-entire-playlist', methods=['POST'])
+@api.route('/api/play-entire-playlist', methods=['POST'])
+@admit_writes
 def play_entire_playlist() -> Response:
     """
     Route to play all songs in the playlist.
@@ -404,14 +571,15 @@ def play_entire_playlist() -> Response:
         500 error if there is an issue playing the playlist.
     """
     try:
-        app.logger.info('Playing entire playlist')
-        playlist_model.play_entire_playlist()
+        current_app.logger.info('Playing entire playlist')
+        get_playlist_model().play_entire_playlist()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error playing playlist: {e}")
+        current_app.logger.error(f"Error playing playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/play-rest-of-playlist', methods=['POST'])
+@api.route('/api/play-rest-of-playlist', methods=['POST'])
+@admit_writes
 def play_rest_of_playlist() -> Response:
     """
     Route to play the rest of the playlist from the current track.
@@ -422,14 +590,14 @@ def play_rest_of_playlist() -> Response:
         500 error if there is an issue playing the rest of the playlist.
     """
     try:
-        app.logger.info('Playing rest of the playlist')
-        playlist_model.play_rest_of_playlist()
+        current_app.logger.info('Playing rest of the playlist')
+        get_playlist_model().play_rest_of_playlist()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error playing rest of the playlist: {e}")
+        current_app.logger.error(f"Error playing rest of the playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/rewind-playlist', methods=['POST'])
+@api.route('/api/rewind-playlist', methods=['POST'])
 def rewind_playlist() -> Response:
     """
     Route to rewind the playlist to the first song.
@@ -440,14 +608,14 @@ def rewind_playlist() -> Response:
         500 error if there is an issue rewinding the playlist.
     """
     try:
-        app.logger.info('Rewinding playlist to the first song')
-        playlist_model.rewind_playlist()
+        current_app.logger.info('Rewinding playlist to the first song')
+        get_playlist_model().rewind_playlist()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error rewinding playlist: {e}")
+        current_app.logger.error(f"Error rewinding playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-all-songs-from-playlist', methods=['GET'])
+@api.route('/api/get-all-songs-from-playlist', methods=['GET'])
 def get_all_songs_from_playlist() -> Response:
     """
     Route to retrieve all songs in the playlist.
@@ -456,18 +624,18 @@ def get_all_songs_from_playlist() -> Response:
         JSON response with the list of songs or an error message.
     """
     try:
-        app.logger.info("Retrieving all songs from the playlist")
+        current_app.logger.info("Retrieving all songs from the playlist")
 
         # Get all songs from the playlist
-        songs = playlist_model.get_all_songs()
+        songs = get_playlist_model().get_all_songs()
 
         return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving songs from playlist: {e}")
+        current_app.logger.error(f"Error retrieving songs from playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-song-from-playlist-by-track-number/<int:track_number>', methods=['GET'])
+@api.route('/api/get-song-from-playlist-by-track-number/<int:track_number>', methods=['GET'])
 def get_song_by_track_number(track_number: int) -> Response:
     """
     Route to retrieve a song by its track number from the playlist.
@@ -479,21 +647,21 @@ def get_song_by_track_number(track_number: int) -> Response:
         JSON response with the song details or error message.
     """
     try:
-        app.logger.info(f"Retrieving song from playlist by track number: {track_number}")
+        current_app.logger.info(f"Retrieving song from playlist by track number: {track_number}")
 
         # Get the song by track number
-        song = playlist_model.get_song_by_track_number(track_number)
+        song = get_playlist_model().get_song_by_track_number(track_number)
 
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
 
     except ValueError as e:
-        app.logger.error(f"Error retrieving song by track number: {e}")
+        current_app.logger.error(f"Error retrieving song by track number: {e}")
         return make_response(jsonify({'error': str(e)}), 404)
     except Exception as e:
-        app.logger.error(f"Error retrieving song from playlist: {e}")
+        current_app.logger.error(f"Error retrieving song from playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-current-song', methods=['GET'])
+@api.route('/api/get-current-song', methods=['GET'])
 def get_current_song() -> Response:
     """
     Route to retrieve the current song being played.
@@ -502,18 +670,18 @@ def get_current_song() -> Response:
         JSON response with the current song details or error message.
     """
     try:
-        app.logger.info("Retrieving the current song from the playlist")
+        current_app.logger.info("Retrieving the current song from the playlist")
 
         # Get the current song
-        current_song = playlist_model.get_current_song()
+        current_song = get_playlist_model().get_current_song()
 
         return make_response(jsonify({'status': 'success', 'current_song': current_song}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving current song: {e}")
+        current_app.logger.error(f"Error retrieving current song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/get-playlist-length-duration', methods=['GET'])
+@api.route('/api/get-playlist-length-duration', methods=['GET'])
 def get_playlist_length_and_duration() -> Response:
     """
     Route to retrieve both the length (number of songs) and the total duration of the playlist.
@@ -522,11 +690,11 @@ def get_playlist_length_and_duration() -> Response:
         JSON response with the playlist length and total duration or error message.
     """
     try:
-        app.logger.info("Retrieving playlist length and total duration")
+        current_app.logger.info("Retrieving playlist length and total duration")
 
         # Get playlist length and duration
-        playlist_length = playlist_model.get_playlist_length()
-        playlist_duration = playlist_model.get_playlist_duration()
+        playlist_length = get_playlist_model().get_playlist_length()
+        playlist_duration = get_playlist_model().get_playlist_duration()
 
         return make_response(jsonify({
             'status': 'success',
@@ -535,10 +703,10 @@ def get_playlist_length_and_duration() -> Response:
         }), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving playlist length and duration: {e}")
+        current_app.logger.error(f"Error retrieving playlist length and duration: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/go-to-track-number/<int:track_number>', methods=['POST'])
+@api.route('/api/go-to-track-number/<int:track_number>', methods=['POST'])
 def go_to_track_number(track_number: int) -> Response:
     """
     Route to set the playlist to start playing from a specific track number.
@@ -550,17 +718,17 @@ def go_to_track_number(track_number: int) -> Response:
         JSON response indicating success or an error message.
     """
     try:
-        app.logger.info(f"Going to track number: {track_number}")
+        current_app.logger.info(f"Going to track number: {track_number}")
 
         # Set the playlist to start at the given track number
-        playlist_model.go_to_track_number(track_number)
+        get_playlist_model().go_to_track_number(track_number)
 
         return make_response(jsonify({'status': 'success', 'track_number': track_number}), 200)
     except ValueError as e:
-        app.logger.error(f"Error going to track number {track_number}: {e}")
+        current_app.logger.error(f"Error going to track number {track_number}: {e}")
         return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
-        app.logger.error(f"Error going to track number: {e}")
+        current_app.logger.error(f"Error going to track number: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 ############################################################
@@ -569,7 +737,7 @@ def go_to_track_number(track_number: int) -> Response:
 #
 ############################################################
 
-@app.route('/api/move-song-to-beginning', methods=['POST'])
+@api.route('/api/move-song-to-beginning', methods=['POST'])
 def move_song_to_beginning() -> Response:
     """
     Route to move a song to the beginning of the playlist.
@@ -589,18 +757,18 @@ def move_song_to_beginning() -> Response:
         title = data.get('title')
         year = data.get('year')
 
-        app.logger.info(f"Moving song to beginning: {artist} - {title} ({year})")
+        current_app.logger.info(f"Moving song to beginning: {artist} - {title} ({year})")
 
         # Retrieve song by compound key and move it to the beginning
         song = song_model.get_song_by_compound_key(artist, title, year)
-        playlist_model.move_song_to_beginning(song.id)
+        get_playlist_model().move_song_to_beginning(song.id)
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to beginning: {e}")
+        current_app.logger.error(f"Error moving song to beginning: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/move-song-to-end', methods=['POST'])
+@api.route('/api/move-song-to-end', methods=['POST'])
 def move_song_to_end() -> Response:
     """
     Route to move a song to the end of the playlist.
@@ -620,18 +788,18 @@ def move_song_to_end() -> Response:
         title = data.get('title')
         year = data.get('year')
 
-        app.logger.info(f"Moving song to end: {artist} - {title} ({year})")
+        current_app.logger.info(f"Moving song to end: {artist} - {title} ({year})")
 
         # Retrieve song by compound key and move it to the end
         song = song_model.get_song_by_compound_key(artist, title, year)
-        playlist_model.move_song_to_end(song.id)
+        get_playlist_model().move_song_to_end(song.id)
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to end: {e}")
+        current_app.logger.error(f"Error moving song to end: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/move-song-to-track-number', methods=['POST'])
+@api.route('/api/move-song-to-track-number', methods=['POST'])
 def move_song_to_track_number() -> Response:
     """
     Route to move a song to a specific track number in the playlist.
@@ -653,18 +821,18 @@ def move_song_to_track_number() -> Response:
         year = data.get('year')
         track_number = data.get('track_number')
 
-        app.logger.info(f"Moving song to track number {track_number}: {artist} - {title} ({year})")
+        current_app.logger.info(f"Moving song to track number {track_number}: {artist} - {title} ({year})")
 
         # Retrieve song by compound key and move it to the specified track number
         song = song_model.get_song_by_compound_key(artist, title, year)
-        playlist_model.move_song_to_track_number(song.id, track_number)
+        get_playlist_model().move_song_to_track_number(song.id, track_number)
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}', 'track_number': track_number}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to track number: {e}")
+        current_app.logger.error(f"Error moving song to track number: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
-@app.route('/api/swap-songs-in-playlist', methods=['POST'])
+@api.route('/api/swap-songs-in-playlist', methods=['POST'])
 def swap_songs_in_playlist() -> Response:
     """
     Route to swap two songs in the playlist by their track numbers.
@@ -682,12 +850,12 @@ def swap_songs_in_playlist() -> Response:
         track_number_1 = data.get('track_number_1')
         track_number_2 = data.get('track_number_2')
 
-        app.logger.info(f"Swapping songs at track numbers {track_number_1} and {track_number_2}")
+        current_app.logger.info(f"Swapping songs at track numbers {track_number_1} and {track_number_2}")
 
         # Retrieve songs by track numbers and swap them
-        song_1 = playlist_model.get_song_by_track_number(track_number_1)
-        song_2 = playlist_model.get_song_by_track_number(track_number_2)
-        playlist_model.swap_songs_in_playlist(song_1.id, song_2.id)
+        song_1 = get_playlist_model().get_song_by_track_number(track_number_1)
+        song_2 = get_playlist_model().get_song_by_track_number(track_number_2)
+        get_playlist_model().swap_songs_in_playlist(song_1.id, song_2.id)
 
         return make_response(jsonify({
             'status': 'success',
@@ -697,7 +865,7 @@ def swap_songs_in_playlist() -> Response:
             }
         }), 200)
     except Exception as e:
-        app.logger.error(f"Error swapping songs in playlist: {e}")
+        current_app.logger.error(f"Error swapping songs in playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 ############################################################
@@ -706,7 +874,7 @@ def swap_songs_in_playlist() -> Response:
 #
 ############################################################
 
-@app.route('/api/song-leaderboard', methods=['GET'])
+@api.route('/api/song-leaderboard', methods=['GET'])
 def get_song_leaderboard() -> Response:
     """
     Route to get a list of all sorted by play count.
@@ -717,13 +885,13 @@ def get_song_leaderboard() -> Response:
         500 error if there is an issue generating the leaderboard.
     """
     try:
-        app.logger.info("Generating song leaderboard sorted")
-        leaderboard_data = song_model.get_all_songs(sort_by_play_count=True)
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        current_app.logger.info("Generating song leaderboard sorted")
+        leaderboard_data = song_model.iter_all_songs(sort_by_play_count=True)
+        return stream_json_list({'status': 'success'}, 'leaderboard', leaderboard_data)
     except Exception as e:
-        app.logger.error(f"Error generating leaderboard: {e}")
+        current_app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
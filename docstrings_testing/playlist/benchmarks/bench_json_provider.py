@@ -0,0 +1,97 @@
+"""
+Benchmark comparing Flask's default JSON provider with FastJSONProvider.
+
+Serializes a catalog of plain dicts and a list of Song dataclasses, the two response
+shapes the routes produce, and reports the best wall time over several repeats.
+
+Usage:
+    python -m benchmarks.bench_json_provider [--rows 100000] [--repeat 5] [--json results.json]
+"""
+import argparse
+import contextlib
+import json
+import time
+from typing import Any, Callable
+from unittest import mock
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from music_collection.models.song_model import Song
+from music_collection.utils import json_provider
+from music_collection.utils.json_provider import FastJSONProvider
+
+
+def build_catalog(rows: int) -> list[dict[str, Any]]:
+    """Builds a song catalog response body of `rows` entries."""
+    return [
+        {
+            'id': i,
+            'artist': f'Artist {i}',
+            'title': f'Song {i}',
+            'year': 2001,
+            'genre': 'Pop',
+            'duration': 215,
+            'play_count': i % 97
+        }
+        for i in range(rows)
+    ]
+
+def build_songs(rows: int) -> list[Song]:
+    """Builds `rows` Song dataclasses."""
+    return [Song(id=i, artist=f'Artist {i}', title=f'Song {i}', year=2001, genre='Pop', duration=215) for i in range(rows)]
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    """Returns the best wall time in seconds of `repeat` calls to fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(rows: int, repeat: int) -> list[dict[str, Any]]:
+    """Times every provider against every payload."""
+    payloads = {
+        'catalog_dicts': {'status': 'success', 'songs': build_catalog(rows)},
+        'song_dataclasses': {'status': 'success', 'songs': build_songs(rows)},
+    }
+
+    app = Flask(__name__)
+    providers = {'flask_default': DefaultJSONProvider(app), 'fast_stdlib': FastJSONProvider(app)}
+    if json_provider.orjson is not None:
+        providers['fast_orjson'] = FastJSONProvider(app)
+
+    results = []
+    with app.app_context():
+        for payload_name, payload in payloads.items():
+            for provider_name, provider in providers.items():
+                # The stdlib fallback is measured by hiding orjson from the provider
+                if provider_name == 'fast_stdlib':
+                    encoder = mock.patch.object(json_provider, 'orjson', None)
+                else:
+                    encoder = contextlib.nullcontext()
+                with encoder:
+                    seconds = best_time(lambda: provider.response(payload).get_data(), repeat)
+                results.append({'payload': payload_name, 'provider': provider_name, 'rows': rows, 'seconds': seconds})
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of rows per response')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed repeats (best is reported)')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+
+    print(f"{'payload':<20} {'provider':<15} {'ms':>10}")
+    for result in results:
+        print(f"{result['payload']:<20} {result['provider']:<15} {result['seconds'] * 1000:>10.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == '__main__':
+    main()
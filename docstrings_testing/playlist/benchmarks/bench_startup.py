@@ -0,0 +1,122 @@
+"""
+Startup-time benchmark and budget check for the Flask app.
+
+Each repeat runs in a fresh interpreter, so nothing is cached between runs:
+
+    process       interpreter start + `import app` + create_app() + the first /api/health request
+                  through the test client (what every test run and worker pays)
+    import        `import app` alone
+    create_app    create_app() alone
+    first_request the first /api/health request
+    server_ready  launching the app with `flask run` until /api/health answers over HTTP (what the
+                  container entrypoint pays before the service is usable)
+
+The median of each phase is reported. The run fails (exit code 1) if the median `process` time
+exceeds `--budget-ms` or the median `server_ready` time exceeds `--server-budget-ms`.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5] [--budget-ms 1000] [--server-budget-ms 3000]
+        [--json results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+import urllib.error
+import urllib.request
+
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+flask_app.test_client().get('/api/health')
+served = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported, 'first_request': served - created}))
+"""
+
+
+def probe_env() -> dict[str, str]:
+    """Environment for the measured processes, pointing the app at a scratch database."""
+    tmpdir = tempfile.mkdtemp(prefix="playlist_startup_")
+    return dict(os.environ, DB_PATH=os.path.join(tmpdir, "song_catalog.db"))
+
+def measure_process(env: dict[str, str]) -> dict[str, float]:
+    """Runs PROBE in a fresh interpreter and returns its phase timings in seconds."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - start
+    return timings
+
+def free_port() -> int:
+    """Returns a port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_server_ready(env: dict[str, str], timeout: float = 30) -> float:
+    """Starts the app with `flask run` and returns the seconds until /api/health answers."""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--no-reload"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1):
+                    return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"The app did not answer /api/health within {timeout} seconds")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per measurement (median is reported)')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1000")),
+                        help='Budget for the median process time')
+    parser.add_argument('--server-budget-ms', type=float, default=float(os.getenv("SERVER_STARTUP_BUDGET_MS", "3000")),
+                        help='Budget for the median server_ready time')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this file as JSON')
+    args = parser.parse_args()
+
+    env = probe_env()
+    runs = [measure_process(env) for _ in range(args.repeat)]
+    medians: dict[str, Any] = {phase: statistics.median(run[phase] * 1000 for run in runs) for phase in runs[0]}
+    medians['server_ready'] = statistics.median(measure_server_ready(env) * 1000 for _ in range(args.repeat))
+
+    budgets = {'process': args.budget_ms, 'server_ready': args.server_budget_ms}
+    print(f"{'phase':<14} {'median ms':>10} {'budget ms':>10}")
+    for phase in ('import', 'create_app', 'first_request', 'process', 'server_ready'):
+        budget = f"{budgets[phase]:>10.0f}" if phase in budgets else ""
+        print(f"{phase:<14} {medians[phase]:>10.1f} {budget}")
+
+    over = [phase for phase, budget in budgets.items() if medians[phase] > budget]
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump({'median_ms': medians, 'budget_ms': budgets, 'over_budget': over}, fh, indent=2)
+
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
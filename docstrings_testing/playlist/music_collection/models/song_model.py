@@ -2,16 +2,33 @@ from dataclasses import dataclass
 import logging
 import os
 import sqlite3
+from typing import Any, Iterator, Optional
 
+from music_collection.utils.compaction import is_archived
 from music_collection.utils.logger import configure_logger
 from music_collection.utils.random_utils import get_random
-from music_collection.utils.sql_utils import get_db_connection
+from music_collection.utils.retry import retry_on_busy
+from music_collection.utils.sql_utils import (
+    get_db_connection,
+    has_baseline,
+    read_only,
+    restore_baseline,
+    snapshot_baseline,
+    snapshot_baseline_from_script
+)
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Number of rows read per fetchmany() call when streaming large result sets
+FETCH_BATCH_SIZE = int(os.getenv("FETCH_BATCH_SIZE", "500"))
+
+# sql_utils baseline holding an empty songs table (see enable_fast_reset)
+EMPTY_BASELINE = "songs_empty"
+
+
 @dataclass
 class Song:
     id: int
@@ -28,6 +45,7 @@ class Song:
             raise ValueError(f"Year must be greater than 1900, got {self.year}")
 
 
+@retry_on_busy
 def create_song(artist: str, title: str, year: int, genre: str, duration: int) -> None:
     """
     Creates a new song in the songs table.
@@ -73,10 +91,18 @@ def clear_catalog() -> None:
     """
     Recreates the songs table, effectively deleting all songs.
 
+    Restores the empty baseline if enable_fast_reset has been called, otherwise runs the create
+    table script.
+
     Raises:
         sqlite3.Error: If any database error occurs.
     """
     try:
+        if has_baseline(EMPTY_BASELINE):
+            restore_baseline(EMPTY_BASELINE)
+            logger.info("Catalog cleared successfully.")
+            return
+
         with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_song_table.sql"), "r") as fh:
             create_table_script = fh.read()
         with get_db_connection() as conn:
@@ -90,6 +116,53 @@ def clear_catalog() -> None:
         logger.error("Database error while clearing catalog: %s", str(e))
         raise e
 
+def enable_fast_reset() -> None:
+    """
+    Snapshots an empty songs table so clear_catalog restores it instead of re-running the create
+    table script.
+
+    Raises:
+        sqlite3.Error: If the create table script fails.
+    """
+    with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_song_table.sql"), "r") as fh:
+        snapshot_baseline_from_script(EMPTY_BASELINE, fh.read())
+
+def register_fixture(name: str, path: Optional[str] = None) -> None:
+    """
+    Saves a seeded database as a named fixture for restore_fixture.
+
+    Args:
+        name (str): The fixture name.
+        path (Optional[str]): A database file holding the fixture. Defaults to the current catalog.
+
+    Raises:
+        sqlite3.Error: If the fixture cannot be read.
+    """
+    snapshot_baseline(f"fixture:{name}", path)
+    logger.info("Fixture %s registered", name)
+
+def restore_fixture(name: str) -> None:
+    """
+    Replaces the catalog with a fixture saved by register_fixture.
+
+    Args:
+        name (str): The fixture name.
+
+    Raises:
+        ValueError: If no fixture with this name has been registered.
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        restore_baseline(f"fixture:{name}")
+        logger.info("Fixture %s restored", name)
+    except ValueError:
+        logger.error("Fixture %s has not been registered", name)
+        raise ValueError(f"Fixture {name} has not been registered")
+    except sqlite3.Error as e:
+        logger.error("Database error while restoring fixture %s: %s", name, str(e))
+        raise e
+
+@retry_on_busy
 def delete_song(song_id: int) -> None:
     """
     Soft deletes a song from the catalog by marking it as deleted.
@@ -113,6 +186,9 @@ def delete_song(song_id: int) -> None:
                     logger.info("Song with ID %s has already been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has already been deleted")
             except TypeError:
+                if is_archived(cursor, "songs", song_id):
+                    logger.info("Song with ID %s has been archived", song_id)
+                    raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
@@ -126,6 +202,7 @@ def delete_song(song_id: int) -> None:
         logger.error("Database error while deleting song: %s", str(e))
         raise e
 
+@read_only
 def get_song_by_id(song_id: int) -> Song:
     """
     Retrieves a song from the catalog by its song ID.
@@ -157,6 +234,9 @@ def get_song_by_id(song_id: int) -> Song:
                 logger.info("Song with ID %s found", song_id)
                 return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
             else:
+                if is_archived(cursor, "songs", song_id):
+                    logger.info("Song with ID %s has been archived", song_id)
+                    raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
@@ -164,6 +244,7 @@ def get_song_by_id(song_id: int) -> Song:
         logger.error("Database error while retrieving song by ID %s: %s", song_id, str(e))
         raise e
 
+@read_only
 def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
     """
     Retrieves a song from the catalog by its compound key (artist, title, year).
@@ -204,6 +285,7 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
+@read_only
 def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
@@ -257,6 +339,64 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+@read_only
+def iter_all_songs(sort_by_play_count: bool = False, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[dict[str, Any]]:
+    """
+    Lazily retrieves all songs that are not marked as deleted, reading rows in batches.
+
+    Produces the same dictionaries as get_all_songs, but only `batch_size` rows are held in
+    memory at a time. The database connection stays open until the iterator is exhausted or closed.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        batch_size (int): The number of rows fetched from the cursor at a time.
+
+    Yields:
+        dict[str, Any]: A dictionary representing a non-deleted song with play_count.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    query = """
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    if sort_by_play_count:
+        query += " ORDER BY play_count DESC"
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Streaming all non-deleted songs from the catalog")
+            cursor.execute(query)
+
+            count = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                for row in rows:
+                    yield {
+                        "id": row[0],
+                        "artist": row[1],
+                        "title": row[2],
+                        "year": row[3],
+                        "genre": row[4],
+                        "duration": row[5],
+                        "play_count": row[6],
+                    }
+
+            if not count:
+                logger.warning("The song catalog is empty.")
+            logger.info("Streamed %d songs from the catalog", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming all songs: %s", str(e))
+        raise e
+
+@read_only
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -293,6 +433,7 @@ def get_random_song() -> Song:
         logger.error("Error while retrieving random song: %s", str(e))
         raise e
 
+@retry_on_busy
 def update_play_count(song_id: int) -> None:
     """
     Increments the play count of a song by song ID.
@@ -317,6 +458,9 @@ def update_play_count(song_id: int) -> None:
                     logger.info("Song with ID %d has been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has been deleted")
             except TypeError:
+                if is_archived(cursor, "songs", song_id):
+                    logger.info("Song with ID %d has been archived", song_id)
+                    raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %d not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
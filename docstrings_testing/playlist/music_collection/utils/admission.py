@@ -0,0 +1,304 @@
+import contextlib
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from flask import current_app, Flask, jsonify, make_response, request, Response
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Turn admission control for the write routes on or off
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+# Sustained write requests per second allowed per client (0 disables the per-client limit)
+ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "50"))
+# Write requests a client may send at once before being held to ADMISSION_CLIENT_RATE
+ADMISSION_CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", "100"))
+# Header identifying the client (e.g. X-Forwarded-For behind a proxy); the remote address if unset
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "")
+# Write requests served at once; SQLite has a single writer, so more only queue on the file lock
+ADMISSION_MAX_WRITERS = int(os.getenv("ADMISSION_MAX_WRITERS", "1"))
+# Write requests allowed to wait for a writer slot, and how long each may wait, before 429s
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "2"))
+# Client buckets kept before idle (full) ones are dropped
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "admission_queue_depth", "Write requests waiting for a writer slot.")
+WRITERS_ACTIVE = REGISTRY.gauge(
+    "admission_writers_active", "Write requests currently holding a writer slot.")
+REJECTIONS = REGISTRY.counter(
+    "admission_rejections_total", "Write requests rejected with 429, by reason.", ("reason",))
+WAIT = REGISTRY.histogram(
+    "admission_wait_seconds", "Time write requests waited for a writer slot.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class TokenBuckets:
+    """
+    One token bucket per client: each request takes a token, and tokens refill at `rate` per
+    second up to `burst`.
+
+    Attributes:
+        rate (float): Tokens added per second (0 disables the limit).
+        burst (float): The bucket size.
+    """
+
+    def __init__(self, rate: float = ADMISSION_CLIENT_RATE, burst: float = ADMISSION_CLIENT_BURST,
+                 max_clients: int = ADMISSION_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> [tokens, monotonic time of the last update]
+        self._buckets: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """
+        Takes a token from the client's bucket.
+
+        Args:
+            client (str): The client identifier.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one will be available.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[client] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now: float) -> None:
+        """
+        Drops the buckets that have refilled completely; they are recreated full when needed.
+        """
+        full = [client for client, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate >= self.burst]
+        for client in full:
+            del self._buckets[client]
+
+
+class WriterGate:
+    """
+    Limits how many write requests run at once, with a bounded queue for the rest.
+
+    Attributes:
+        limit (int): Write requests served at once.
+        max_queue (int): Requests allowed to wait; further ones are rejected immediately.
+        max_wait (float): Seconds a request waits for a slot before it is rejected.
+    """
+
+    def __init__(self, limit: int = ADMISSION_MAX_WRITERS, max_queue: int = ADMISSION_MAX_QUEUE,
+                 max_wait: float = ADMISSION_MAX_WAIT):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def enter(self) -> Optional[str]:
+        """
+        Takes a writer slot, waiting up to max_wait for one.
+
+        Returns:
+            Optional[str]: None once a slot is held, otherwise why the request was rejected
+                           ('queue_full' or 'timeout').
+        """
+        start = time.perf_counter()
+        with self._cond:
+            if self.active >= self.limit:
+                if self.waiting >= self.max_queue:
+                    return 'queue_full'
+                self.waiting += 1
+                QUEUE_DEPTH.inc()
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.limit, timeout=self.max_wait)
+                finally:
+                    self.waiting -= 1
+                    QUEUE_DEPTH.dec()
+                if not admitted:
+                    return 'timeout'
+            self.active += 1
+        WRITERS_ACTIVE.inc()
+        WAIT.observe(time.perf_counter() - start)
+        return None
+
+    def leave(self) -> None:
+        """
+        Releases a writer slot taken by enter.
+        """
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+        WRITERS_ACTIVE.dec()
+
+
+class WriterSlotUnavailable(Exception):
+    """
+    Raised by writer_slot when no writer slot could be taken.
+
+    Attributes:
+        reason (str): Why the request was rejected ('queue_full' or 'timeout').
+        retry_after (float): Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many write requests ({reason}), retry later")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission control for write routes: a per-client token bucket, then a global writer limit.
+    """
+
+    def __init__(self, buckets: Optional[TokenBuckets] = None, gate: Optional[WriterGate] = None):
+        self.buckets = buckets or TokenBuckets()
+        self.gate = gate or WriterGate()
+
+
+def _client() -> str:
+    if ADMISSION_CLIENT_HEADER and ADMISSION_CLIENT_HEADER in request.headers:
+        return request.headers[ADMISSION_CLIENT_HEADER].split(",")[0].strip()
+    return request.remote_addr or "unknown"
+
+def _reject(reason: str, retry_after: float) -> Response:
+    REJECTIONS.inc(reason=reason)
+    logger.warning("Rejected %s %s from %s: %s", request.method, request.path, _client(), reason)
+    response = make_response(jsonify({'error': f"Too many write requests ({reason}), retry later"}), 429)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def limit_write_rate(route: F) -> F:
+    """
+    Decorates a write route with the app's per-client rate limit only.
+
+    Requests over the client's rate are rejected at once with 429 and a Retry-After of when the
+    next token is due. Use it with hold_writer_slot on the part of the route that writes, so slow
+    work before the write (e.g. a random.org request) does not hold a writer slot.
+
+    Args:
+        route (Callable): The route function.
+
+    Returns:
+        Callable: The wrapped route.
+    """
+    @functools.wraps(route)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        controller = current_app.extensions.get('write_admission')
+        if controller is not None:
+            retry_after = controller.buckets.take(_client())
+            if retry_after:
+                return _reject('rate_limited', retry_after)
+        return route(*args, **kwargs)
+    return wrapper  # type: ignore[return-value]
+
+@contextlib.contextmanager
+def writer_slot() -> Iterator[None]:
+    """
+    Holds one of the app's writer slots for the duration of the with block.
+
+    For routes that write in several steps (e.g. a chunked migration) and should let other write
+    requests in between them; routes that write once use hold_writer_slot instead.
+
+    Raises:
+        WriterSlotUnavailable: If the queue is full or the wait exceeds max_wait.
+    """
+    controller = current_app.extensions.get('write_admission')
+    if controller is None:
+        yield
+        return
+
+    reason = controller.gate.enter()
+    if reason is not None:
+        raise WriterSlotUnavailable(reason, controller.gate.max_wait)
+    try:
+        yield
+    finally:
+        controller.gate.leave()
+
+def writer_slot_rejected(error: WriterSlotUnavailable) -> Response:
+    """
+    Builds the 429 response for a request that could not take a writer slot (see writer_slot).
+
+    Args:
+        error (WriterSlotUnavailable): The rejection.
+
+    Returns:
+        Response: The 429 response, with a Retry-After header.
+    """
+    return _reject(error.reason, error.retry_after)
+
+def hold_writer_slot(function: F) -> F:
+    """
+    Decorates a function returning a response so it runs holding one of the app's writer slots.
+
+    The request waits for a slot; if the queue is full or the wait exceeds max_wait the function
+    is not called and a 429 response is returned instead.
+
+    Args:
+        function (Callable): The function, called in a request context.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            with writer_slot():
+                return function(*args, **kwargs)
+        except WriterSlotUnavailable as e:
+            return writer_slot_rejected(e)
+    return wrapper  # type: ignore[return-value]
+
+def admit_writes(route: F) -> F:
+    """
+    Decorates a write route with the app's admission control (see AdmissionController).
+
+    Requests over the client's rate are rejected at once (see limit_write_rate). Otherwise the
+    whole route runs holding a writer slot (see hold_writer_slot). Routes run unchanged when the
+    app has no controller (ADMISSION_CONTROL=false).
+
+    Args:
+        route (Callable): The route function.
+
+    Returns:
+        Callable: The wrapped route.
+    """
+    return limit_write_rate(hold_writer_slot(route))
+
+def install_admission_control(app: Flask) -> None:
+    """
+    Gives an app its AdmissionController when ADMISSION_CONTROL is set.
+
+    Args:
+        app (Flask): The app to configure.
+    """
+    if ADMISSION_CONTROL:
+        app.extensions['write_admission'] = AdmissionController()
@@ -0,0 +1,160 @@
+import gzip
+import logging
+import os
+from typing import Any, Iterable, Iterator, Optional
+import zlib
+
+from flask import Response, current_app, request, stream_with_context
+
+# brotli is optional; without it responses are only ever gzip encoded
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Buffered responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+# Number of list items encoded into each chunk of a streamed JSON response
+STREAM_CHUNK_ITEMS = int(os.getenv("STREAM_CHUNK_ITEMS", "500"))
+
+_END = object()
+
+
+####################################################
+#
+# Compression
+#
+####################################################
+
+
+def _accepted_encoding() -> Optional[str]:
+    """
+    Picks the best content coding supported by both the client and this service.
+
+    Returns:
+        Optional[str]: 'br' or 'gzip', or None if the client accepts neither.
+    """
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(supported)
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compresses a streamed body chunk by chunk, flushing after each chunk so the
+    client keeps receiving data as soon as it is produced.
+
+    Args:
+        chunks (Iterable[bytes]): The uncompressed body chunks.
+        encoding (str): 'br' or 'gzip'.
+
+    Yields:
+        bytes: The compressed body chunks.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESSION_LEVEL)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        # wbits=31 selects the gzip container
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+def compress_response(response: Response) -> Response:
+    """
+    Compresses a response with gzip or brotli when the client accepts it.
+
+    Buffered responses are only compressed above COMPRESSION_MIN_SIZE bytes, since small bodies
+    do not shrink enough to pay for the CPU time. Streamed responses are always compressed
+    incrementally. Meant to be registered with ``app.after_request``.
+
+    Args:
+        response (Response): The response produced by the route.
+
+    Returns:
+        Response: The (possibly) compressed response.
+    """
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _accepted_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=COMPRESSION_LEVEL))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=COMPRESSION_LEVEL))
+        logger.debug("Compressed response from %d to %d bytes with %s", len(data), response.content_length, encoding)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+####################################################
+#
+# Streaming
+#
+####################################################
+
+
+def stream_json_list(envelope: dict[str, Any], key: str, items: Iterator[Any]) -> Response:
+    """
+    Streams a JSON object whose ``key`` member is a (potentially very large) list.
+
+    The body is equivalent to ``jsonify({**envelope, key: list(items)})`` but items are encoded
+    and sent in chunks as they are produced, so neither the list nor its serialization is ever
+    held in memory in full. The first item is pulled eagerly so that errors raised while running
+    the query surface before the response status is sent.
+
+    Args:
+        envelope (dict[str, Any]): The other members of the response object (e.g. status).
+        key (str): The name of the list member.
+        items (Iterator[Any]): An iterator producing the JSON-serializable list items.
+
+    Returns:
+        Response: A streamed 200 response with an application/json body.
+    """
+    dumps = current_app.json.dumps
+    first = next(items, _END)
+
+    def generate() -> Iterator[str]:
+        head = dumps(envelope)[:-1]
+        yield head + (', ' if envelope else '') + dumps(key) + ': ['
+        if first is _END:
+            yield ']}'
+            return
+        buffer = [dumps(first)]
+        for item in items:
+            buffer.append(', ' + dumps(item))
+            if len(buffer) >= STREAM_CHUNK_ITEMS:
+                yield ''.join(buffer)
+                buffer = []
+        buffer.append(']}')
+        yield ''.join(buffer)
+
+    return Response(stream_with_context(generate()), status=200, mimetype='application/json')
@@ -0,0 +1,134 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from music_collection.utils import sql_utils
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds between background checks
+READINESS_INTERVAL = float(os.getenv("READINESS_INTERVAL", "5"))
+# A cached result older than this is reported as not ready (e.g. the checker is stuck)
+READINESS_MAX_AGE = float(os.getenv("READINESS_MAX_AGE", "30"))
+# How long a check waits on a locked database before failing
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+
+class ReadinessMonitor:
+    """
+    Checks the database on a background thread and caches the result for readiness probes.
+
+    The checks (SELECT 1, then one row from each table) run every `interval` seconds on a single
+    connection that is kept open between runs and reopened after a failure. Probes only read the
+    cached result, so they never open a connection themselves.
+
+    Attributes:
+        tables (tuple[str, ...]): Tables that must be readable for the service to be ready.
+        interval (float): Seconds between checks.
+        max_age (float): Age in seconds after which a cached result no longer counts as ready.
+    """
+
+    def __init__(self, tables: tuple[str, ...], interval: float = READINESS_INTERVAL,
+                 max_age: float = READINESS_MAX_AGE):
+        self.tables = tables
+        self.interval = interval
+        self.max_age = max_age
+        self._conn: Optional[sqlite3.Connection] = None
+        self._result: Optional[dict[str, Any]] = None
+        self._check_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Runs the first check, then keeps checking in the background. Calling start again is a no-op.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.check_now()
+            self._thread = threading.Thread(target=self._run, name="readiness-monitor", daemon=True)
+            self._thread.start()
+            logger.info("Readiness monitor started (every %.1fs)", self.interval)
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and closes the monitor's connection.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._check_lock:
+            self._close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check_now()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def check_now(self) -> dict[str, Any]:
+        """
+        Runs the checks once and caches the result.
+
+        Returns:
+            dict: The new result (see status).
+        """
+        with self._check_lock:
+            checks = {}
+            error = None
+            start = time.perf_counter()
+            try:
+                if self._conn is None:
+                    self._conn = sql_utils.connect(timeout=READINESS_TIMEOUT, check_same_thread=False)
+                step = time.perf_counter()
+                self._conn.execute("SELECT 1;").fetchone()
+                checks['connection'] = (time.perf_counter() - step) * 1000
+                for table in self.tables:
+                    step = time.perf_counter()
+                    self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1;").fetchone()
+                    checks[f"table:{table}"] = (time.perf_counter() - step) * 1000
+            except sqlite3.Error as e:
+                error = str(e)
+                logger.error("Readiness check failed: %s", error)
+                # Reconnect on the next run in case the database file was replaced
+                self._close()
+
+            self._result = {
+                'ready': error is None,
+                'error': error,
+                'checked_at': time.time(),
+                'latency_ms': (time.perf_counter() - start) * 1000,
+                'checks_ms': checks
+            }
+            return self._result
+
+    def status(self) -> dict[str, Any]:
+        """
+        Returns the cached result without touching the database.
+
+        Returns:
+            dict: ready (bool), error (str or None), checked_at (epoch seconds), age_seconds,
+                  latency_ms for the whole run and checks_ms for each check.
+        """
+        result = self._result
+        if result is None:
+            return {'ready': False, 'error': 'Readiness has not been checked yet', 'checked_at': None,
+                    'age_seconds': None, 'latency_ms': None, 'checks_ms': {}}
+
+        status = dict(result, age_seconds=time.time() - result['checked_at'])
+        if status['ready'] and status['age_seconds'] > self.max_age:
+            status['ready'] = False
+            status['error'] = f"Last successful check is {status['age_seconds']:.0f}s old"
+        return status
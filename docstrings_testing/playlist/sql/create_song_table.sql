@@ -1,4 +1,6 @@
+PRAGMA auto_vacuum = INCREMENTAL;
 DROP TABLE IF EXISTS songs;
+DROP TABLE IF EXISTS songs_archive;
 CREATE TABLE songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     artist TEXT NOT NULL,
@@ -8,5 +10,23 @@ CREATE TABLE songs (
     duration INTEGER NOT NULL CHECK(duration > 0),
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
+    deleted_at TIMESTAMP,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+CREATE TRIGGER songs_deleted_at AFTER UPDATE OF deleted ON songs
+WHEN NEW.deleted AND NOT OLD.deleted
+BEGIN
+    UPDATE songs SET deleted_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TABLE songs_archive (
+    id INTEGER PRIMARY KEY,
+    artist TEXT,
+    title TEXT,
+    year INTEGER,
+    genre TEXT,
+    duration INTEGER,
+    play_count INTEGER,
+    deleted BOOLEAN,
+    deleted_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
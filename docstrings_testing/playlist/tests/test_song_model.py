@@ -13,6 +13,7 @@ from music_collection.models.song_model import (
     get_song_by_compound_key,
     get_all_songs,
     get_random_song,
+    iter_all_songs,
     update_play_count
 )
 
@@ -174,6 +175,18 @@ def test_clear_catalog(mock_cursor, mocker):
     # Verify that the correct SQL script was executed
     mock_cursor.executescript.assert_called_once()
 
+def test_clear_catalog_fast_reset(mock_cursor, mocker):
+    """Test that clearing the catalog restores the empty baseline once fast reset is enabled."""
+    mocker.patch("music_collection.models.song_model.has_baseline", return_value=True)
+    mock_restore = mocker.patch("music_collection.models.song_model.restore_baseline")
+    mock_open = mocker.patch('builtins.open')
+
+    clear_catalog()
+
+    mock_restore.assert_called_once_with("songs_empty")
+    mock_open.assert_not_called()
+    mock_cursor.executescript.assert_not_called()
+
 
 ######################################################
 #
@@ -216,6 +229,17 @@ def test_get_song_by_id_bad_id(mock_cursor):
     with pytest.raises(ValueError, match="Song with ID 999 not found"):
         get_song_by_id(999)
 
+def test_get_song_by_id_archived(mock_cursor):
+    # Simulate that the song is gone from the songs table but present in the archive
+    mock_cursor.fetchone.side_effect = [None, (1,)]
+
+    # Expect an archived song to be reported as deleted rather than not found
+    with pytest.raises(ValueError, match="Song with ID 999 has been deleted"):
+        get_song_by_id(999)
+
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == "SELECT 1 FROM songs_archive WHERE id = ?"
+
 def test_get_song_by_compound_key(mock_cursor):
     # Simulate that the song exists (artist = "Artist Name", title = "Song Title", year = 2022)
     mock_cursor.fetchone.return_value = (1, "Artist Name", "Song Title", 2022, "Pop", 180, False)
@@ -330,6 +354,40 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_iter_all_songs_in_batches(mock_cursor):
+    """Test streaming all songs reads the cursor in batches with fetchmany."""
+
+    # Simulate two batches followed by an exhausted cursor
+    mock_cursor.fetchmany.side_effect = [
+        [(2, "Artist B", "Song B", 2021, "Pop", 180, 20), (1, "Artist A", "Song A", 2020, "Rock", 210, 10)],
+        [(3, "Artist C", "Song C", 2022, "Jazz", 200, 5)],
+        []
+    ]
+
+    songs = list(iter_all_songs(sort_by_play_count=True, batch_size=2))
+
+    expected_result = [
+        {"id": 2, "artist": "Artist B", "title": "Song B", "year": 2021, "genre": "Pop", "duration": 180, "play_count": 20},
+        {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10},
+        {"id": 3, "artist": "Artist C", "title": "Song C", "year": 2022, "genre": "Jazz", "duration": 200, "play_count": 5}
+    ]
+
+    assert songs == expected_result, f"Expected {expected_result}, but got {songs}"
+
+    # Ensure rows were never fetched all at once
+    mock_cursor.fetchall.assert_not_called()
+    mock_cursor.fetchmany.assert_called_with(2)
+
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+        ORDER BY play_count DESC
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
 def test_get_random_song(mock_cursor, mocker):
     """Test retrieving a random song from the catalog."""
 
@@ -423,3 +481,14 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+def test_update_play_count_retries_locked_database(mock_cursor, mocker):
+    """Test that a transient lock error is retried instead of failing the update."""
+    sleep = mocker.patch("music_collection.utils.retry.time.sleep")
+    mock_cursor.fetchone.return_value = [False]
+    mock_cursor.execute.side_effect = [sqlite3.OperationalError("database is locked"), None, None]
+
+    update_play_count(1)
+
+    sleep.assert_called_once()
+    assert mock_cursor.execute.call_count == 3